@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare CRAFT detection on the PyTorch and ONNX Runtime engines (CPU).
+
+Reports mean/p50 latency per engine and whether both engines return the same
+boxes for every image.
+
+    python benchmark_craft_engines.py page1.jpg page2.png --long-size 960 --runs 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from craft_models import CraftNetworks, SharedCraftDetector
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark CRAFT on PyTorch vs ONNX Runtime")
+    parser.add_argument("images", nargs="*", help="Images to detect (default: one synthetic page)")
+    parser.add_argument("--long-size", type=int, default=960)
+    parser.add_argument("--refiner", action="store_true", help="Also run RefineNet")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per image and engine")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Max box coordinate difference in px")
+    return parser.parse_args()
+
+
+def _synthetic_page() -> np.ndarray:
+    page = np.full((1400, 1000, 3), 255, dtype=np.uint8)
+    for row in range(30):
+        cv2.putText(
+            page, f"Line {row + 1}: The quick brown fox jumps over the lazy dog",
+            (40, 60 + row * 44), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2,
+        )
+    return page
+
+
+def _load_images(paths):
+    if not paths:
+        return [("synthetic", _synthetic_page())]
+    images = []
+    for path in paths:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            print(f"ERROR: cannot read {path}", file=sys.stderr)
+            sys.exit(1)
+        images.append((path, img))
+    return images
+
+
+def _sorted_boxes(prediction) -> np.ndarray:
+    boxes = np.asarray(prediction["boxes"], dtype=np.float32).reshape(-1, 4, 2)
+    order = np.lexsort((boxes[:, 0, 0], boxes[:, 0, 1]))
+    return boxes[order]
+
+
+def _time_engine(detector, img, runs, warmup):
+    for _ in range(warmup):
+        detector.detect_text(img)
+    timings = []
+    prediction = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        prediction = detector.detect_text(img)
+        timings.append(time.perf_counter() - started)
+    return timings, prediction
+
+
+def main() -> int:
+    args = _parse_args()
+    images = _load_images(args.images)
+
+    detectors = {}
+    for engine in ("torch", "onnx"):
+        networks = CraftNetworks(cuda=False, engine=engine)
+        if networks.engine != engine:
+            print(f"ERROR: engine {engine} is unavailable (is onnxruntime installed?)", file=sys.stderr)
+            return 1
+        detectors[engine] = SharedCraftDetector(networks, args.long_size, args.refiner)
+
+    report = {"long_size": args.long_size, "refiner": args.refiner, "runs": args.runs, "images": []}
+    all_identical = True
+    for name, img in images:
+        entry = {"image": name, "engines": {}}
+        boxes = {}
+        for engine, detector in detectors.items():
+            timings, prediction = _time_engine(detector, img, args.runs, args.warmup)
+            boxes[engine] = _sorted_boxes(prediction)
+            entry["engines"][engine] = {
+                "mean_ms": round(statistics.mean(timings) * 1000, 1),
+                "p50_ms": round(statistics.median(timings) * 1000, 1),
+                "boxes": int(len(boxes[engine])),
+            }
+
+        same_count = len(boxes["torch"]) == len(boxes["onnx"])
+        max_diff = float(np.abs(boxes["torch"] - boxes["onnx"]).max()) if same_count and len(boxes["torch"]) else 0.0
+        identical = same_count and max_diff <= args.tolerance
+        all_identical = all_identical and identical
+        entry["boxes_identical"] = identical
+        entry["max_box_diff_px"] = round(max_diff, 3) if same_count else None
+        entry["speedup"] = round(entry["engines"]["torch"]["mean_ms"] / entry["engines"]["onnx"]["mean_ms"], 2)
+        report["images"].append(entry)
+
+    report["boxes_identical"] = all_identical
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if all_identical else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the /ocr pipeline on synthetic Thai/English pages.
+
+Renders a fixed set of pages with synthetic_pages (seeded, so every run sees
+the same pixels), then runs the same functions as /ocr in-process for every
+combination of CRAFT long_size, refiner, reader languages and engine. Each
+configuration runs in its own subprocess, so model state and peak RSS are
+per configuration. For each one it reports throughput, latency percentiles,
+median stage times, peak RSS and character accuracy against the rendered
+text, as JSON. ``auto`` in --long-sizes also reports the sizes it picked and
+the CRAFT input pixels it saved against the device default long_size.
+
+    python benchmark_ocr.py --output before.json
+    python benchmark_ocr.py --long-sizes 640,960,1280,auto --refiner off,on \\
+        --languages "th,en;en" --engines torch,onnx,onnx-int8 --output after.json
+    python benchmark_ocr.py --compare before.json after.json
+
+No network access is needed once the model weights are cached. Set
+OCR_SYNTH_FONT to a Thai-capable font; without one, pages are English only.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from importlib import metadata
+from typing import Any, Dict, List, Optional
+
+# Engine name -> environment read by craft_models/reader_pool at import
+ENGINES = {
+    "torch": {"CRAFT_ENGINE": "torch", "CRAFT_QUANTIZE": "none"},
+    "onnx": {"CRAFT_ENGINE": "onnx", "CRAFT_QUANTIZE": "none"},
+    "onnx-int8": {"CRAFT_ENGINE": "onnx", "CRAFT_QUANTIZE": "int8"},
+}
+_VERSIONED_PACKAGES = ("torch", "easyocr", "craft-text-detector", "onnxruntime", "opencv-python-headless", "numpy")
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the /ocr pipeline on synthetic pages")
+    sweep = parser.add_argument_group("sweep")
+    sweep.add_argument("--long-sizes", default="960", help="Comma-separated CRAFT long_size values or auto")
+    sweep.add_argument("--refiner", default="off", help="Comma-separated: off, on")
+    sweep.add_argument("--languages", default="th,en", help="Reader language sets separated by ';'")
+    sweep.add_argument("--engines", default="torch", help=f"Comma-separated: {', '.join(ENGINES)}")
+    sweep.add_argument("--recognition-mode", default="recognizer", choices=["recognizer", "readtext"])
+
+    pages = parser.add_argument_group("synthetic pages")
+    pages.add_argument("--pages", type=int, default=8)
+    pages.add_argument("--seed", type=int, default=2024, help="Keep fixed when comparing runs")
+    pages.add_argument("--width", type=int, default=1240)
+    pages.add_argument("--height", type=int, default=1754)
+    pages.add_argument("--lines", type=int, default=24, help="Lines per page (text density)")
+    pages.add_argument("--line-spacing", type=float, default=1.0, help="Gap multiplier between lines")
+    pages.add_argument("--font-sizes", default="18,22,26,30,36", help="Comma-separated font sizes in px")
+    pages.add_argument("--thai-ratio", type=float, default=0.5, help="Share of Thai lines")
+    pages.add_argument("--rotation", type=float, default=0.0, help="Max page skew in degrees (either way)")
+    pages.add_argument("--noise", type=float, default=0.0, help="Gaussian noise std in grey levels")
+
+    parser.add_argument("--repeats", type=int, default=1, help="Timed passes over the page set")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed pages before timing")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="Compare two reports instead of running")
+    parser.add_argument("--run-config", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def _page_options(args) -> Dict[str, Any]:
+    return {
+        "count": args.pages,
+        "seed": args.seed,
+        "width": args.width,
+        "height": args.height,
+        "lines": args.lines,
+        "line_spacing": args.line_spacing,
+        "font_sizes": [int(size) for size in _csv(args.font_sizes)],
+        "thai_ratio": args.thai_ratio,
+        "rotation": args.rotation,
+        "noise": args.noise,
+    }
+
+
+def _configs(args) -> List[Dict[str, Any]]:
+    configs = []
+    for engine in _csv(args.engines):
+        if engine not in ENGINES:
+            raise SystemExit(f"ERROR: unknown engine {engine!r} (choose from {', '.join(ENGINES)})")
+        for languages in [_csv(item) for item in args.languages.split(";") if item.strip()]:
+            for long_size in [size if size == "auto" else int(size) for size in _csv(args.long_sizes)]:
+                for refiner in _csv(args.refiner):
+                    configs.append({
+                        "engine": engine,
+                        "languages": languages,
+                        "long_size": long_size,
+                        "refiner": refiner.lower() in ("1", "true", "yes", "on"),
+                    })
+    return configs
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 1)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _normalize(text: str) -> str:
+    # Word spacing is not meaningful for Thai, so accuracy ignores whitespace
+    return "".join(text.split())
+
+
+def _run_config(config: Dict[str, Any], page_options: Dict[str, Any], repeats: int, warmup: int,
+                recognition_mode: str) -> Dict[str, Any]:
+    """One configuration, inside its own process (see main)."""
+    import cv2
+
+    from craft_autosize import craft_input_pixels, is_auto_long_size
+    from metrics import StageTimings
+    from synthetic_pages import char_error_rate, synthetic_pages
+
+    started = time.perf_counter()
+    import main as app
+
+    app.device_config = app._configure_device()
+    auto = is_auto_long_size(config["long_size"])
+    app.get_craft_detector(long_size=None if auto else config["long_size"], refiner=config["refiner"])
+    app.get_ocr_reader(config["languages"])
+    load_seconds = time.perf_counter() - started
+
+    count = page_options.pop("count")
+    seed = page_options.pop("seed")
+    pages = []
+    for img, truth in synthetic_pages(count, seed=seed, **page_options):
+        _, encoded = cv2.imencode(".png", img)
+        pages.append((encoded.tobytes(), _normalize("".join(line["text"] for line in truth)), img.shape))
+
+    def run(contents):
+        timings = StageTimings()
+        page_started = time.perf_counter()
+        result = app._run_craft_ocr(
+            contents, config["languages"], config["long_size"], config["refiner"], False, recognition_mode,
+            timings=timings,
+        )
+        return result, timings, time.perf_counter() - page_started
+
+    for contents, _, _ in pages[:warmup]:
+        run(contents)
+
+    latencies, stages, errors, regions = [], {}, [], 0
+    chosen, savings = {}, []
+    default_long_size = app.device_config["craft_long_size"]
+    wall_started = time.perf_counter()
+    for _ in range(repeats):
+        for contents, reference, shape in pages:
+            result, timings, seconds = run(contents)
+            craft_settings = result.get("craft_settings", {})
+            if auto and isinstance(craft_settings.get("long_size"), int):
+                scale = craft_settings.get("decode_scale", 1)
+                shape = (shape[0] // scale, shape[1] // scale)
+                long_size = craft_settings["long_size"]
+                chosen[long_size] = chosen.get(long_size, 0) + 1
+                savings.append(1 - craft_input_pixels(long_size, shape) / craft_input_pixels(default_long_size, shape))
+            latencies.append(seconds * 1000)
+            for stage, stage_seconds in timings.items():
+                stages.setdefault(stage, []).append(stage_seconds * 1000)
+            errors.append(char_error_rate(_normalize(result.get("text", "")), reference))
+            regions += result.get("total_regions", 0)
+    wall = time.perf_counter() - wall_started
+
+    processed = len(latencies)
+    auto_report = {}
+    if auto:
+        auto_report["auto_long_size"] = {
+            "default_long_size": default_long_size,
+            "chosen": {str(size): count for size, count in sorted(chosen.items())},
+            "mean_long_size": round(sum(size * count for size, count in chosen.items()) / len(savings), 1)
+            if savings else None,
+            # Positive: fewer CRAFT input pixels than the default; negative for pages that needed more
+            "craft_pixels_saved_pct": round(statistics.mean(savings) * 100, 1) if savings else None,
+        }
+    return {
+        **config,
+        "pages": processed,
+        "model_load_seconds": round(load_seconds, 2),
+        "throughput_pages_per_second": round(processed / wall, 3) if wall else None,
+        "latency_ms": _percentiles(latencies),
+        "stage_p50_ms": {stage: round(statistics.median(values), 1) for stage, values in stages.items()},
+        "boxes_per_page": round(regions / processed, 1) if processed else None,
+        "char_accuracy": round(max(0.0, 1.0 - statistics.mean(errors)), 4) if errors else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        **auto_report,
+    }
+
+
+def _environment() -> Dict[str, Any]:
+    versions = {}
+    for package in _VERSIONED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def _spawn_config(config, args) -> Dict[str, Any]:
+    env = dict(os.environ, **ENGINES[config["engine"]])
+    # Measure the pipeline itself: no result cache, no worker processes
+    env.update({"OCR_CACHE_ENABLED": "false", "OCR_PROCESS_WORKERS": "0"})
+    payload = {
+        "config": config,
+        "pages": _page_options(args),
+        "repeats": args.repeats,
+        "warmup": args.warmup,
+        "recognition_mode": args.recognition_mode,
+    }
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-config", json.dumps(payload)],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        detail = (proc.stderr.strip().splitlines() or ["benchmark worker failed"])[-1]
+        return {**config, "error": detail}
+    return json.loads(lines[-1])
+
+
+def _compare(baseline_path: str, candidate_path: str) -> int:
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    with open(candidate_path, encoding="utf-8") as handle:
+        candidate = json.load(handle)
+
+    def key(result):
+        return (result["engine"], ",".join(result["languages"]), result["long_size"], result["refiner"])
+
+    before = {key(result): result for result in baseline["results"] if "error" not in result}
+    rows = []
+    for result in candidate["results"]:
+        old = before.get(key(result))
+        if old is None or "error" in result:
+            continue
+
+        def delta(new_value, old_value):
+            if new_value is None or old_value in (None, 0):
+                return None
+            return round((new_value - old_value) / old_value * 100, 1)
+
+        rows.append({
+            "engine": result["engine"],
+            "languages": result["languages"],
+            "long_size": result["long_size"],
+            "refiner": result["refiner"],
+            "throughput_change_pct": delta(result["throughput_pages_per_second"], old["throughput_pages_per_second"]),
+            "p50_latency_change_pct": delta(result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            "p95_latency_change_pct": delta(result["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            "peak_rss_change_pct": delta(result["peak_rss_mb"], old["peak_rss_mb"]),
+            "char_accuracy_change": (
+                round(result["char_accuracy"] - old["char_accuracy"], 4)
+                if result["char_accuracy"] is not None and old["char_accuracy"] is not None else None
+            ),
+        })
+    same_pages = baseline.get("pages") == candidate.get("pages")
+    baseline_env, candidate_env = baseline.get("environment", {}), candidate.get("environment", {})
+    print(json.dumps({
+        "baseline": baseline_env.get("commit"),
+        "candidate": candidate_env.get("commit"),
+        "same_pages": same_pages,
+        "same_machine": baseline_env.get("platform") == candidate_env.get("platform"),
+        "configs": rows,
+    }, indent=2, ensure_ascii=False))
+    return 0 if same_pages else 2
+
+
+def main() -> int:
+    args = _parse_args()
+    if args.run_config:
+        payload = json.loads(args.run_config)
+        result = _run_config(
+            payload["config"], payload["pages"], payload["repeats"], payload["warmup"], payload["recognition_mode"]
+        )
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+    if args.compare:
+        return _compare(*args.compare)
+
+    results = []
+    for config in _configs(args):
+        print(f"Benchmarking {config}", file=sys.stderr)
+        results.append(_spawn_config(config, args))
+        print(json.dumps(results[-1], ensure_ascii=False), file=sys.stderr)
+
+    report = {
+        "environment": _environment(),
+        "pages": _page_options(args),
+        "repeats": args.repeats,
+        "recognition_mode": args.recognition_mode,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+``craft_long_size=auto``: pick CRAFT's input size per image from the height of its text.
+
+A cheap pass over a downscaled grayscale copy (adaptive threshold plus
+connected components) estimates the dominant character height. The chosen
+long_size is the smallest bucket that still leaves characters at least
+CRAFT_AUTO_MIN_CHAR_PX tall in CRAFT's input: big receipt text runs at 640,
+dense legal pages go up to CRAFT_AUTO_MAX_LONG_SIZE.
+"""
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from craft_models import CRAFT_LONG_SIZE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+AUTO_LONG_SIZE = "auto"
+# Characters smaller than this in CRAFT's input start to lose their region/affinity peaks
+CRAFT_AUTO_MIN_CHAR_PX = float(os.getenv("CRAFT_AUTO_MIN_CHAR_PX", "12"))
+CRAFT_AUTO_MAX_LONG_SIZE = int(os.getenv("CRAFT_AUTO_MAX_LONG_SIZE", str(CRAFT_LONG_SIZE_BUCKETS[-1])))
+# Long side of the copy the estimate runs on
+CRAFT_AUTO_PROBE_SIZE = int(os.getenv("CRAFT_AUTO_PROBE_SIZE", "1024"))
+# Fewer glyph-like components than this (blank page, photo) means no estimate
+CRAFT_AUTO_MIN_COMPONENTS = int(os.getenv("CRAFT_AUTO_MIN_COMPONENTS", "8"))
+
+
+def is_auto_long_size(long_size) -> bool:
+    return isinstance(long_size, str) and long_size == AUTO_LONG_SIZE
+
+
+def _weighted_median(values: np.ndarray, weights: np.ndarray) -> float:
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def estimate_char_height(img: np.ndarray, probe_size: int = CRAFT_AUTO_PROBE_SIZE) -> Tuple[Optional[float], int]:
+    """
+    (dominant character height in ``img`` pixels or None, glyph-like components counted).
+
+    Heights are weighted by component width, so letters along a text line
+    outweigh Thai vowel and tone marks, specks and the odd large blob.
+    """
+    import cv2
+
+    height, width = img.shape[:2]
+    ratio = min(1.0, probe_size / max(height, width))
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    if ratio < 1.0:
+        gray = cv2.resize(
+            gray, (max(1, round(width * ratio)), max(1, round(height * ratio))), interpolation=cv2.INTER_AREA
+        )
+    # Local thresholding survives the shadows and gradients of phone photos
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 15)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+
+    probe_height, probe_width = binary.shape
+    w = stats[1:, cv2.CC_STAT_WIDTH].astype(np.float64)
+    h = stats[1:, cv2.CC_STAT_HEIGHT].astype(np.float64)
+    area = stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
+    glyph = (
+        (h >= 2) & (area >= 3)
+        # Rules, table borders and images
+        & (w / h <= 15) & (h / np.maximum(w, 1) <= 15)
+        & (h <= probe_height * 0.2) & (w <= probe_width * 0.5)
+        & (area >= 0.1 * w * h)
+    )
+    count = int(glyph.sum())
+    if count < CRAFT_AUTO_MIN_COMPONENTS:
+        return None, count
+    return _weighted_median(h[glyph], w[glyph]) / ratio, count
+
+
+def choose_long_size(
+    char_height: float,
+    image_shape,
+    buckets: Sequence[int] = CRAFT_LONG_SIZE_BUCKETS,
+    min_char_px: float = CRAFT_AUTO_MIN_CHAR_PX,
+    max_long_size: int = CRAFT_AUTO_MAX_LONG_SIZE,
+) -> int:
+    """
+    Smallest bucket that keeps ``char_height`` >= ``min_char_px`` after CRAFT's resize.
+
+    CRAFT rescales the long side to exactly long_size, upscaling small images
+    too, so every bucket is checked the same way.
+    """
+    long_side = max(image_shape[:2])
+    candidates = [bucket for bucket in buckets if bucket <= max_long_size] or [buckets[0]]
+    for bucket in candidates:
+        if char_height * bucket / long_side >= min_char_px:
+            return bucket
+    return candidates[-1]
+
+
+def resolve_long_size(img: np.ndarray, fallback: int) -> Tuple[int, Dict[str, Any]]:
+    """The long_size to run CRAFT at for ``img``, plus what the choice was based on."""
+    started = time.perf_counter()
+    char_height, components = estimate_char_height(img)
+    if char_height is None:
+        long_size = fallback
+        logger.info(f"CRAFT auto long_size: no text scale estimate ({components} components), using {fallback}")
+    else:
+        long_size = choose_long_size(char_height, img.shape)
+        logger.info(f"CRAFT auto long_size: characters ~{char_height:.1f}px, using {long_size}")
+    return long_size, {
+        "char_height_px": round(char_height, 1) if char_height is not None else None,
+        "components": components,
+        "min_char_px": CRAFT_AUTO_MIN_CHAR_PX,
+        "estimate_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def source_long_size(detail_factor: float = 1.0) -> int:
+    """
+    long_size to decode or rasterize for under auto, so the source keeps
+    CRAFT_AUTO_MAX_LONG_SIZE pixels on its long side whatever size is chosen.
+    """
+    return math.ceil(CRAFT_AUTO_MAX_LONG_SIZE / detail_factor)
+
+
+def craft_input_pixels(long_size: int, image_shape) -> float:
+    """Pixels CRAFT processes for an image of ``image_shape`` at ``long_size`` (its cost driver)."""
+    height, width = image_shape[:2]
+    scale = long_size / max(height, width)
+    return height * scale * width * scale
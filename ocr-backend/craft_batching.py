@@ -0,0 +1,218 @@
+"""Cross-request dynamic micro-batching for CRAFT text detection."""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CRAFT_BATCH_MAX_SIZE = max(1, int(os.getenv("CRAFT_BATCH_MAX_SIZE", "4")))
+CRAFT_BATCH_MAX_WAIT_MS = max(0.0, float(os.getenv("CRAFT_BATCH_MAX_WAIT_MS", "5")))
+
+
+def detect_batch(detector, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Run CRAFT (and the refiner, if loaded) on several images in one forward pass.
+
+    Mirrors craft_text_detector.predict.get_prediction: each image is resized to
+    the detector's long_size, the batch is padded to the largest resized image
+    with the same value resize_aspect_ratio pads with, and score maps are cropped
+    back to each image's own size before box extraction.
+    """
+    import cv2
+    import torch
+    from craft_text_detector import craft_utils, image_utils
+
+    prepared = []
+    for image in images:
+        image = image_utils.read_image(image)
+        img_resized, target_ratio, _ = image_utils.resize_aspect_ratio(
+            image, detector.long_size, interpolation=cv2.INTER_LINEAR
+        )
+        prepared.append((img_resized, target_ratio))
+
+    max_h = max(item[0].shape[0] for item in prepared)
+    max_w = max(item[0].shape[1] for item in prepared)
+    # resize_aspect_ratio zero-pads before normalization; pad the batch the same way
+    pad_value = image_utils.normalizeMeanVariance(np.zeros((1, 1, 3), dtype=np.float32))[0, 0]
+    batch = np.empty((len(prepared), max_h, max_w, 3), dtype=np.float32)
+    batch[:] = pad_value
+    for i, (img_resized, _) in enumerate(prepared):
+        h, w = img_resized.shape[:2]
+        batch[i, :h, :w] = image_utils.normalizeMeanVariance(img_resized)
+
+    x = torch.from_numpy(batch).permute(0, 3, 1, 2)  # [b, h, w, c] to [b, c, h, w]
+    if detector.cuda:
+        x = x.cuda()
+
+    with torch.no_grad():
+        y, feature = detector.craft_net(x)
+        score_text_batch = y[:, :, :, 0].cpu().data.numpy()
+        if detector.refine_net is not None:
+            y_refiner = detector.refine_net(y, feature)
+            score_link_batch = y_refiner[:, :, :, 0].cpu().data.numpy()
+        else:
+            score_link_batch = y[:, :, :, 1].cpu().data.numpy()
+
+    results = []
+    for i, (img_resized, target_ratio) in enumerate(prepared):
+        # Score maps are half the input resolution
+        map_h, map_w = img_resized.shape[0] // 2, img_resized.shape[1] // 2
+        score_text = score_text_batch[i, :map_h, :map_w]
+        score_link = score_link_batch[i, :map_h, :map_w]
+
+        boxes, polys = craft_utils.getDetBoxes(
+            score_text,
+            score_link,
+            detector.text_threshold,
+            detector.link_threshold,
+            detector.low_text,
+            True,
+        )
+        ratio = 1 / target_ratio
+        boxes = craft_utils.adjustResultCoordinates(boxes, ratio, ratio)
+        polys = craft_utils.adjustResultCoordinates(polys, ratio, ratio)
+        for k in range(len(polys)):
+            if polys[k] is None:
+                polys[k] = boxes[k]
+        results.append({"boxes": boxes, "polys": polys})
+
+    return results
+
+
+class _DetectRequest:
+    __slots__ = ("key", "detector", "image", "future")
+
+    def __init__(self, key, detector, image):
+        self.key = key
+        self.detector = detector
+        self.image = image
+        self.future: Future = Future()
+
+
+class CraftBatchScheduler:
+    """
+    Collect detection requests from concurrent callers for up to ``max_wait_ms``
+    and run requests that share a ``(long_size, refiner)`` key as one batch.
+
+    ``detect()`` is called from inference worker threads and blocks until that
+    caller's own result is ready. ``concurrency`` is how many callers can be
+    detecting at once; with one there is nobody to batch with, so detection
+    runs inline. Batches for different keys run in parallel.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = CRAFT_BATCH_MAX_SIZE,
+        max_wait_ms: float = CRAFT_BATCH_MAX_WAIT_MS,
+        concurrency: int = 1,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.concurrency = max(1, concurrency)
+        self._requests: queue.Queue = queue.Queue()
+        self._thread = None
+        self._runners = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._busy_seconds = 0.0
+        self._largest_batch = 0
+        self._fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1 and self.concurrency > 1
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._runners is None:
+                self._runners = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="craft-batch")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="craft-batcher", daemon=True)
+                self._thread.start()
+
+    def detect(self, detector, key, image) -> Dict[str, Any]:
+        """Detect text in ``image``, possibly batched with other callers' images."""
+        if not self.enabled:
+            return detector.detect_text(image)
+
+        self._ensure_started()
+        request = _DetectRequest(key, detector, image)
+        self._requests.put(request)
+        return request.future.result()
+
+    def _collect(self) -> Dict[Any, List[_DetectRequest]]:
+        first = self._requests.get()
+        groups = {first.key: [first]}
+        collected = 1
+        deadline = time.monotonic() + self.max_wait
+        while collected < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            groups.setdefault(request.key, []).append(request)
+            collected += 1
+        return groups
+
+    def _loop(self):
+        while True:
+            groups = self._collect()
+            for requests in groups.values():
+                for start in range(0, len(requests), self.max_batch_size):
+                    self._runners.submit(self._run, requests[start:start + self.max_batch_size])
+
+    def _run(self, requests: List[_DetectRequest]):
+        started = time.perf_counter()
+        detector = requests[0].detector
+        try:
+            if len(requests) == 1:
+                results = [detector.detect_text(requests[0].image)]
+            else:
+                results = detect_batch(detector, [request.image for request in requests])
+            for request, result in zip(requests, results):
+                request.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Batched CRAFT detection failed, running images one by one: {str(e)}")
+            with self._stats_lock:
+                self._fallbacks += 1
+            for request in requests:
+                if request.future.done():
+                    continue
+                try:
+                    request.future.set_result(detector.detect_text(request.image))
+                except Exception as single_error:
+                    request.future.set_exception(single_error)
+
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._batches += 1
+            self._images += len(requests)
+            self._busy_seconds += elapsed
+            self._largest_batch = max(self._largest_batch, len(requests))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "enabled": self.enabled,
+                "concurrency": self.concurrency,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "images": self._images,
+                "avg_batch_size": round(self._images / self._batches, 2) if self._batches else None,
+                "largest_batch": self._largest_batch,
+                "images_per_second": round(self._images / self._busy_seconds, 2) if self._busy_seconds else None,
+                "batch_fallbacks": self._fallbacks,
+                "queued": self._requests.qsize(),
+            }
@@ -0,0 +1,292 @@
+"""Shared CRAFT / RefineNet weights with cheap per-long_size detector views."""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_buckets(value: str) -> List[int]:
+    buckets = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            buckets.append(int(part))
+        except ValueError:
+            logger.warning(f"Ignoring invalid CRAFT long_size bucket {part!r}")
+    return sorted(set(buckets)) or [640, 960, 1280, 1600, 1920, 2560]
+
+
+CRAFT_LONG_SIZE_BUCKETS = _parse_buckets(os.getenv("CRAFT_LONG_SIZE_BUCKETS", "640,960,1280,1600,1920,2560"))
+CRAFT_CACHE_MAX_CONFIGS = max(1, int(os.getenv("CRAFT_CACHE_MAX_CONFIGS", "8")))
+CRAFT_CACHE_MEMORY_MB = float(os.getenv("CRAFT_CACHE_MEMORY_MB", "512"))
+# "torch" (craft_text_detector as-is) or "onnx" (onnxruntime, CPU only)
+CRAFT_ENGINE = os.getenv("CRAFT_ENGINE", "torch").strip().lower()
+# "none" or "int8" (static INT8 CRAFT on ONNX Runtime, CPU only)
+CRAFT_QUANTIZE = os.getenv("CRAFT_QUANTIZE", "none").strip().lower()
+
+
+def snap_long_size(long_size: int) -> int:
+    """Smallest configured bucket that is >= long_size (or the largest bucket)."""
+    for bucket in CRAFT_LONG_SIZE_BUCKETS:
+        if long_size <= bucket:
+            return bucket
+    return CRAFT_LONG_SIZE_BUCKETS[-1]
+
+
+def _parameter_bytes(module) -> int:
+    if module is None:
+        return 0
+    if hasattr(module, "memory_bytes"):
+        return module.memory_bytes()
+    return sum(p.numel() * p.element_size() for p in module.parameters())
+
+
+class CraftNetworks:
+    """
+    One copy of the CRAFT and (lazily) RefineNet weights for the process.
+
+    With ``engine="onnx"`` the networks are onnxruntime sessions (exported from
+    the PyTorch weights once and cached on disk) that take and return torch
+    tensors, so every caller works unchanged. ``quantize="int8"`` swaps CRAFT
+    for a statically quantized ONNX model (RefineNet stays FP32).
+    """
+
+    def __init__(self, cuda: bool, engine: str = "torch", quantize: str = "none"):
+        from craft_onnx import resolve_engine
+
+        self.cuda = cuda
+        self.engine = resolve_engine(engine, cuda, quantize)
+        self.quantize = quantize if self.engine == "onnx" and quantize == "int8" else "none"
+        self.craft_net = None
+        self.refine_net = None
+        self._lock = threading.Lock()
+
+    def get_craft_net(self):
+        with self._lock:
+            if self.craft_net is None:
+                logger.info(
+                    f"Loading shared CRAFT network (cuda={self.cuda}, engine={self.engine}, "
+                    f"quantize={self.quantize})"
+                )
+                if self.quantize == "int8":
+                    from craft_quantize import load_craft_int8
+
+                    self.craft_net = load_craft_int8()
+                elif self.engine == "onnx":
+                    from craft_onnx import load_craft_onnx
+
+                    self.craft_net = load_craft_onnx()
+                else:
+                    from model_snapshots import load_craftnet
+
+                    self.craft_net = load_craftnet(self.cuda)
+            return self.craft_net
+
+    def get_refine_net(self):
+        with self._lock:
+            if self.refine_net is None:
+                logger.info(f"Loading shared RefineNet (cuda={self.cuda}, engine={self.engine})")
+                if self.engine == "onnx":
+                    from craft_onnx import load_refiner_onnx
+
+                    self.refine_net = load_refiner_onnx()
+                else:
+                    from model_snapshots import load_refinenet
+
+                    self.refine_net = load_refinenet(self.cuda)
+            return self.refine_net
+
+    def release_refine_net(self):
+        with self._lock:
+            if self.refine_net is not None:
+                logger.info("Releasing shared RefineNet")
+                self.refine_net = None
+                self._empty_cache()
+
+    def release(self):
+        with self._lock:
+            self.craft_net = None
+            self.refine_net = None
+            self._empty_cache()
+
+    def _empty_cache(self):
+        if self.cuda:
+            from craft_text_detector import empty_cuda_cache
+
+            empty_cuda_cache()
+
+    def memory_bytes(self) -> Dict[str, int]:
+        return {
+            "craft_net": _parameter_bytes(self.craft_net),
+            "refine_net": _parameter_bytes(self.refine_net),
+        }
+
+
+class SharedCraftDetector:
+    """
+    Drop-in for craft_text_detector.Craft at one long_size.
+
+    Holds no weights of its own: craft_net/refine_net come from CraftNetworks,
+    so any number of long_size views cost a few attributes each. A view keeps
+    references to the networks it was created with, so a request still using
+    a view the cache has evicted finishes on those weights (freed with the
+    view) instead of silently loading them again behind the cache's back.
+    """
+
+    def __init__(
+        self,
+        networks: CraftNetworks,
+        long_size: int,
+        refiner: bool,
+        text_threshold: float = 0.7,
+        link_threshold: float = 0.4,
+        low_text: float = 0.4,
+    ):
+        self.networks = networks
+        self.long_size = long_size
+        self.refiner = refiner
+        self.cuda = networks.cuda
+        self.text_threshold = text_threshold
+        self.link_threshold = link_threshold
+        self.low_text = low_text
+        self.craft_net = networks.get_craft_net()
+        self.refine_net = networks.get_refine_net() if refiner else None
+
+    def detect_text(self, image) -> Dict[str, Any]:
+        from craft_text_detector.predict import get_prediction
+
+        return get_prediction(
+            image=image,
+            craft_net=self.craft_net,
+            refine_net=self.refine_net,
+            text_threshold=self.text_threshold,
+            link_threshold=self.link_threshold,
+            low_text=self.low_text,
+            cuda=self.cuda,
+            long_size=self.long_size,
+        )
+
+
+class CraftDetectorCache:
+    """
+    LRU of SharedCraftDetector views keyed by (long_size, refiner).
+
+    Views are cheap, so the bound that matters is on the weights they pin:
+    CRAFT itself is always resident while anything is cached, and RefineNet
+    is released once no cached config uses it. When pinned weights exceed
+    ``memory_mb``, the least recently used refiner configs are evicted first.
+    """
+
+    def __init__(
+        self,
+        max_configs: int = CRAFT_CACHE_MAX_CONFIGS,
+        memory_mb: float = CRAFT_CACHE_MEMORY_MB,
+        engine: str = CRAFT_ENGINE,
+        quantize: str = CRAFT_QUANTIZE,
+    ):
+        self.engine = engine
+        self.quantize = quantize
+        self.max_configs = max_configs
+        self.memory_budget_bytes = int(memory_mb * 1024 * 1024)
+        self._detectors: "OrderedDict[Tuple[int, bool], SharedCraftDetector]" = OrderedDict()
+        self._networks: Optional[CraftNetworks] = None
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    def get(self, long_size: int, refiner: bool, cuda: bool) -> SharedCraftDetector:
+        key = (long_size, refiner)
+        with self._lock:
+            detector = self._detectors.get(key)
+            if detector is not None:
+                self._detectors.move_to_end(key)
+                return detector
+
+            self._ensure_networks(cuda)
+
+            logger.info(f"Creating CRAFT detector view (long_size={long_size}, refiner={refiner})")
+            # Loads the weights now, so the first request doesn't pay for it mid-pipeline
+            detector = SharedCraftDetector(self._networks, long_size, refiner)
+            self._detectors[key] = detector
+            self._enforce_limits(keep=key)
+            return detector
+
+    def _ensure_networks(self, cuda: bool) -> CraftNetworks:
+        if self._networks is None or self._networks.cuda != cuda:
+            self._networks = CraftNetworks(cuda, self.engine, self.quantize)
+        return self._networks
+
+    def shared_craft_net(self, cuda: bool):
+        """The shared CRAFT network (loaded if needed), e.g. to inject into EasyOCR readers."""
+        with self._lock:
+            return self._ensure_networks(cuda).get_craft_net()
+
+    def _enforce_limits(self, keep):
+        while len(self._detectors) > self.max_configs:
+            self._evict_oldest(keep, refiner_only=False)
+
+        if self._pinned_bytes() <= self.memory_budget_bytes:
+            return
+        # RefineNet is the only releasable weight, and a kept refiner view pins it
+        if not keep[1]:
+            while self._pinned_bytes() > self.memory_budget_bytes:
+                if not self._evict_oldest(keep, refiner_only=True):
+                    break
+        if self._pinned_bytes() > self.memory_budget_bytes:
+            logger.warning(
+                f"CRAFT weights ({self._pinned_bytes() / 1024 / 1024:.0f} MB) exceed "
+                f"CRAFT_CACHE_MEMORY_MB ({self.memory_budget_bytes / 1024 / 1024:.0f} MB)"
+            )
+
+    def _evict_oldest(self, keep, refiner_only: bool) -> bool:
+        for key in list(self._detectors.keys()):
+            if key == keep or (refiner_only and not key[1]):
+                continue
+            del self._detectors[key]
+            self.evictions += 1
+            logger.info(f"Evicted CRAFT detector view (long_size={key[0]}, refiner={key[1]})")
+            if not any(refiner for _, refiner in self._detectors):
+                self._networks.release_refine_net()
+            return True
+        return False
+
+    def _pinned_bytes(self) -> int:
+        if self._networks is None:
+            return 0
+        return sum(self._networks.memory_bytes().values())
+
+    def keys(self):
+        with self._lock:
+            return list(self._detectors.keys())
+
+    def __len__(self):
+        return len(self._detectors)
+
+    def __contains__(self, key):
+        return key in self._detectors
+
+    def clear(self):
+        """Drop every view and the shared weights (e.g. to free VRAM for Whisper)."""
+        with self._lock:
+            self._detectors.clear()
+            if self._networks is not None:
+                self._networks.release()
+                self._networks = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            memory = self._networks.memory_bytes() if self._networks is not None else {}
+            return {
+                "engine": self._networks.engine if self._networks is not None else self.engine,
+                "quantize": self._networks.quantize if self._networks is not None else self.quantize,
+                "configs": [{"long_size": key[0], "refiner": key[1]} for key in self._detectors],
+                "max_configs": self.max_configs,
+                "long_size_buckets": CRAFT_LONG_SIZE_BUCKETS,
+                "weights_bytes": memory,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,237 @@
+"""ONNX Runtime engine for CRAFT and RefineNet on CPU."""
+import logging
+import os
+from typing import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+CRAFT_ONNX_DIR = os.getenv(
+    "CRAFT_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".craft_text_detector", "onnx")
+)
+# 0 lets onnxruntime pick (one thread per physical core)
+CRAFT_ONNX_THREADS = int(os.getenv("CRAFT_ONNX_THREADS", "0"))
+CRAFT_ONNX_INTER_OP_THREADS = int(os.getenv("CRAFT_ONNX_INTER_OP_THREADS", "1"))
+CRAFT_ONNX_OPSET = 17
+
+CRAFT_ONNX_MODEL = f"craft_mlt_25k_opset{CRAFT_ONNX_OPSET}"
+REFINENET_ONNX_MODEL = f"craft_refiner_CTW1500_opset{CRAFT_ONNX_OPSET}"
+
+# CRAFT is fully convolutional; any multiple of 32 works as the export shape
+_EXPORT_SHAPE = (1, 3, 320, 320)
+
+
+def _unwrap(module):
+    # load_craftnet_model wraps in DataParallel on CUDA only, but be safe
+    return getattr(module, "module", module)
+
+
+def _write_atomically(path: str, export):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        export(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def export_craft(path: str, craft_net=None):
+    """Export the CRAFT network (CPU, fp32) to ONNX with dynamic batch and size."""
+    import torch
+
+    if craft_net is None:
+        from craft_text_detector import load_craftnet_model
+
+        craft_net = load_craftnet_model(cuda=False)
+    craft_net = _unwrap(craft_net).cpu().eval()
+    dummy = torch.zeros(_EXPORT_SHAPE, dtype=torch.float32)
+
+    def export(target):
+        with torch.no_grad():
+            torch.onnx.export(
+                craft_net,
+                dummy,
+                target,
+                input_names=["image"],
+                output_names=["y", "feature"],
+                dynamic_axes={
+                    "image": {0: "batch", 2: "height", 3: "width"},
+                    "y": {0: "batch", 1: "map_height", 2: "map_width"},
+                    "feature": {0: "batch", 2: "map_height", 3: "map_width"},
+                },
+                opset_version=CRAFT_ONNX_OPSET,
+            )
+
+    logger.info(f"Exporting CRAFT to ONNX: {path}")
+    _write_atomically(path, export)
+
+
+def export_refiner(path: str, refine_net=None, craft_net=None):
+    """Export RefineNet to ONNX; it consumes CRAFT's (y, feature) outputs."""
+    import torch
+
+    from craft_text_detector import load_craftnet_model, load_refinenet_model
+
+    if refine_net is None:
+        refine_net = load_refinenet_model(cuda=False)
+    if craft_net is None:
+        craft_net = load_craftnet_model(cuda=False)
+    refine_net = _unwrap(refine_net).cpu().eval()
+    craft_net = _unwrap(craft_net).cpu().eval()
+    with torch.no_grad():
+        y, feature = craft_net(torch.zeros(_EXPORT_SHAPE, dtype=torch.float32))
+
+    def export(target):
+        with torch.no_grad():
+            torch.onnx.export(
+                refine_net,
+                (y, feature),
+                target,
+                input_names=["y", "feature"],
+                output_names=["y_refined"],
+                dynamic_axes={
+                    "y": {0: "batch", 1: "map_height", 2: "map_width"},
+                    "feature": {0: "batch", 2: "map_height", 3: "map_width"},
+                    "y_refined": {0: "batch", 1: "map_height", 2: "map_width"},
+                },
+                opset_version=CRAFT_ONNX_OPSET,
+            )
+
+    logger.info(f"Exporting RefineNet to ONNX: {path}")
+    _write_atomically(path, export)
+
+
+class OnnxModule:
+    """
+    Callable stand-in for a torch CRAFT/RefineNet module backed by onnxruntime.
+
+    Takes and returns torch tensors so craft_text_detector.get_prediction,
+    detect_batch and EasyOCR's test_net can use it unchanged.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        input_names: Sequence[str],
+        threads: int = CRAFT_ONNX_THREADS,
+        inter_op_threads: int = CRAFT_ONNX_INTER_OP_THREADS,
+    ):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = inter_op_threads
+        self.path = path
+        self.input_names = list(input_names)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, *inputs):
+        import torch
+
+        feeds = {
+            name: np.ascontiguousarray(
+                value.detach().cpu().numpy() if hasattr(value, "detach") else value, dtype=np.float32
+            )
+            for name, value in zip(self.input_names, inputs)
+        }
+        outputs = [torch.from_numpy(output) for output in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+    def eval(self):
+        return self
+
+    def parameters(self):
+        return iter(())
+
+    def memory_bytes(self) -> int:
+        return os.path.getsize(self.path)
+
+
+def onnx_filename(model: str, checkpoint: str) -> str:
+    """
+    Export file name carrying the model_snapshots fingerprint (library versions
+    and source checkpoint), so upgraded weights or libraries re-export.
+    """
+    from model_snapshots import fingerprint_digest
+
+    return f"{model}-{fingerprint_digest(model, checkpoint, {'opset': CRAFT_ONNX_OPSET})}.onnx"
+
+
+def craft_onnx_filename() -> str:
+    from model_snapshots import CRAFT_CHECKPOINT
+
+    return onnx_filename(CRAFT_ONNX_MODEL, CRAFT_CHECKPOINT)
+
+
+def _remove_stale(model: str, current: str):
+    """Drop exports (and files derived from them) of older fingerprints of ``model``."""
+    keep = current[:-len(".onnx")]
+    for entry in os.listdir(CRAFT_ONNX_DIR):
+        if entry.startswith(f"{model}-") and entry.endswith(".onnx") and not entry.startswith(keep):
+            try:
+                os.unlink(os.path.join(CRAFT_ONNX_DIR, entry))
+                logger.info(f"Removed outdated ONNX export {entry}")
+            except OSError:
+                pass
+
+
+def export_current(model: str, checkpoint: str, export) -> str:
+    """Path of the up-to-date export of ``model``, exporting it first if needed."""
+    path = os.path.join(CRAFT_ONNX_DIR, onnx_filename(model, checkpoint))
+    if os.path.exists(path):
+        return path
+    export(path)
+    # The checkpoint may only exist now (first download), so fingerprint again
+    final = os.path.join(CRAFT_ONNX_DIR, onnx_filename(model, checkpoint))
+    if final != path:
+        os.replace(path, final)
+    _remove_stale(model, os.path.basename(final))
+    return final
+
+
+def _load(model: str, checkpoint: str, input_names: Sequence[str], export) -> OnnxModule:
+    path = export_current(model, checkpoint, export)
+    logger.info(f"Loading ONNX Runtime session: {path} (threads={CRAFT_ONNX_THREADS or 'auto'})")
+    return OnnxModule(path, input_names)
+
+
+def load_craft_onnx(craft_net=None) -> OnnxModule:
+    """CRAFT on onnxruntime, exporting the PyTorch weights on first use."""
+    from model_snapshots import CRAFT_CHECKPOINT
+
+    return _load(CRAFT_ONNX_MODEL, CRAFT_CHECKPOINT, ["image"], lambda path: export_craft(path, craft_net))
+
+
+def load_refiner_onnx(refine_net=None) -> OnnxModule:
+    """RefineNet on onnxruntime, exporting the PyTorch weights on first use."""
+    from model_snapshots import REFINENET_CHECKPOINT
+
+    return _load(
+        REFINENET_ONNX_MODEL, REFINENET_CHECKPOINT, ["y", "feature"], lambda path: export_refiner(path, refine_net)
+    )
+
+
+def resolve_engine(requested: str, cuda: bool, quantize: str = "none") -> str:
+    """The engine CRAFT will actually use: ONNX only runs on CPU with onnxruntime installed."""
+    if quantize == "int8" and requested != "onnx" and not cuda:
+        logger.info("CRAFT_QUANTIZE=int8 runs on ONNX Runtime; switching CRAFT engine to onnx")
+        requested = "onnx"
+    if requested != "onnx":
+        return "torch"
+    if cuda:
+        logger.info("CRAFT_ENGINE=onnx is CPU-only; using PyTorch on CUDA")
+        return "torch"
+    if not ONNXRUNTIME_AVAILABLE:
+        logger.warning("CRAFT_ENGINE=onnx but onnxruntime is not installed; using PyTorch")
+        return "torch"
+    return "onnx"
+
@@ -0,0 +1,99 @@
+"""Static INT8 quantization of the ONNX CRAFT model with a synthetic calibration set."""
+import logging
+import os
+from typing import Iterable, List
+
+import cv2
+import numpy as np
+
+from craft_onnx import (
+    CRAFT_ONNX_DIR, CRAFT_ONNX_MODEL, OnnxModule, craft_onnx_filename, export_craft, export_current,
+)
+
+logger = logging.getLogger(__name__)
+
+CRAFT_CALIBRATION_PAGES = max(1, int(os.getenv("CRAFT_CALIBRATION_PAGES", "16")))
+CRAFT_CALIBRATION_LONG_SIZE = int(os.getenv("CRAFT_CALIBRATION_LONG_SIZE", "960"))
+CRAFT_CALIBRATION_SEED = 1234
+
+
+def int8_filename(pages: int = CRAFT_CALIBRATION_PAGES, long_size: int = CRAFT_CALIBRATION_LONG_SIZE) -> str:
+    # Calibration settings are part of the name so changing them re-quantizes, and the
+    # FP32 export's fingerprint so a re-export (new weights or libraries) does too
+    base = craft_onnx_filename()[:-len(".onnx")]
+    return f"{base}_int8_cal{pages}x{long_size}.onnx"
+
+
+def preprocess(image: np.ndarray, long_size: int) -> np.ndarray:
+    """CRAFT input tensor (1, 3, H, W) exactly as get_prediction builds it."""
+    from craft_text_detector import image_utils
+
+    img_resized, _, _ = image_utils.resize_aspect_ratio(image, long_size, interpolation=cv2.INTER_LINEAR)
+    normalized = image_utils.normalizeMeanVariance(img_resized)
+    return np.ascontiguousarray(normalized.transpose(2, 0, 1)[None], dtype=np.float32)
+
+
+def calibration_inputs(pages: int, long_size: int, seed: int = CRAFT_CALIBRATION_SEED) -> List[np.ndarray]:
+    from synthetic_pages import synthetic_pages
+
+    return [preprocess(img, long_size) for img, _ in synthetic_pages(pages, seed=seed)]
+
+
+def _make_reader(inputs: Iterable[np.ndarray]):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._inputs = iter(inputs)
+
+        def get_next(self):
+            value = next(self._inputs, None)
+            return None if value is None else {"image": value}
+
+    return _Reader()
+
+
+def quantize_craft(
+    fp32_path: str,
+    int8_path: str,
+    pages: int = CRAFT_CALIBRATION_PAGES,
+    long_size: int = CRAFT_CALIBRATION_LONG_SIZE,
+):
+    """
+    Quantize CRAFT to INT8 (QDQ, per-channel weights, uint8 activations).
+
+    Activation ranges come from ``pages`` synthetic Thai/English pages run at
+    ``long_size``. The result is written atomically next to the FP32 model.
+    """
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    logger.info(f"Quantizing CRAFT to INT8 with {pages} calibration pages at long_size={long_size}")
+    inputs = calibration_inputs(pages, long_size)
+    tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+    try:
+        quantize_static(
+            fp32_path,
+            tmp_path,
+            _make_reader(inputs),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+        os.replace(tmp_path, int8_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load_craft_int8() -> OnnxModule:
+    """INT8 CRAFT on onnxruntime; exports and quantizes on first use, then loads from disk."""
+    from model_snapshots import CRAFT_CHECKPOINT
+
+    fp32_path = export_current(CRAFT_ONNX_MODEL, CRAFT_CHECKPOINT, export_craft)
+    int8_path = os.path.join(CRAFT_ONNX_DIR, int8_filename())
+    if not os.path.exists(int8_path):
+        quantize_craft(fp32_path, int8_path)
+    logger.info(f"Loading INT8 CRAFT session: {int8_path}")
+    return OnnxModule(int8_path, ["image"])
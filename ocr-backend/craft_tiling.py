@@ -0,0 +1,205 @@
+"""Tiled CRAFT detection for images far larger than any sensible long_size."""
+import logging
+import math
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from craft_batching import detect_batch
+from craft_models import CRAFT_LONG_SIZE_BUCKETS
+from layout import suppress_overlaps
+
+logger = logging.getLogger(__name__)
+
+TILING_MODES = ("off", "on", "auto")
+DEFAULT_TILING_MODE = os.getenv("CRAFT_TILING", "off").strip().lower()
+CRAFT_TILE_SIZE = int(os.getenv("CRAFT_TILE_SIZE", "1600"))
+CRAFT_TILE_OVERLAP = int(os.getenv("CRAFT_TILE_OVERLAP", "200"))
+CRAFT_TILE_MAX_MEMORY_MB = float(os.getenv("CRAFT_TILE_MAX_MEMORY_MB", "2048"))
+CRAFT_TILE_BATCH_SIZE = max(1, int(os.getenv("CRAFT_TILE_BATCH_SIZE", "2")))
+# "auto" tiles images whose long side is at least this many pixels
+CRAFT_TILE_AUTO_MIN_SIDE = int(os.getenv("CRAFT_TILE_AUTO_MIN_SIDE", "5000"))
+
+# Rough peak activation memory of one CRAFT fp32 forward pass per input pixel
+CRAFT_BYTES_PER_PIXEL = 1024
+
+
+def should_tile(mode: str, image_shape) -> bool:
+    if mode == "on":
+        return True
+    if mode == "auto":
+        return max(image_shape[:2]) >= CRAFT_TILE_AUTO_MIN_SIDE
+    return False
+
+
+def effective_tile_size(tile_size: int = CRAFT_TILE_SIZE, max_memory_mb: float = CRAFT_TILE_MAX_MEMORY_MB) -> int:
+    """
+    Tile side that fits the per-tile memory ceiling, rounded down to a CRAFT
+    long_size bucket so tiles run at native resolution on a cached detector view.
+    """
+    ceiling = int(math.sqrt(max_memory_mb * 1024 * 1024 / CRAFT_BYTES_PER_PIXEL))
+    limit = max(1, min(tile_size, ceiling))
+    fitting = [bucket for bucket in CRAFT_LONG_SIZE_BUCKETS if bucket <= limit]
+    return fitting[-1] if fitting else CRAFT_LONG_SIZE_BUCKETS[0]
+
+
+def tile_starts(length: int, tile: int, overlap: int) -> List[int]:
+    """Tile offsets along one axis; the last tile is shifted in so every tile is full size."""
+    if length <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def _core_cuts(starts: List[int], tile: int, length: int) -> List[Tuple[float, float]]:
+    """
+    The span of each tile that owns detections: boundaries sit in the middle
+    of the overlap with the neighbouring tile, so each box is kept once.
+    """
+    cuts = []
+    for i, start in enumerate(starts):
+        low = 0.0 if i == 0 else (start + min(starts[i - 1] + tile, length)) / 2.0
+        high = float(length) if i == len(starts) - 1 else (starts[i + 1] + min(start + tile, length)) / 2.0
+        cuts.append((low, high))
+    return cuts
+
+
+def plan_tiles(image_shape, tile: int, overlap: int) -> List[Dict[str, Any]]:
+    height, width = image_shape[:2]
+    xs = tile_starts(width, tile, overlap)
+    ys = tile_starts(height, tile, overlap)
+    x_cuts = _core_cuts(xs, tile, width)
+    y_cuts = _core_cuts(ys, tile, height)
+    return [
+        {
+            "x": x,
+            "y": y,
+            "width": min(tile, width - x),
+            "height": min(tile, height - y),
+            "core": (x_cut[0], y_cut[0], x_cut[1], y_cut[1]),
+        }
+        for y, y_cut in zip(ys, y_cuts)
+        for x, x_cut in zip(xs, x_cuts)
+    ]
+
+
+def _tile_boxes(prediction: Dict[str, Any], tile: Dict[str, Any]) -> np.ndarray:
+    """Boxes of one tile in global coordinates, keeping those centred in the tile's core."""
+    boxes = prediction.get("boxes")
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4, 2), dtype=np.float32)
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2) + np.array([tile["x"], tile["y"]], dtype=np.float32)
+    centres = boxes.mean(axis=1)
+    x0, y0, x1, y1 = tile["core"]
+    inside = (centres[:, 0] >= x0) & (centres[:, 0] < x1) & (centres[:, 1] >= y0) & (centres[:, 1] < y1)
+    return boxes[inside]
+
+
+def merge_seam_boxes(boxes: np.ndarray, seams: Sequence[float]) -> np.ndarray:
+    """
+    Join the pieces of text lines that a vertical tile seam split in two.
+
+    A line longer than the overlap is seen only partly by each tile, so both
+    pieces survive the centre rule. Two boxes are joined (into their bounding
+    rectangle) when a seam lies between their centres, they overlap
+    vertically by at least half the shorter box, and the horizontal gap
+    between them is at most half the shorter box's height (overlapping
+    pieces count as touching). Chains across several seams are joined too.
+    """
+    if len(boxes) < 2 or not len(seams):
+        return boxes
+    seams = np.asarray(sorted(seams), dtype=np.float64)
+    bounds = np.concatenate([boxes.min(axis=1), boxes.max(axis=1)], axis=1).astype(np.float64)
+    # Only boxes reaching to within a line height of a seam can be pieces
+    heights = bounds[:, 3] - bounds[:, 1]
+    nearest = np.searchsorted(seams, bounds[:, 0] - heights)
+    near = np.flatnonzero(
+        (nearest < len(seams)) & (seams[np.minimum(nearest, len(seams) - 1)] <= bounds[:, 2] + heights)
+    )
+
+    parent = list(range(len(boxes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    centres = (bounds[:, 0] + bounds[:, 2]) / 2
+    for a_pos, a in enumerate(near):
+        for b in near[a_pos + 1:]:
+            left, right = (a, b) if centres[a] <= centres[b] else (b, a)
+            shorter = max(1.0, min(heights[left], heights[right]))
+            y_overlap = min(bounds[left, 3], bounds[right, 3]) - max(bounds[left, 1], bounds[right, 1])
+            if y_overlap < 0.5 * shorter:
+                continue
+            if bounds[right, 0] - bounds[left, 2] > 0.5 * shorter:
+                continue
+            if not np.any((seams > centres[left]) & (seams < centres[right])):
+                continue
+            parent[find(left)] = find(right)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(boxes)):
+        groups.setdefault(find(i), []).append(i)
+    if len(groups) == len(boxes):
+        return boxes
+    merged = []
+    for members in sorted(groups.values()):
+        if len(members) == 1:
+            merged.append(boxes[members[0]])
+            continue
+        x0, y0 = bounds[members, 0].min(), bounds[members, 1].min()
+        x1, y1 = bounds[members, 2].max(), bounds[members, 3].max()
+        merged.append(np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32))
+    return np.stack(merged).astype(np.float32)
+
+
+def detect_tiled(
+    detector,
+    image: np.ndarray,
+    overlap: int = CRAFT_TILE_OVERLAP,
+    batch_size: int = CRAFT_TILE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Run CRAFT over overlapping tiles of ``image`` at the detector's long_size.
+
+    Tiles are detected in batches of ``batch_size``; boxes are mapped back to
+    global coordinates, each kept only by the tile whose core contains its
+    centre, near-duplicates left at tile seams are removed with NMS, and the
+    pieces of lines cut by a seam are joined (merge_seam_boxes).
+    Returns ``{"boxes": (N, 4, 2) array, "tiles": count}`` like detect_text.
+    """
+    tile = detector.long_size
+    overlap = min(overlap, tile // 2)
+    tiles = plan_tiles(image.shape, tile, overlap)
+    logger.info(
+        f"Tiled CRAFT detection: {image.shape[1]}x{image.shape[0]} in {len(tiles)} tiles "
+        f"of {tile}px (overlap={overlap})"
+    )
+
+    collected = []
+    for start in range(0, len(tiles), batch_size):
+        batch = tiles[start:start + batch_size]
+        views = [image[t["y"]:t["y"] + t["height"], t["x"]:t["x"] + t["width"]] for t in batch]
+        if len(views) == 1:
+            predictions = [detector.detect_text(views[0])]
+        else:
+            try:
+                predictions = detect_batch(detector, views)
+            except Exception as e:
+                logger.error(f"Batched tile detection failed, running tiles one by one: {str(e)}")
+                predictions = [detector.detect_text(view) for view in views]
+        for tile_info, prediction in zip(batch, predictions):
+            collected.append(_tile_boxes(prediction, tile_info))
+
+    boxes = np.concatenate(collected, axis=0) if collected else np.zeros((0, 4, 2), dtype=np.float32)
+    if len(boxes):
+        bounds = np.concatenate([boxes.min(axis=1), boxes.max(axis=1)], axis=1).astype(np.int64)
+        boxes = boxes[suppress_overlaps(bounds)]
+        seams = sorted({t["core"][2] for t in tiles if t["core"][2] < image.shape[1]})
+        boxes = merge_seam_boxes(boxes, seams)
+    return {"boxes": boxes, "tiles": len(tiles)}
@@ -0,0 +1,146 @@
+"""Reduced-resolution decoding of oversized uploads for CRAFT detection."""
+import io
+import logging
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OCR_REDUCED_DECODE = os.getenv("OCR_REDUCED_DECODE", "true").strip().lower() in ("1", "true", "yes", "on")
+# The reduced image keeps at least this many times CRAFT's long_size on its long side
+OCR_DECODE_DETAIL_FACTOR = max(1.0, float(os.getenv("OCR_DECODE_DETAIL_FACTOR", "2.0")))
+# Boxes shorter than this in the reduced image are re-cropped from the full-resolution source
+OCR_DECODE_MIN_TEXT_HEIGHT = int(os.getenv("OCR_DECODE_MIN_TEXT_HEIGHT", "24"))
+
+# libjpeg scales by 1/2, 1/4 and 1/8 during the DCT; other formats are resized after decode
+_REDUCED_FACTORS = (2, 4, 8)
+
+
+def _reduced_flag(scale: int) -> int:
+    import cv2
+
+    return getattr(cv2, f"IMREAD_REDUCED_COLOR_{scale}")
+
+
+def header_size(contents: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the image header without decoding pixels."""
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(contents)) as header:
+            return header.size
+    except Exception:
+        return None
+
+
+def reduction_factor(width: int, height: int, long_size: int, detail_factor: float = OCR_DECODE_DETAIL_FACTOR) -> int:
+    """Largest of 1/2/4/8 that keeps the long side >= detail_factor * long_size."""
+    long_side = max(width, height)
+    factor = 1
+    for candidate in _REDUCED_FACTORS:
+        if long_side / candidate >= detail_factor * long_size:
+            factor = candidate
+    return factor
+
+
+class DecodedImage:
+    """
+    An upload decoded at ``1/scale`` of its size, plus the bytes to recover
+    full-resolution pixels for the few regions that need them.
+    """
+
+    def __init__(self, image: np.ndarray, contents: bytes, scale: int = 1, source_shape=None):
+        self.image = image
+        self.contents = contents
+        self.scale = scale
+        self.source_shape = source_shape or image.shape[:2]
+        self.full_decodes = 0
+
+    def _decode_full(self) -> Optional[np.ndarray]:
+        import cv2
+
+        self.full_decodes += 1
+        img = cv2.imdecode(np.frombuffer(self.contents, np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            self.source_shape = img.shape[:2]
+        return img
+
+    def refine_crops(self, crops: List[np.ndarray], boxes, indices, bounds, rotated) -> List[np.ndarray]:
+        """
+        Replace crops of small text with crops from the full-resolution image.
+
+        ``bounds`` are in reduced-image coordinates. The full image is decoded
+        at most once per call and only if some box is below
+        OCR_DECODE_MIN_TEXT_HEIGHT; it is dropped again before returning.
+        """
+        if self.scale == 1 or len(indices) == 0:
+            return crops
+        small = np.flatnonzero((bounds[:, 3] - bounds[:, 1]) < OCR_DECODE_MIN_TEXT_HEIGHT)
+        if len(small) == 0:
+            return crops
+
+        full = self._decode_full()
+        if full is None:
+            logger.warning("Full-resolution decode failed; keeping reduced crops")
+            return crops
+
+        from recognition import crop_free_box
+
+        logger.info(f"Re-cropping {len(small)} small text regions at full resolution")
+        crops = list(crops)
+        height, width = full.shape[:2]
+        for i in small.tolist():
+            if rotated[i]:
+                points = np.asarray(boxes[indices[i]], dtype=np.float32)[:, :2] * self.scale
+                crop = crop_free_box(full, points)
+            else:
+                x1, y1, x2, y2 = (bounds[i] * self.scale).tolist()
+                # Copy so the slice doesn't keep the whole full-resolution image alive
+                crop = full[max(0, y1):min(height, y2), max(0, x1):min(width, x2)].copy()
+            if crop.size:
+                crops[i] = crop
+        return crops
+
+    def to_source_bounds(self, bounds: np.ndarray) -> np.ndarray:
+        """Scale (M, 4) x1, y1, x2, y2 bounds back to the uploaded image's pixel grid."""
+        if self.scale == 1:
+            return bounds
+        height, width = self.source_shape
+        return np.minimum(bounds * self.scale, np.array([width, height, width, height]))
+
+
+def decode_for_detection(contents: bytes, long_size: int, reduce: bool = True) -> Optional[DecodedImage]:
+    """
+    Decode an upload, at reduced resolution when it is much larger than CRAFT needs.
+
+    ``reduce=False`` always decodes at full resolution. Returns None when the
+    bytes are not a decodable image.
+    """
+    import cv2
+
+    nparr = np.frombuffer(contents, np.uint8)
+    scale = 1
+    if OCR_REDUCED_DECODE and reduce:
+        size = header_size(contents)
+        if size is not None:
+            scale = reduction_factor(size[0], size[1], long_size)
+
+    if scale > 1:
+        img = cv2.imdecode(nparr, _reduced_flag(scale))
+        if img is not None:
+            width, height = size
+            # The decoder applies EXIF rotation; the header size doesn't
+            if (img.shape[0] > img.shape[1]) != (height > width):
+                width, height = height, width
+            logger.info(
+                f"Decoded {size[0]}x{size[1]} upload at 1/{scale} ({img.shape[1]}x{img.shape[0]}) "
+                f"for long_size={long_size}"
+            )
+            return DecodedImage(img, contents, scale, source_shape=(height, width))
+
+    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    return DecodedImage(img, contents, 1)
@@ -0,0 +1,111 @@
+"""Bounded thread pool that keeps blocking model inference off the asyncio event loop."""
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = max(1, int(os.getenv("OCR_INFERENCE_WORKERS", "1")))
+DEFAULT_QUEUE_SIZE = max(0, int(os.getenv("OCR_INFERENCE_QUEUE_SIZE", "16")))
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Run blocking callables on a fixed number of worker threads.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more may
+    wait for a worker; anything beyond that is rejected immediately with
+    InferenceQueueFull so callers can answer 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._avg_duration = None
+
+    def _acquire_slot(self):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFull(self._estimate_retry_after())
+            self._pending += 1
+
+    def _release_slot(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _estimate_retry_after(self) -> int:
+        """Seconds until a slot should free up, from the moving average job time."""
+        avg = self._avg_duration or 1.0
+        waves = (self._pending - self.max_workers + 1) / self.max_workers
+        return max(1, math.ceil(avg * max(waves, 1)))
+
+    def _timed(self, func: Callable, *args, **kwargs):
+        with self._lock:
+            self._running += 1
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                if self._avg_duration is None:
+                    self._avg_duration = elapsed
+                else:
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * elapsed
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Queue ``func`` on a worker thread, or raise InferenceQueueFull.
+
+        The slot is held until the job itself finishes, even if the caller
+        stops waiting for it (e.g. the client disconnected).
+        """
+        self._acquire_slot()
+        try:
+            future = self._executor.submit(self._timed, func, *args, **kwargs)
+        except BaseException:
+            self._release_slot()
+            raise
+        future.add_done_callback(lambda _: self._release_slot())
+        return future
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func`` on a worker thread and await its result."""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(0, self._pending - self._running),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_job_seconds": round(self._avg_duration, 3) if self._avg_duration else None,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
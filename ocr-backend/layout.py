@@ -0,0 +1,158 @@
+"""Layout stage between CRAFT and recognition: NMS, line merging and reading order."""
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_MODES = ("none", "lines")
+DEFAULT_LAYOUT_MODE = os.getenv("OCR_LAYOUT_MODE", "none").strip().lower()
+# Boxes overlapping a kept box by more than this fraction of their own area are dropped
+LAYOUT_NMS_OVERLAP = float(os.getenv("OCR_LAYOUT_NMS_OVERLAP", "0.7"))
+# Largest horizontal gap (in line heights) between boxes merged into one line
+LAYOUT_MAX_GAP = float(os.getenv("OCR_LAYOUT_MAX_GAP", "1.0"))
+# Minimum vertical overlap (fraction of the shorter box) for boxes to share a line
+LAYOUT_MIN_VERTICAL_OVERLAP = 0.5
+# Boxes more than this many times taller than the line don't join it
+LAYOUT_MAX_HEIGHT_RATIO = 2.0
+
+
+def _areas(bounds: np.ndarray) -> np.ndarray:
+    return (bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1])
+
+
+def suppress_overlaps(bounds: np.ndarray, overlap: float = LAYOUT_NMS_OVERLAP) -> np.ndarray:
+    """
+    Greedy NMS over axis-aligned bounds, largest boxes first.
+
+    A box is suppressed when more than ``overlap`` of its own area lies inside
+    an already kept box (CRAFT often emits a cluster box plus fragments of it).
+    Returns the kept positions in ascending order.
+    """
+    if len(bounds) == 0:
+        return np.zeros(0, dtype=np.intp)
+    areas = _areas(bounds).astype(np.float64)
+    order = np.argsort(-areas, kind="stable")
+    suppressed = np.zeros(len(bounds), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        ix1 = np.maximum(bounds[i, 0], bounds[:, 0])
+        iy1 = np.maximum(bounds[i, 1], bounds[:, 1])
+        ix2 = np.minimum(bounds[i, 2], bounds[:, 2])
+        iy2 = np.minimum(bounds[i, 3], bounds[:, 3])
+        inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covered = inter / np.maximum(areas, 1)
+        covered[i] = 0
+        suppressed |= covered > overlap
+    return np.sort(np.asarray(keep, dtype=np.intp))
+
+
+def group_lines(bounds: np.ndarray, max_gap: float = LAYOUT_MAX_GAP) -> List[List[int]]:
+    """
+    Group boxes that sit on the same text line, left to right.
+
+    Boxes join a line when they overlap it vertically by at least half the
+    shorter height, have a comparable height, and start no further than
+    ``max_gap`` line heights after the line's right edge.
+    """
+    lines: List[Dict[str, Any]] = []
+    for i in np.argsort(bounds[:, 0], kind="stable").tolist():
+        x1, y1, x2, y2 = bounds[i].tolist()
+        height = max(y2 - y1, 1)
+        best = None
+        best_overlap = 0.0
+        for line in lines:
+            line_height = max(line["y2"] - line["y1"], 1)
+            if max(height, line_height) > LAYOUT_MAX_HEIGHT_RATIO * min(height, line_height):
+                continue
+            if x1 - line["x2"] > max_gap * line_height:
+                continue
+            vertical = min(y2, line["y2"]) - max(y1, line["y1"])
+            ratio = vertical / min(height, line_height)
+            if ratio >= LAYOUT_MIN_VERTICAL_OVERLAP and ratio > best_overlap:
+                best, best_overlap = line, ratio
+        if best is None:
+            lines.append({"members": [i], "x1": x1, "y1": y1, "x2": x2, "y2": y2})
+        else:
+            best["members"].append(i)
+            best["x1"] = min(best["x1"], x1)
+            best["y1"] = min(best["y1"], y1)
+            best["x2"] = max(best["x2"], x2)
+            best["y2"] = max(best["y2"], y2)
+    return [line["members"] for line in lines]
+
+
+def reading_order(bounds: np.ndarray) -> np.ndarray:
+    """
+    Positions sorted into reading order: rows top to bottom, left to right within a row.
+
+    Boxes whose vertical centres are within half the median box height of a
+    row's first box belong to that row, so slightly uneven baselines don't
+    interleave neighbouring lines.
+    """
+    if len(bounds) == 0:
+        return np.zeros(0, dtype=np.intp)
+    centres = (bounds[:, 1] + bounds[:, 3]) / 2.0
+    tolerance = max(float(np.median(bounds[:, 3] - bounds[:, 1])) / 2.0, 1.0)
+    by_centre = np.argsort(centres, kind="stable")
+    rows = np.zeros(len(bounds), dtype=np.intp)
+    row = 0
+    row_start = centres[by_centre[0]]
+    for i in by_centre.tolist():
+        if centres[i] - row_start > tolerance:
+            row += 1
+            row_start = centres[i]
+        rows[i] = row
+    return np.lexsort((bounds[:, 0], rows))
+
+
+def apply_layout(
+    indices: np.ndarray, bounds: np.ndarray, rotated: np.ndarray, mode: str
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Run the layout stage on the output of recognition.box_geometry.
+
+    ``mode="lines"`` suppresses overlapping boxes, merges horizontal boxes on
+    the same line into one wider box (rotated boxes are left alone) and sorts
+    the result into reading order. Returns new ``(indices, bounds, rotated)``
+    where each index is the first CRAFT box of its line, plus a summary of
+    what was merged for the response.
+    """
+    stats = {"mode": mode, "input_boxes": int(len(indices))}
+    if mode != "lines" or len(indices) == 0:
+        return indices, bounds, rotated, stats
+
+    kept = suppress_overlaps(bounds)
+    stats["suppressed"] = int(len(indices) - len(kept))
+    indices, bounds, rotated = indices[kept], bounds[kept], rotated[kept]
+
+    straight = np.flatnonzero(~rotated)
+    groups = [[int(straight[i]) for i in line] for line in group_lines(bounds[straight])]
+    groups.extend([int(i)] for i in np.flatnonzero(rotated))
+
+    merged_bounds = np.array([
+        [
+            bounds[members, 0].min(),
+            bounds[members, 1].min(),
+            bounds[members, 2].max(),
+            bounds[members, 3].max(),
+        ]
+        for members in groups
+    ], dtype=bounds.dtype).reshape(-1, 4)
+    merged_indices = np.array([indices[members[0]] for members in groups], dtype=indices.dtype)
+    merged_rotated = np.array([len(members) == 1 and bool(rotated[members[0]]) for members in groups], dtype=bool)
+
+    order = reading_order(merged_bounds)
+    stats["merged"] = int(sum(len(members) - 1 for members in groups))
+    stats["lines"] = int(len(groups))
+    logger.info(
+        f"Layout: {stats['input_boxes']} boxes -> {stats['lines']} lines "
+        f"({stats['suppressed']} suppressed, {stats['merged']} merged)"
+    )
+    return merged_indices[order], merged_bounds[order], merged_rotated[order], stats
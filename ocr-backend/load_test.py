@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Load-test the real FastAPI app with stand-in models.
+
+Starts ``main.app`` under uvicorn on localhost. The CRAFT detector, EasyOCR
+reader, Qwen corrector and Whisper worker are replaced with stubs that
+sleep and hold memory as configured, so a run takes seconds and needs no
+model weights. Everything else is the real code path: upload handling,
+decode, the inference executor and its queue limit, CRAFT batching,
+cropping, streaming and the transcription subprocess.
+
+Traffic is open-loop at fixed rates per endpoint. Latency is measured from
+each request's scheduled send time, so a saturated server shows up as
+latency rather than as a lower send rate.
+
+    python load_test.py --ocr-rate 8 --stream-rate 2 --transcribe-rate 0.5 --duration 15
+    OCR_INFERENCE_WORKERS=2 OCR_INFERENCE_QUEUE_SIZE=8 CRAFT_BATCH_MAX_SIZE=4 \\
+        python load_test.py --ocr-rate 20 --detect-ms 80 --output run.json
+
+Executor sizes, queue limits and batching come from the usual environment
+variables, which are the settings under test.
+"""
+import argparse
+import asyncio
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+import types
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+ENDPOINTS = {
+    "ocr": "/ocr",
+    "ocr_stream": "/ocr/stream",
+    "transcribe_stream": "/transcribe/stream",
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the OCR API with stubbed models")
+    traffic = parser.add_argument_group("traffic")
+    traffic.add_argument("--ocr-rate", type=float, default=5.0, help="POST /ocr per second")
+    traffic.add_argument("--stream-rate", type=float, default=1.0, help="POST /ocr/stream per second")
+    traffic.add_argument("--transcribe-rate", type=float, default=0.2, help="POST /transcribe/stream per second")
+    traffic.add_argument("--duration", type=float, default=10.0, help="Seconds of traffic")
+    traffic.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times")
+    traffic.add_argument("--max-inflight", type=int, default=256, help="Client connections at once")
+    traffic.add_argument("--ai-correct-ratio", type=float, default=0.0, help="Share of OCR requests with ai_correct")
+    traffic.add_argument("--image-size", default="1240x1754", help="Uploaded page size WxH")
+    traffic.add_argument("--seed", type=int, default=0)
+
+    stubs = parser.add_argument_group("stub models")
+    stubs.add_argument("--boxes", type=int, default=40, help="Text boxes the stub detector returns per image")
+    stubs.add_argument("--detect-ms", type=float, default=60.0, help="Detector time per image")
+    stubs.add_argument("--batch-overhead", type=float, default=0.35,
+                       help="Extra detector time per additional image in a CRAFT batch (fraction of --detect-ms)")
+    stubs.add_argument("--refiner-factor", type=float, default=1.3, help="Detector slowdown with the refiner")
+    stubs.add_argument("--recognize-batch-ms", type=float, default=15.0, help="Recognizer time per batch")
+    stubs.add_argument("--recognize-crop-ms", type=float, default=1.5, help="Recognizer time per crop")
+    stubs.add_argument("--correct-ms", type=float, default=400.0, help="Qwen correction time")
+    stubs.add_argument("--whisper-load-ms", type=float, default=300.0, help="Whisper model load time")
+    stubs.add_argument("--whisper-segments", type=int, default=8)
+    stubs.add_argument("--whisper-segment-ms", type=float, default=150.0)
+    stubs.add_argument("--detect-mb", type=float, default=64.0, help="Memory held while detecting")
+    stubs.add_argument("--recognize-mb", type=float, default=16.0, help="Memory held while recognizing")
+    stubs.add_argument("--reader-mb", type=float, default=50.0, help="Resident memory per loaded reader")
+
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0, help="Event-loop lag probe period")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--stub-transcribe-worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_known_args()[0]
+
+
+# --- Stub models --------------------------------------------------------------
+
+@contextmanager
+def _hold_memory(mb: float):
+    """Keep ``mb`` of touched memory alive for the duration of the block."""
+    block = bytearray(int(mb * 1024 * 1024)) if mb > 0 else None
+    try:
+        yield
+    finally:
+        del block
+
+
+def _sleep_ms(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+
+class StubCraftDetector:
+    """Stands in for SharedCraftDetector: fixed latency, a grid of line boxes."""
+
+    def __init__(self, long_size: int, refiner: bool, args):
+        self.long_size = long_size
+        self.refiner = refiner
+        self.args = args
+
+    def _boxes(self, image):
+        import numpy as np
+
+        height, width = image.shape[:2]
+        rows = max(1, self.args.boxes)
+        line_height = max(4.0, height / (rows * 1.5))
+        boxes = []
+        for row in range(rows):
+            y1 = (row * 1.5 + 0.25) * line_height
+            x1, x2, y2 = width * 0.08, width * 0.08 + width * (0.4 + 0.5 * ((row * 7) % 10) / 10), y1 + line_height
+            boxes.append([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+        return np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+    def _detect_ms(self, images: int) -> float:
+        factor = self.args.refiner_factor if self.refiner else 1.0
+        return self.args.detect_ms * factor * (1 + self.args.batch_overhead * (images - 1))
+
+    def detect_text(self, image) -> Dict[str, Any]:
+        with _hold_memory(self.args.detect_mb):
+            _sleep_ms(self._detect_ms(1))
+        return {"boxes": self._boxes(image)}
+
+    def detect_batch(self, images) -> List[Dict[str, Any]]:
+        with _hold_memory(self.args.detect_mb * len(images)):
+            _sleep_ms(self._detect_ms(len(images)))
+        return [{"boxes": self._boxes(image)} for image in images]
+
+
+class StubReader:
+    """Stands in for a recognition-only easyocr.Reader."""
+
+    def __init__(self, languages, args):
+        self.languages = languages
+        self.args = args
+        self.weights = bytearray(int(args.reader_mb * 1024 * 1024))
+
+    def readtext(self, image, detail=1, **kwargs):
+        with _hold_memory(self.args.recognize_mb):
+            _sleep_ms(self.args.recognize_batch_ms + self.args.recognize_crop_ms)
+        height, width = image.shape[:2]
+        return [([[0, 0], [width, 0], [width, height], [0, height]], "stub text", 0.9)]
+
+
+def _stub_recognize_crops(args):
+    from recognition import RECOGNITION_BATCH_SIZE
+
+    def recognize_crops(reader, crops, batch_size=None, decoder="greedy", ignore_char=None, box_seconds=None):
+        batch_size = batch_size or RECOGNITION_BATCH_SIZE
+        results = []
+        for start in range(0, len(crops), batch_size):
+            batch = crops[start:start + batch_size]
+            started = time.perf_counter()
+            with _hold_memory(args.recognize_mb):
+                _sleep_ms(args.recognize_batch_ms + args.recognize_crop_ms * len(batch))
+            if box_seconds is not None:
+                box_seconds.extend([(time.perf_counter() - started) / len(batch)] * len(batch))
+            results.extend({"text": f"text {start + i}", "confidence": 0.9} for i in range(len(batch)))
+        return results
+
+    return recognize_crops
+
+
+def _stub_qwen_module(args) -> types.ModuleType:
+    """Module with the qwen_corrector names main.py imports."""
+    module = types.ModuleType("qwen_corrector")
+    lock = threading.RLock()
+    loaded = []
+
+    class Corrector:
+        def correct(self, text, language="thai"):
+            _sleep_ms(args.correct_ms)
+            return {"success": True, "corrected_text": text}
+
+    def get_corrector():
+        if not loaded:
+            loaded.append(Corrector())
+        return loaded[0]
+
+    module.RELEASE_AFTER_USE = False
+    module.corrector_loaded = lambda: bool(loaded)
+    module.corrector_lock = lambda: lock
+    module.get_corrector = get_corrector
+    module.release_corrector = loaded.clear
+    return module
+
+
+def _run_stub_transcribe_worker(argv: List[str]) -> int:
+    """Prints what transcribe_worker.py prints, with simulated load and decode time."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", default="stream")
+    parser.add_argument("--whisper-load-ms", type=float, default=0)
+    parser.add_argument("--whisper-segments", type=int, default=0)
+    parser.add_argument("--whisper-segment-ms", type=float, default=0)
+    args, _ = parser.parse_known_args(argv)
+
+    def emit(line):
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+    started = time.perf_counter()
+    if args.mode == "stream":
+        emit("STATUS: อัพโหลดไฟล์สำเร็จ\n")
+    _sleep_ms(args.whisper_load_ms)
+    segments = []
+    for index in range(args.whisper_segments):
+        _sleep_ms(args.whisper_segment_ms)
+        segments.append({"text": f"segment {index}"})
+        if args.mode == "stream":
+            if index == 0:
+                emit("LANG: th\n")
+            emit(f"SEG: segment {index}\n")
+    if args.mode == "stream":
+        emit("DONE\n")
+    else:
+        emit(json.dumps({
+            "success": True,
+            "text": " ".join(segment["text"] for segment in segments),
+            "language": "th",
+            "segments": segments,
+            "total_segments": len(segments),
+            "timings": {"transcribe": time.perf_counter() - started},
+        }) + "\n")
+    return 0
+
+
+def _install_stubs(app, args):
+    """Swap the model seams of main.py (and the modules it imports lazily) for stubs."""
+    import craft_batching
+
+    detectors = {}
+    readers = {}
+    reader_lock = threading.Lock()
+
+    def get_craft_detector(long_size=None, refiner=None):
+        key = (long_size or 960, bool(refiner))
+        return detectors.setdefault(key, StubCraftDetector(key[0], key[1], args))
+
+    def get_ocr_reader(languages):
+        key = ",".join(sorted(languages))
+        with reader_lock:
+            if key not in readers:
+                readers[key] = StubReader(languages, args)
+                app.ocr_readers.loads += 1
+            return readers[key]
+
+    def load_models():
+        app.device_config = {
+            "type": "stub",
+            "easyocr_gpu": False,
+            "craft_supports_cuda": False,
+            "craft_long_size": 960,
+            "craft_refiner": False,
+        }
+        app.startup.mark_ready()
+
+    def build_worker_cmd(mode, file_path, model_size, language, initial_prompt=None, chunk_duration=0):
+        return [
+            sys.executable, os.path.abspath(__file__), "--stub-transcribe-worker",
+            "--mode", mode,
+            "--whisper-load-ms", str(args.whisper_load_ms),
+            "--whisper-segments", str(args.whisper_segments),
+            "--whisper-segment-ms", str(args.whisper_segment_ms),
+        ]
+
+    app.get_craft_detector = get_craft_detector
+    app.get_ocr_reader = get_ocr_reader
+    app.recognize_crops = _stub_recognize_crops(args)
+    app._load_models = load_models
+    app._build_worker_cmd = build_worker_cmd
+    craft_batching.detect_batch = lambda detector, images: detector.detect_batch(images)
+    sys.modules["qwen_corrector"] = _stub_qwen_module(args)
+
+
+# --- Server -------------------------------------------------------------------
+
+class LagProbe:
+    """Samples how late asyncio.sleep wakes up on the server's event loop."""
+
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000.0
+        self.samples: List[float] = []
+        self.running = True
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected) * 1000)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(app_module, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning", loop="asyncio")
+    server = uvicorn.Server(config)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.serve(),), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    return server, loop, thread
+
+
+# --- Client -------------------------------------------------------------------
+
+def _multipart(fields: Dict[str, str], filename: str, content: bytes, content_type: str):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    body.write(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n".encode()
+    )
+    body.write(content)
+    body.write(f"\r\n--{boundary}--\r\n".encode())
+    return body.getvalue(), f"multipart/form-data; boundary={boundary}"
+
+
+def _test_image(size: str) -> bytes:
+    import cv2
+    import numpy as np
+
+    width, height = (int(value) for value in size.lower().split("x"))
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    for row in range(40, height - 40, 44):
+        cv2.putText(page, "The quick brown fox jumps over the lazy dog", (40, row),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    return cv2.imencode(".png", page)[1].tobytes()
+
+
+def _test_audio() -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(16000)
+        audio.writeframes(b"\x00\x00" * 16000)
+    return buffer.getvalue()
+
+
+def _send(port: int, endpoint: str, body: bytes, content_type: str, scheduled: float) -> Dict[str, Any]:
+    record = {"endpoint": endpoint, "status": None, "error": None}
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        conn.request("POST", ENDPOINTS[endpoint], body=body, headers={"Content-Type": content_type})
+        response = conn.getresponse()
+        record["status"] = response.status
+        # The server sheds load with 503 (or 429) plus Retry-After
+        record["retry_after"] = response.getheader("Retry-After") is not None
+        if endpoint != "ocr":
+            response.readline()
+            record["ttfb_ms"] = (time.perf_counter() - scheduled) * 1000
+        response.read()
+        conn.close()
+    except Exception as e:
+        record["error"] = str(e)
+    record["latency_ms"] = (time.perf_counter() - scheduled) * 1000
+    return record
+
+
+def _drive(port: int, args) -> List[Dict[str, Any]]:
+    rng = random.Random(args.seed)
+    image = _test_image(args.image_size)
+    audio = _test_audio()
+    rates = {"ocr": args.ocr_rate, "ocr_stream": args.stream_rate, "transcribe_stream": args.transcribe_rate}
+
+    def payload(endpoint):
+        if endpoint == "transcribe_stream":
+            return _multipart({"model_size": "base", "language": "th"}, "clip.wav", audio, "audio/wav")
+        ai_correct = "true" if rng.random() < args.ai_correct_ratio else "false"
+        return _multipart(
+            {"languages": json.dumps(["th", "en"]), "ai_correct": ai_correct}, "page.png", image, "image/png"
+        )
+
+    futures = []
+    futures_lock = threading.Lock()
+    started = time.perf_counter()
+    end = started + args.duration
+    pool = ThreadPoolExecutor(max_workers=args.max_inflight)
+
+    def arrivals(endpoint, rate):
+        arrival = started
+        while True:
+            arrival += rng.expovariate(rate) if args.poisson else 1.0 / rate
+            if arrival >= end:
+                return
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            body, content_type = payload(endpoint)
+            future = pool.submit(_send, port, endpoint, body, content_type, arrival)
+            with futures_lock:
+                futures.append(future)
+
+    generators = [
+        threading.Thread(target=arrivals, args=(endpoint, rate), daemon=True)
+        for endpoint, rate in rates.items() if rate > 0
+    ]
+    for generator in generators:
+        generator.start()
+    for generator in generators:
+        generator.join()
+    pool.shutdown(wait=True)
+    return [future.result() for future in futures]
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 1)
+
+
+def _summarize(records: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    summary = {}
+    for endpoint in ENDPOINTS:
+        mine = [record for record in records if record["endpoint"] == endpoint]
+        if not mine:
+            continue
+        ok = [record for record in mine if record["status"] is not None and record["status"] < 400]
+        rejected = [
+            record for record in mine if record["status"] in (429, 503) and record.get("retry_after")
+        ]
+        errors = [record for record in mine if record not in ok and record not in rejected]
+        latencies = [record["latency_ms"] for record in ok]
+        statuses: Dict[str, int] = {}
+        for record in mine:
+            status = str(record["status"]) if record["status"] is not None else "connection_error"
+            statuses[status] = statuses.get(status, 0) + 1
+        entry = {
+            "sent": len(mine),
+            "ok": len(ok),
+            "throughput_per_second": round(len(ok) / duration, 2),
+            "latency_ms": {
+                "p50": _percentile(latencies, 0.5),
+                "p99": _percentile(latencies, 0.99),
+                "max": round(max(latencies), 1) if latencies else None,
+            },
+            "rejected_rate": round(len(rejected) / len(mine), 4),
+            "error_rate": round(len(errors) / len(mine), 4),
+            "statuses": statuses,
+        }
+        ttfb = [record["ttfb_ms"] for record in ok if "ttfb_ms" in record]
+        if ttfb:
+            entry["ttfb_ms"] = {"p50": _percentile(ttfb, 0.5), "p99": _percentile(ttfb, 0.99)}
+        summary[endpoint] = entry
+    return summary
+
+
+def main() -> int:
+    args = _parse_args()
+    if args.stub_transcribe_worker:
+        return _run_stub_transcribe_worker(sys.argv[1:])
+
+    # Stubs run inside this process: no worker processes, and no cache hits on the repeated test page
+    os.environ["OCR_PROCESS_WORKERS"] = "0"
+    os.environ.setdefault("OCR_CACHE_ENABLED", "false")
+    import main as app
+
+    _install_stubs(app, args)
+    port = _free_port()
+    server, loop, thread = _start_server(app, port)
+    probe = LagProbe(args.lag_interval_ms)
+    probe_future = asyncio.run_coroutine_threadsafe(probe.run(), loop)
+    while not app.startup.ready:
+        time.sleep(0.05)
+
+    wall_started = time.perf_counter()
+    records = _drive(port, args)
+    wall = time.perf_counter() - wall_started
+
+    probe.running = False
+    probe_future.result(timeout=5)
+    report = {
+        "settings": {
+            "duration_seconds": args.duration,
+            "rates": {"ocr": args.ocr_rate, "ocr_stream": args.stream_rate,
+                      "transcribe_stream": args.transcribe_rate},
+            "poisson": args.poisson,
+            "inference_workers": app.inference_executor.stats().get("workers"),
+            "inference_max_queue": app.inference_executor.stats().get("max_queue"),
+            "craft_batch_max_size": app.craft_scheduler.max_batch_size,
+            "craft_batch_max_wait_ms": app.craft_scheduler.max_wait * 1000.0,
+        },
+        "wall_seconds": round(wall, 2),
+        "endpoints": _summarize(records, args.duration),
+        "event_loop_lag_ms": {
+            "p50": _percentile(probe.samples, 0.5),
+            "p99": _percentile(probe.samples, 0.99),
+            "max": round(max(probe.samples), 1) if probe.samples else None,
+            "mean": round(statistics.mean(probe.samples), 2) if probe.samples else None,
+        },
+        "server": {
+            "inference_executor": app.inference_executor.stats(),
+            "craft_batching": app.craft_scheduler.stats(),
+        },
+    }
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
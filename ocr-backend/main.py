@@ -1,27 +1,81 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-import cv2
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import numpy as np
-from craft_text_detector import Craft
-import easyocr
-import io
-from PIL import Image
 import logging
 import json
+import asyncio
 import os
 import tempfile
 from typing import Optional
 import subprocess
 import sys
-from qwen_corrector import get_corrector, release_corrector, RELEASE_AFTER_USE
+import threading
+from fastapi.concurrency import run_in_threadpool
 from device_info import get_device_info
+from inference_executor import DEFAULT_WORKERS, InferenceExecutor, InferenceQueueFull
+from ocr_process_pool import OCR_PROCESS_WORKERS, OCRProcessPool
+from startup_timing import StartupTracker
+import model_snapshots
+import metrics
+from metrics import StageTimings
+from craft_batching import CraftBatchScheduler
+from result_cache import OCRResultCache, make_cache_key
+from craft_models import CraftDetectorCache, snap_long_size
+from reader_pool import ReaderPool, language_key
+from image_decode import OCR_DECODE_DETAIL_FACTOR, DecodedImage, decode_for_detection, header_size
+from craft_autosize import AUTO_LONG_SIZE, is_auto_long_size, resolve_long_size, source_long_size
+from craft_tiling import (
+    CRAFT_TILE_OVERLAP,
+    DEFAULT_TILING_MODE,
+    TILING_MODES,
+    detect_tiled,
+    effective_tile_size,
+    should_tile,
+)
+from layout import DEFAULT_LAYOUT_MODE, LAYOUT_MODES, apply_layout, reading_order
+from uploads import (
+    OCR_MAX_UPLOAD_BYTES,
+    TRANSCRIBE_MAX_UPLOAD_BYTES,
+    UploadTooLarge,
+    content_length_exceeds,
+    max_upload_bytes_for_path,
+    read_upload,
+    save_upload,
+)
+from pdf_raster import (
+    PDFIUM_AVAILABLE,
+    PDF_MAX_PAGES,
+    PDFPageSelectionError,
+    close_pdf,
+    is_done,
+    open_pdf,
+    parse_page_selection,
+    start_page_renderer,
+)
+from recognition import (
+    RECOGNITION_BATCH_SIZE,
+    RECOGNITION_PATH_BATCHED,
+    RECOGNITION_PATH_READTEXT,
+    box_geometry,
+    extract_crops,
+    ignore_chars_for,
+    recognize_crops,
+)
 import transcribe
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Heavy libraries (torch, cv2, easyocr, faster-whisper, transformers) load on first use
+startup = StartupTracker(started=_IMPORT_STARTED)
+startup.record("import main modules", time.perf_counter() - _IMPORT_STARTED)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Thai OCR API with CRAFT",
@@ -38,12 +92,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse bodies over the upload limit from Content-Length, before they are parsed."""
+    if request.method == "POST":
+        limit = max_upload_bytes_for_path(request.url.path)
+        if content_length_exceeds(request.headers.get("content-length"), limit):
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds the {limit // (1024 * 1024)} MB limit"},
+            )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-endpoint latency histogram; the route template keeps label cardinality bounded."""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        endpoint=getattr(route, "path", "unmatched"),
+        method=request.method,
+        status=response.status_code,
+    )
+    return response
+
 # Global variables for models (initialized on startup)
-craft_detectors = {}  # Cache CRAFT detectors by (long_size, refiner)
-ocr_readers = {}  # Cache of OCR readers by language combination
+craft_detectors = CraftDetectorCache()  # Shared-weight CRAFT detectors by (long_size, refiner)
 device_config = None
 
 
+def _shared_craft_for_readers():
+    """Hand EasyOCR readers the CRAFT network already loaded for detection."""
+    cuda = bool(device_config and device_config.get("craft_supports_cuda", False))
+    return craft_detectors.shared_craft_net(cuda), "cuda" if cuda else "cpu"
+
+
+# LRU pool of recognition-only OCR readers by language combination
+ocr_readers = ReaderPool(detector_provider=_shared_craft_for_readers)
+# Blocking OCR inference runs here so the event loop stays responsive;
+# with worker processes, one thread per worker feeds the process pool
+inference_executor = InferenceExecutor(max_workers=max(DEFAULT_WORKERS, OCR_PROCESS_WORKERS))
+# Optional OCR worker processes with their own models (OCR_PROCESS_WORKERS > 0)
+ocr_process_pool = OCRProcessPool()
+# Groups CRAFT detections from concurrent requests into batched forward passes
+craft_scheduler = CraftBatchScheduler(concurrency=inference_executor.max_workers)
+# Finished /ocr payloads keyed by decoded pixels + settings
+result_cache = OCRResultCache()
+
+
+def _queue_depth_samples():
+    """Queue gauges for /metrics, read from the live stats at scrape time."""
+    executor = inference_executor.stats()
+    samples = [
+        ({"queue": "inference_running"}, executor["running"]),
+        ({"queue": "inference_waiting"}, executor["queued"]),
+        ({"queue": "craft_batch"}, craft_scheduler.stats()["queued"]),
+    ]
+    for worker in ocr_process_pool.stats()["per_worker"]:
+        samples.append(({"queue": "ocr_worker", "worker": worker["worker"]}, worker["queue_depth"]))
+    return samples
+
+
+metrics.REGISTRY.register(metrics.Gauge(
+    "ocr_queue_depth", "Jobs running or waiting, per queue.", ("queue", "worker"), collect=_queue_depth_samples,
+))
+
+
 def _env_bool(name, default):
     value = os.getenv(name)
     if value is None:
@@ -65,6 +183,19 @@ def _env_int(name, default):
 CRAFT_LONG_SIZE_MIN = 480
 CRAFT_LONG_SIZE_MAX = 2560
 
+# "recognizer" feeds CRAFT crops straight into EasyOCR's recognizer;
+# "readtext" keeps the old per-crop readtext() call (re-runs EasyOCR detection)
+RECOGNITION_MODES = ("recognizer", "readtext")
+DEFAULT_RECOGNITION_MODE = os.getenv("OCR_RECOGNITION_MODE", "recognizer").strip().lower()
+
+# /ocr/stream recognizes a small first chunk so the first text arrives quickly
+OCR_STREAM_FIRST_CHUNK = max(1, _env_int("OCR_STREAM_FIRST_CHUNK", 8))
+
+# Run one OCR pass on a synthetic page after loading so the first request isn't slow
+OCR_WARMUP = _env_bool("OCR_WARMUP", True)
+# Imported by the background loader so their cost shows up in the startup breakdown
+STARTUP_IMPORTS = ("numpy", "cv2", "torch", "craft_text_detector", "easyocr")
+
 
 def apply_craft_numpy_patch():
     """
@@ -124,14 +255,21 @@ def _parse_craft_request_settings(long_size_param, refiner_param):
     if device_config is None:
         base_long = 1280
         base_refiner = True
+        base_auto = False
     else:
         base_long = device_config.get("craft_long_size", 1280)
         base_refiner = device_config.get("craft_refiner", True)
+        base_auto = device_config.get("craft_long_size_auto", False)
 
     selected_long = base_long
     selected_refiner = base_refiner
+    selected_auto = base_auto
+    if base_auto:
+        base_long = AUTO_LONG_SIZE
 
-    if long_size_param:
+    if long_size_param and long_size_param.strip().lower() == AUTO_LONG_SIZE:
+        selected_auto = True
+    elif long_size_param:
         try:
             parsed = int(long_size_param)
             if parsed < CRAFT_LONG_SIZE_MIN or parsed > CRAFT_LONG_SIZE_MAX:
@@ -141,15 +279,41 @@ def _parse_craft_request_settings(long_size_param, refiner_param):
                 )
             else:
                 selected_long = parsed
+                selected_auto = False
         except ValueError:
             logger.warning(f"Invalid craft_long_size value {long_size_param!r}, using {base_long}")
 
+    # Snap to a bucket so nearby sizes share one cached detector
+    snapped_long = snap_long_size(selected_long)
+    if snapped_long != selected_long:
+        logger.info(f"CRAFT long_size {selected_long} snapped to bucket {snapped_long}")
+        selected_long = snapped_long
+
     if refiner_param:
         selected_refiner = refiner_param.strip().lower() in ("1", "true", "yes", "on")
 
+    # Resolved per image in _detect_regions
+    if selected_auto:
+        return AUTO_LONG_SIZE, selected_refiner
     return selected_long, selected_refiner
 
 
+def _source_long_size(requested_long_size, detail_factor=1.0):
+    """long_size to decode or rasterize an upload for; auto keeps room for the largest size it may pick."""
+    if is_auto_long_size(requested_long_size):
+        return source_long_size(detail_factor)
+    return requested_long_size
+
+
+def _raster_long_size(requested_long_size):
+    """
+    Long side to render /ocr/pdf pages at: the same detail /ocr keeps when it
+    decodes an upload (OCR_DECODE_DETAIL_FACTOR x long_size), so recognition
+    crops are as sharp as for an image upload; CRAFT downscales for detection.
+    """
+    return round(_source_long_size(requested_long_size, OCR_DECODE_DETAIL_FACTOR) * OCR_DECODE_DETAIL_FACTOR)
+
+
 def get_craft_detector(long_size=None, refiner=None):
     """Return a cached CRAFT detector for requested settings."""
     global craft_detectors, device_config
@@ -159,30 +323,18 @@ def get_craft_detector(long_size=None, refiner=None):
     target_long = long_size if long_size is not None else device_config.get("craft_long_size", 1280)
     target_refiner = refiner if refiner is not None else device_config.get("craft_refiner", True)
 
-    key = (target_long, target_refiner)
-    if key not in craft_detectors:
-        logger.info(
-            f"Initializing CRAFT detector (long_size={target_long}, refiner={target_refiner})"
-        )
-        craft_detectors[key] = Craft(
-            output_dir=None,
-            crop_type="poly",
-            cuda=device_config.get("craft_supports_cuda", False),
-            long_size=target_long,
-            refiner=target_refiner,
-        )
-    return craft_detectors[key]
-
+    return craft_detectors.get(
+        snap_long_size(target_long),
+        target_refiner,
+        cuda=device_config.get("craft_supports_cuda", False),
+    )
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize models on startup"""
-    global ocr_readers, device_config
 
+def _configure_device():
+    """Detect the device and resolve the default CRAFT settings for it."""
     # Detect device (CUDA, MPS, or CPU)
     device_config = get_device_info()
     use_cuda = device_config["craft_supports_cuda"]
-    easyocr_gpu = device_config["easyocr_gpu"]
     default_long_size = 1280
     default_refiner = True
 
@@ -191,50 +343,361 @@ async def startup_event():
         default_long_size = 960
         default_refiner = False
 
-    craft_long_size = _env_int("CRAFT_LONG_SIZE", default_long_size)
+    # CRAFT_LONG_SIZE=auto picks the size per image; the device default stays the fallback
+    craft_long_size_auto = os.getenv("CRAFT_LONG_SIZE", "").strip().lower() == AUTO_LONG_SIZE
+    if craft_long_size_auto:
+        craft_long_size = default_long_size
+    else:
+        craft_long_size = _env_int("CRAFT_LONG_SIZE", default_long_size)
     craft_use_refiner = _env_bool("CRAFT_USE_REFINER", default_refiner)
     device_config["craft_long_size"] = craft_long_size
+    device_config["craft_long_size_auto"] = craft_long_size_auto
     device_config["craft_refiner"] = craft_use_refiner
 
+    long_size_label = f"auto (fallback {craft_long_size})" if craft_long_size_auto else craft_long_size
     logger.info(
-        f"CRAFT settings -> cuda={use_cuda}, long_size={craft_long_size}, refiner={craft_use_refiner}"
+        f"CRAFT settings -> cuda={use_cuda}, long_size={long_size_label}, refiner={craft_use_refiner}"
     )
+    return device_config
+
 
+def _preload_ocr_models():
     logger.info("Initializing CRAFT text detector cache...")
-    craft_detectors.clear()
-    get_craft_detector(long_size=craft_long_size, refiner=craft_use_refiner)
+    with startup.stage("load CRAFT detector"):
+        craft_detectors.clear()
+        get_craft_detector(
+            long_size=device_config["craft_long_size"], refiner=device_config["craft_refiner"]
+        )
     logger.info("Default CRAFT detector initialized successfully")
 
     logger.info("Pre-loading default EasyOCR reader for Thai and English...")
-    ocr_readers['th,en'] = easyocr.Reader(['th', 'en'], gpu=easyocr_gpu)
+    with startup.stage("load EasyOCR reader (th, en)"):
+        get_ocr_reader(['th', 'en'])
     logger.info("Default EasyOCR reader initialized successfully")
 
-    # Set device config for transcribe module
-    logger.info("Initializing speech-to-text module...")
-    transcribe.set_device_config(device_config)
-    logger.info("Speech-to-text module initialized")
+    if OCR_WARMUP:
+        with startup.stage("warm-up inference"):
+            _warm_up_ocr()
+
+
+def _warm_up_ocr():
+    """One full CRAFT + recognizer pass on a synthetic page (allocators, kernels, ORT sessions)."""
+    import cv2
+
+    page = np.full((720, 960, 3), 255, dtype=np.uint8)
+    for row in range(8):
+        cv2.putText(
+            page, f"Warm-up line {row + 1}: 0123456789", (40, 70 + row * 80),
+            cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2,
+        )
+    _ocr_image(
+        page, ['th', 'en'], device_config["craft_long_size"], device_config["craft_refiner"], False, "recognizer"
+    )
+
+
+def _init_ocr_worker():
+    """Runs once in each OCR worker process: same device settings and preloaded, warmed-up models."""
+    global device_config, craft_scheduler
+    device_config = _configure_device()
+    # A worker runs one job at a time, so there is never a second image to batch with
+    craft_scheduler = CraftBatchScheduler(concurrency=1)
+    _preload_ocr_models()
+
+
+def _ocr_worker_job(img, *buffers, source_shape=None, scale=1, **options):
+    """
+    /ocr pipeline inside an OCR worker process.
+
+    ``img`` (and the upload bytes in ``buffers`` when it was decoded at reduced
+    resolution) are views of shared memory owned by the API process.
+    """
+    source = None
+    if buffers:
+        source = DecodedImage(img, buffers[0], scale, source_shape=source_shape)
+    timings = StageTimings()
+    result = _ocr_image(img, source=source, timings=timings, **options)
+    return {"result": result, "timings": timings.export()}
+
+
+def _load_models():
+    """Background startup: heavy imports, device detection, model loading and warm-up."""
+    global device_config
+
+    startup.mark_loading()
+    try:
+        for module in STARTUP_IMPORTS:
+            startup.timed_import(module)
+
+        with startup.stage("detect device"):
+            device_config = _configure_device()
+
+        if ocr_process_pool.enabled:
+            # The API process loads its own models only if /ocr/stream or /ocr-simple need them
+            with startup.stage("start OCR worker processes"):
+                ocr_process_pool.start(_ocr_worker_job, _init_ocr_worker)
+            if not any(worker["ready"] for worker in ocr_process_pool.stats()["per_worker"]):
+                raise RuntimeError("no OCR worker process finished loading")
+        else:
+            _preload_ocr_models()
+
+        # Set device config for transcribe module
+        logger.info("Initializing speech-to-text module...")
+        transcribe.set_device_config(device_config)
+        logger.info("Speech-to-text module initialized")
+        startup.mark_ready()
+    except Exception as e:
+        startup.mark_failed(str(e))
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start loading models in the background; /ready turns 200 once they are warmed up"""
+    threading.Thread(target=_load_models, name="model-loader", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop accepting inference jobs"""
+    inference_executor.shutdown()
+    ocr_process_pool.shutdown()
 
 
 def get_ocr_reader(languages):
-    """Get or create OCR reader for specified languages"""
-    global ocr_readers, device_config
+    """Get a pooled OCR reader that can serve the specified languages"""
     import torch
 
-    # Sort languages to ensure consistent cache key
-    lang_key = ','.join(sorted(languages))
+    # Fall back to torch.cuda availability if device_config is not set
+    if device_config:
+        gpu_enabled = device_config["easyocr_gpu"]
+    else:
+        gpu_enabled = torch.cuda.is_available()
+
+    return ocr_readers.get(languages, gpu=gpu_enabled)
+
+
+def _get_ocr_reader_timed(languages, timings):
+    """get_ocr_reader, adding a "model_load" stage when the call had to load a reader."""
+    loads = ocr_readers.loads
+    started = time.perf_counter()
+    reader = get_ocr_reader(languages)
+    if ocr_readers.loads != loads:
+        timings.add("model_load", time.perf_counter() - started)
+    return reader
+
+
+def _request_blocklist(ocr_reader, lang_list):
+    """Extra ignore list when a pooled reader loaded for more languages serves lang_list."""
+    return ignore_chars_for(ocr_reader, ocr_readers.languages_of(ocr_reader), lang_list)
+
+
+def _readtext_kwargs(blocklist):
+    return {"blocklist": blocklist} if blocklist else {}
+
+
+def _parse_recognition_mode(mode_param):
+    """Resolve the requested recognition mode, falling back to the default."""
+    default_mode = DEFAULT_RECOGNITION_MODE if DEFAULT_RECOGNITION_MODE in RECOGNITION_MODES else "recognizer"
+    if not mode_param:
+        return default_mode
+    mode = mode_param.strip().lower()
+    if mode not in RECOGNITION_MODES:
+        logger.warning(f"Invalid recognition_mode {mode_param!r}, using {default_mode}")
+        return default_mode
+    return mode
+
+
+def _parse_layout_mode(mode_param):
+    """Resolve the requested layout stage ("none" or "lines"), falling back to the default."""
+    default_mode = DEFAULT_LAYOUT_MODE if DEFAULT_LAYOUT_MODE in LAYOUT_MODES else "none"
+    if not mode_param:
+        return default_mode
+    mode = mode_param.strip().lower()
+    if mode not in LAYOUT_MODES:
+        logger.warning(f"Invalid layout {mode_param!r}, using {default_mode}")
+        return default_mode
+    return mode
+
+
+def _parse_tiling_mode(mode_param):
+    """Resolve the requested CRAFT tiling ("off", "on" or "auto"), falling back to the default."""
+    default_mode = DEFAULT_TILING_MODE if DEFAULT_TILING_MODE in TILING_MODES else "off"
+    if not mode_param:
+        return default_mode
+    mode = mode_param.strip().lower()
+    if mode not in TILING_MODES:
+        logger.warning(f"Invalid craft_tiling {mode_param!r}, using {default_mode}")
+        return default_mode
+    return mode
+
+
+def _readtext_crops(ocr_reader, crops, blocklist=None, box_seconds=None):
+    detections = []
+    for idx, cropped in enumerate(crops):
+        started = time.perf_counter()
+        try:
+            result = ocr_reader.readtext(cropped, detail=1, **_readtext_kwargs(blocklist))
+            detections.append([(text, confidence) for _, text, confidence in result])
+        except Exception as e:
+            logger.error(f"Error recognizing crop {idx}: {str(e)}")
+            detections.append([])
+        if box_seconds is not None:
+            box_seconds.append(time.perf_counter() - started)
+    return detections
 
-    if lang_key not in ocr_readers:
-        logger.info(f"Creating new EasyOCR reader for languages: {languages}")
-        # Fall back to torch.cuda availability if device_config is not set
-        gpu_enabled = False
-        if device_config:
-            gpu_enabled = device_config["easyocr_gpu"]
-        else:
-            gpu_enabled = torch.cuda.is_available()
-        ocr_readers[lang_key] = easyocr.Reader(languages, gpu=gpu_enabled)
-        logger.info(f"EasyOCR reader for {languages} created successfully")
 
-    return ocr_readers[lang_key]
+def _recognize_regions(ocr_reader, crops, mode="recognizer", blocklist=None, box_seconds=None):
+    """
+    Recognize CRAFT crops, returning (detections, recognition_path).
+
+    detections holds a list of (text, confidence) pairs per crop. The
+    recognizer path skips EasyOCR's own detector since CRAFT already localized
+    the text; it falls back to one readtext() call per crop if it fails.
+    Per-crop recognition seconds are appended to ``box_seconds`` when given.
+    """
+    recorded = len(box_seconds) if box_seconds is not None else 0
+    if mode == "recognizer":
+        try:
+            recognized = recognize_crops(ocr_reader, crops, ignore_char=blocklist, box_seconds=box_seconds)
+            detections = [
+                [(item["text"], item["confidence"])] if item else []
+                for item in recognized
+            ]
+            return detections, RECOGNITION_PATH_BATCHED
+        except Exception as e:
+            logger.error(f"Batched recognition failed, falling back to per-crop readtext: {str(e)}")
+
+    if box_seconds is not None:
+        # Drop batches timed before the failure; the readtext timings replace them
+        del box_seconds[recorded:]
+    return _readtext_crops(ocr_reader, crops, blocklist, box_seconds), RECOGNITION_PATH_READTEXT
+
+
+def _parse_languages(languages, label=""):
+    """Parse the JSON language list form field, defaulting to Thai + English."""
+    lang_list = ['th', 'en']  # default
+    if languages:
+        try:
+            lang_list = json.loads(languages)
+            if not isinstance(lang_list, list) or len(lang_list) == 0:
+                lang_list = ['th', 'en']
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid languages format: {languages}, using default")
+            lang_list = ['th', 'en']
+
+    logger.info(f"Using languages{label}: {lang_list}")
+    return lang_list
+
+
+def _decode_image(contents):
+    """Decode uploaded bytes into a BGR image or raise a 400."""
+    import cv2
+
+    nparr = np.frombuffer(contents, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+    if img is None:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+    return img
+
+
+def _apply_ai_correction(text, lang_list, label="", timings=None):
+    """Run Qwen correction on text; returns (text, corrected). Adds "model_load"/"correct" to timings."""
+    # Imported on first use: pulls in torch and transformers
+    from qwen_corrector import (
+        RELEASE_AFTER_USE, corrector_loaded, corrector_lock, get_corrector, release_corrector,
+    )
+
+    timings = StageTimings() if timings is None else timings
+    # Qwen is a single shared model: serialize load/generate/release across workers
+    with corrector_lock():
+        try:
+            logger.info(f"Applying AI correction with Qwen{label}...")
+            with timings.stage("model_load" if not corrector_loaded() else "correct"):
+                corrector = get_corrector()
+
+            # Determine primary language
+            primary_lang = "thai" if "th" in lang_list else "english"
+
+            # Correct the combined text
+            with timings.stage("correct"):
+                correction_result = corrector.correct(text, language=primary_lang)
+
+            if correction_result["success"]:
+                logger.info("AI correction completed successfully")
+                return correction_result["corrected_text"], True
+
+            logger.warning(f"AI correction failed: {correction_result.get('error', 'Unknown error')}")
+
+        except Exception as e:
+            logger.error(f"AI correction error{label}: {str(e)}")
+            # Continue with uncorrected text
+        finally:
+            if RELEASE_AFTER_USE:
+                release_corrector()
+
+    return text, False
+
+
+async def _read_image_upload(file: UploadFile):
+    """Read an image upload in chunks, enforcing OCR_MAX_UPLOAD_MB."""
+    try:
+        return await read_upload(file, OCR_MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def _save_upload_to_temp(file: UploadFile, suffix: str, max_bytes: int) -> str:
+    """Stream an upload straight to a named temp file and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        temp_file_path = temp_file.name
+        try:
+            await save_upload(file, temp_file, max_bytes)
+        except BaseException as e:
+            temp_file.close()
+            os.unlink(temp_file_path)
+            if isinstance(e, UploadTooLarge):
+                raise HTTPException(status_code=413, detail=str(e))
+            raise
+    return temp_file_path
+
+
+def _raise_if_loading():
+    """503 while the background loader is still bringing models up (see /ready)."""
+    if startup.status in ("starting", "loading"):
+        raise HTTPException(
+            status_code=503,
+            detail="OCR models are still loading, please retry later",
+            headers={"Retry-After": "5"},
+        )
+
+
+async def _run_inference(func, *args, **kwargs):
+    """Run a blocking OCR job on the inference executor, mapping overload to 503."""
+    _raise_if_loading()
+    try:
+        return await inference_executor.run(func, *args, **kwargs)
+    except InferenceQueueFull as e:
+        logger.warning(f"Rejecting request, inference queue full (retry after {e.retry_after}s)")
+        raise HTTPException(
+            status_code=503,
+            detail="OCR server is busy, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def _run_inference_when_available(func, *args, **kwargs):
+    """Like _run_inference, but waits for queue space instead of failing (long streams)."""
+    while startup.status in ("starting", "loading"):
+        await asyncio.sleep(1)
+    while True:
+        try:
+            return await inference_executor.run(func, *args, **kwargs)
+        except InferenceQueueFull as e:
+            await asyncio.sleep(min(e.retry_after, 5))
+
+
+def _ndjson(record):
+    return json.dumps(record, ensure_ascii=False) + "\n"
 
 
 @app.get("/")
@@ -245,24 +708,407 @@ async def root():
         "message": "Thai OCR API with CRAFT is running",
         "endpoints": {
             "/ocr": "POST - Upload image for OCR processing",
-            "/health": "GET - Check API health status"
+            "/ocr/pdf": "POST - Upload PDF for page-by-page OCR (NDJSON stream)",
+            "/ocr/stream": "POST - Upload image for OCR, regions streamed as NDJSON",
+            "/health": "GET - Check API health status",
+            "/ready": "GET - Readiness probe (200 once models are loaded and warmed up)",
+            "/metrics": "GET - Prometheus metrics (per-stage latency, counters, queue depths)"
         }
     }
 
 
+def _model_memory_report():
+    """Parameter bytes per loaded model, plus CUDA allocator totals when on GPU."""
+    report = {
+        "craft": craft_detectors.stats()["weights_bytes"],
+        **ocr_readers.memory_report(),
+    }
+    if device_config and device_config.get("cuda_available"):
+        try:
+            import torch
+
+            report["cuda_allocated_bytes"] = torch.cuda.memory_allocated()
+            report["cuda_reserved_bytes"] = torch.cuda.memory_reserved()
+        except Exception as e:
+            report["cuda_error"] = str(e)
+    return report
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once models are loaded and warmed up, 503 while loading or failed"""
+    # Every OCR worker process given up after repeated start failures means no OCR capacity left
+    ready = startup.ready and ocr_process_pool.healthy
+    report = {"ready": ready, **startup.report()}
+    if not ocr_process_pool.healthy:
+        report["error"] = "all OCR worker processes failed to start"
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
     return {
-        "status": "healthy",
+        "status": "healthy" if ocr_process_pool.healthy else "unhealthy",
+        "startup": startup.report(),
         "craft_loaded": len(craft_detectors) > 0,
         "craft_cached_configs": [{"long_size": key[0], "refiner": key[1]} for key in craft_detectors.keys()],
+        "craft_cache": craft_detectors.stats(),
         "default_craft_settings": {
             "long_size": device_config.get("craft_long_size") if device_config else None,
+            "long_size_auto": device_config.get("craft_long_size_auto", False) if device_config else False,
             "refiner": device_config.get("craft_refiner") if device_config else None,
         },
         "ocr_readers_loaded": len(ocr_readers),
-        "available_language_combinations": list(ocr_readers.keys())
+        "available_language_combinations": list(ocr_readers.keys()),
+        "ocr_reader_pool": ocr_readers.stats(),
+        "ocr_reader_events": ocr_readers.events(limit=20),
+        "model_memory": _model_memory_report(),
+        "model_snapshots": model_snapshots.stats(),
+        "inference_executor": inference_executor.stats(),
+        "ocr_process_pool": ocr_process_pool.stats(),
+        "craft_batching": craft_scheduler.stats(),
+        "result_cache": result_cache.stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: per-stage latency histograms, page/cache/fallback counters, queue gauges"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _metric_labels(lang_list, requested_long_size, requested_refiner):
+    return {
+        "long_size": requested_long_size,
+        "refiner": "true" if requested_refiner else "false",
+        "languages": language_key(lang_list),
+        "device": device_config.get("type", "cpu") if device_config else "unknown",
+    }
+
+
+def _record_page_metrics(endpoint, result, timings, labels):
+    """Stage histograms plus page, box and CRAFT-fallback counters for one OCRed image/page."""
+    metrics.observe_stages(endpoint, timings, **labels)
+    metrics.PAGES.inc(endpoint=endpoint, cache=result.get("cache", "none"))
+    if result.get("mode") == "fallback_easyocr_only":
+        metrics.CRAFT_FALLBACKS.inc(endpoint=endpoint)
+    elif result.get("cache") != "hit":
+        metrics.BOXES_PER_PAGE.observe(result.get("total_regions", 0), endpoint=endpoint)
+
+
+def _timed_response(payload, timings):
+    """JSON response carrying the request's stage breakdown as ``timings`` and a Server-Timing header."""
+    payload["timings"] = timings.report()
+    return JSONResponse(payload, headers={"Server-Timing": timings.server_timing()})
+
+
+def _timed_stage(timings, stage, func, *args, **kwargs):
+    """Run func as one pipeline stage; used for jobs handed to the inference executor."""
+    with timings.stage(stage):
+        return func(*args, **kwargs)
+
+
+def _decode_upload(contents, requested_long_size, tiling_mode):
+    """
+    decode_for_detection for /ocr and /ocr/stream.
+
+    Images that will be tiled keep full resolution, since tiling exists to
+    keep small text on huge images; under tiling "auto" that is decided from
+    the header size, so ordinary photos still get the reduced decode.
+    """
+    reduce = tiling_mode == "off"
+    if tiling_mode == "auto":
+        size = header_size(contents)
+        reduce = size is not None and not should_tile(tiling_mode, (size[1], size[0]))
+    return decode_for_detection(
+        contents, _source_long_size(requested_long_size, OCR_DECODE_DETAIL_FACTOR), reduce=reduce
+    )
+
+
+def _run_craft_ocr(
+    contents, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode,
+    layout_mode="none", tiling_mode="off", timings=None,
+):
+    """Decode an upload (reduced if oversized) and run the CRAFT + EasyOCR pipeline on it."""
+    timings = StageTimings() if timings is None else timings
+    with timings.stage("decode"):
+        source = _decode_upload(contents, requested_long_size, tiling_mode)
+    if source is None:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+    return _ocr_image_cached(
+        source.image, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode,
+        source=source, layout_mode=layout_mode, tiling_mode=tiling_mode, timings=timings,
+    )
+
+
+def _ocr_image_cached(
+    img, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode, source=None,
+    layout_mode="none", tiling_mode="off", timings=None,
+):
+    """Serve _ocr_image results from the result cache when the same image was seen before."""
+    cache_key = make_cache_key(
+        img,
+        lang_list,
+        long_size=requested_long_size,
+        refiner=requested_refiner,
+        ai_correct=ai_correct_enabled,
+        recognition_mode=recognition_mode,
+        decode_scale=source.scale if source is not None else 1,
+        layout=layout_mode,
+        tiling=tiling_mode,
+    )
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.info("OCR result cache hit")
+        metrics.RESULT_CACHE.inc(result="hit")
+        cached["cache"] = "hit"
+        return cached
+    metrics.RESULT_CACHE.inc(result="miss")
+
+    result = _run_ocr_image(
+        img, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode,
+        source=source, layout_mode=layout_mode, tiling_mode=tiling_mode, timings=timings,
+    )
+    # Don't pin degraded results: CRAFT fallback or a requested correction that failed
+    degraded = result.get("mode") == "fallback_easyocr_only" or (
+        ai_correct_enabled and not result.get("ai_corrected")
+    )
+    if not degraded:
+        result_cache.put(cache_key, result)
+    result["cache"] = "miss"
+    return result
+
+
+def _run_ocr_image(
+    img, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode, source=None,
+    layout_mode="none", tiling_mode="off", timings=None,
+):
+    """
+    _ocr_image here or, with OCR_PROCESS_WORKERS, on a worker process.
+
+    Workers get the decoded pixels through shared memory. Qwen correction
+    stays in this process so workers don't each load their own copy.
+    """
+    timings = StageTimings() if timings is None else timings
+    if not ocr_process_pool.enabled:
+        return _ocr_image(
+            img, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode,
+            source=source, layout_mode=layout_mode, tiling_mode=tiling_mode, timings=timings,
+        )
+
+    arrays = [img]
+    source_options = {}
+    if source is not None and source.scale > 1:
+        arrays.append(np.frombuffer(source.contents, np.uint8))
+        source_options = {"scale": source.scale, "source_shape": tuple(source.source_shape)}
+    job = ocr_process_pool.run(
+        arrays,
+        lang_list=lang_list,
+        requested_long_size=requested_long_size,
+        requested_refiner=requested_refiner,
+        ai_correct_enabled=False,
+        recognition_mode=recognition_mode,
+        layout_mode=layout_mode,
+        tiling_mode=tiling_mode,
+        **source_options,
+    )
+    result = job["result"]
+    timings.merge(job["timings"])
+    if ai_correct_enabled:
+        label = " (fallback mode)" if result.get("mode") == "fallback_easyocr_only" else ""
+        result["text"], result["ai_corrected"] = _apply_ai_correction(
+            result["text"], lang_list, label=label, timings=timings
+        )
+    return result
+
+
+def _craft_settings(requested_long_size, requested_refiner, scale=1):
+    craft_settings = {
+        "long_size": requested_long_size,
+        "refiner": requested_refiner
+    }
+    if scale > 1:
+        craft_settings["decode_scale"] = scale
+    return craft_settings
+
+
+def _fallback_readtext(img, ocr_reader, blocklist, scale=1):
+    """Full-image EasyOCR when CRAFT fails; returns /ocr detail records."""
+    logger.info("Falling back to simple OCR mode...")
+    results = ocr_reader.readtext(img, detail=1, **_readtext_kwargs(blocklist))
+
+    detailed_results = []
+    for detection in results:
+        bbox, text, confidence = detection
+        if text.strip():
+            # Convert bbox to simple coordinates
+            x_coords = [point[0] * scale for point in bbox]
+            y_coords = [point[1] * scale for point in bbox]
+            detailed_results.append({
+                "text": text,
+                "confidence": float(confidence),
+                "box": {
+                    "x1": int(min(x_coords)),
+                    "y1": int(min(y_coords)),
+                    "x2": int(max(x_coords)),
+                    "y2": int(max(y_coords))
+                }
+            })
+    return detailed_results
+
+
+def _detect_regions(
+    img, requested_long_size, requested_refiner, source=None, layout_mode="none", tiling_mode="off",
+    craft_settings=None,
+):
+    """
+    Run CRAFT (tiled for huge images), the optional layout stage, and crop every valid box.
+
+    Returns (box_count, regions, crops, layout_stats); regions holds
+    (box_index, box_dict) per crop, in the uploaded image's coordinates.
+    Tiling details are added to ``craft_settings`` when tiles were used, and
+    the size picked for ``requested_long_size="auto"`` plus its text-height
+    estimate when it was resolved. Detection errors propagate so callers can fall back.
+    """
+    if should_tile(tiling_mode, img.shape):
+        detector = get_craft_detector(effective_tile_size(), requested_refiner)
+        prediction_result = detect_tiled(detector, img)
+        if craft_settings is not None:
+            craft_settings["tiling"] = {
+                "tiles": prediction_result["tiles"],
+                "tile_size": detector.long_size,
+                "overlap": min(CRAFT_TILE_OVERLAP, detector.long_size // 2),
+            }
+    else:
+        if is_auto_long_size(requested_long_size):
+            fallback = device_config.get("craft_long_size", 1280) if device_config else 1280
+            requested_long_size, auto_settings = resolve_long_size(img, snap_long_size(fallback))
+            if craft_settings is not None:
+                craft_settings["long_size"] = requested_long_size
+                craft_settings["auto"] = auto_settings
+        detector = get_craft_detector(requested_long_size, requested_refiner)
+
+        logger.info(
+            f"Running CRAFT text detection (long_size={requested_long_size}, refiner={requested_refiner})..."
+        )
+        prediction_result = craft_scheduler.detect(
+            detector, (requested_long_size, requested_refiner), img
+        )
+    boxes = prediction_result["boxes"]
+
+    logger.info(f"CRAFT detected {len(boxes)} text regions")
+
+    indices, bounds, rotated = box_geometry(boxes, img.shape)
+    if len(indices) < len(boxes):
+        logger.info(f"Skipped {len(boxes) - len(indices)} malformed or empty boxes")
+    indices, bounds, rotated, layout_stats = apply_layout(indices, bounds, rotated, layout_mode)
+    crops = extract_crops(img, boxes, indices, bounds, rotated)
+    if source is not None:
+        crops = source.refine_crops(crops, boxes, indices, bounds, rotated)
+        bounds = source.to_source_bounds(bounds)
+    regions = [
+        (idx, {"x1": x1, "y1": y1, "x2": x2, "y2": y2})
+        for idx, (x1, y1, x2, y2) in zip(indices.tolist(), bounds.tolist())
+    ]
+    return len(boxes), regions, crops, layout_stats
+
+
+def _region_details(regions, region_detections):
+    """Detail records (one per non-empty text) for recognized regions."""
+    detailed_results = []
+    for (idx, region_box), detections in zip(regions, region_detections):
+        for text, confidence in detections:
+            if text.strip():  # Only include non-empty text
+                detailed_results.append({
+                    "text": text,
+                    "confidence": float(confidence),
+                    "box": region_box
+                })
+                logger.info(f"Box {idx}: '{text}' (confidence: {confidence:.2f})")
+    return detailed_results
+
+
+def _ocr_image(
+    img, lang_list, requested_long_size, requested_refiner, ai_correct_enabled, recognition_mode, source=None,
+    layout_mode="none", tiling_mode="off", timings=None,
+):
+    """
+    Blocking CRAFT + EasyOCR pipeline for one BGR image; runs on the inference executor.
+
+    ``source`` is the DecodedImage ``img`` came from when it was decoded at
+    reduced resolution: small text is then re-cropped at full resolution and
+    boxes are reported in the uploaded image's coordinates. Stage durations
+    are added to ``timings``.
+    """
+    timings = StageTimings() if timings is None else timings
+    scale = source.scale if source is not None else 1
+    craft_settings = _craft_settings(requested_long_size, requested_refiner, scale)
+
+    # Get OCR reader for specified languages
+    ocr_reader = _get_ocr_reader_timed(lang_list, timings)
+    blocklist = _request_blocklist(ocr_reader, lang_list)
+
+    # Step 1: Use CRAFT to detect text regions and crop them
+    try:
+        with timings.stage("detect"):
+            box_count, regions, crops, layout_stats = _detect_regions(
+                img, requested_long_size, requested_refiner, source, layout_mode, tiling_mode, craft_settings
+            )
+    except Exception as e:
+        logger.error(f"CRAFT detection failed: {str(e)}")
+        # Fallback to simple OCR if CRAFT fails
+        with timings.stage("fallback_readtext"):
+            detailed_results = _fallback_readtext(img, ocr_reader, blocklist, scale)
+        combined_text = " ".join(detail["text"] for detail in detailed_results)
+
+        # Apply AI correction if requested (fallback mode)
+        ai_corrected_fallback = False
+        if ai_correct_enabled:
+            combined_text, ai_corrected_fallback = _apply_ai_correction(
+                combined_text, lang_list, label=" (fallback mode)", timings=timings
+            )
+
+        return {
+            "success": True,
+            "text": combined_text,
+            "total_regions": len(detailed_results),
+            "recognized_regions": len(detailed_results),
+            "details": detailed_results,
+            "mode": "fallback_easyocr_only",
+            "recognition_path": "readtext_full_image",
+            "ai_corrected": ai_corrected_fallback,
+            "craft_settings": craft_settings
+        }
+
+    # Step 2: Recognize the crops in batches
+    logger.info(f"Recognizing {len(crops)} crops (mode={recognition_mode})")
+    with timings.stage("recognize"):
+        region_detections, recognition_path = _recognize_regions(
+            ocr_reader, crops, mode=recognition_mode, blocklist=blocklist, box_seconds=timings.box_seconds
+        )
+    detailed_results = _region_details(regions, region_detections)
+
+    # Combine all text
+    combined_text = " ".join(detail["text"] for detail in detailed_results)
+
+    logger.info(f"OCR completed. Total text blocks: {len(detailed_results)}")
+
+    # Apply AI correction if requested
+    ai_corrected = False
+    if ai_correct_enabled:
+        combined_text, ai_corrected = _apply_ai_correction(combined_text, lang_list, timings=timings)
+
+    return {
+        "success": True,
+        "text": combined_text,
+        "total_regions": box_count,
+        "recognized_regions": len(detailed_results),
+        "details": detailed_results,
+        "recognition_path": recognition_path,
+        "ai_corrected": ai_corrected,
+        "craft_settings": craft_settings,
+        "layout": layout_stats
     }
 
 
@@ -273,6 +1119,9 @@ async def process_ocr(
     ai_correct: Optional[str] = Form("false"),
     craft_long_size: Optional[str] = Form(None),
     craft_use_refiner: Optional[str] = Form(None),
+    recognition_mode: Optional[str] = Form(None),
+    layout: Optional[str] = Form(None),
+    craft_tiling: Optional[str] = Form(None),
 ):
     """
     Process uploaded image with CRAFT + EasyOCR
@@ -281,36 +1130,25 @@ async def process_ocr(
         file: Image file (jpg, png, etc.)
         languages: JSON string of language codes (e.g., '["th", "en"]')
         ai_correct: Enable AI correction with Qwen model ("true" or "false")
+        recognition_mode: "recognizer" (CRAFT crops only) or "readtext" (legacy per-crop detection)
+        layout: "lines" to merge boxes into reading-ordered text lines before recognition, or "none"
+        craft_tiling: "on"/"auto" to detect huge images in overlapping native-resolution tiles, or "off"
 
     Returns:
         JSON with detected text and bounding boxes
     """
     try:
         # Parse languages
-        lang_list = ['th', 'en']  # default
-        if languages:
-            try:
-                lang_list = json.loads(languages)
-                if not isinstance(lang_list, list) or len(lang_list) == 0:
-                    lang_list = ['th', 'en']
-            except json.JSONDecodeError:
-                logger.warning(f"Invalid languages format: {languages}, using default")
-                lang_list = ['th', 'en']
-
-        logger.info(f"Using languages: {lang_list}")
+        lang_list = _parse_languages(languages)
 
         # Determine requested CRAFT settings
         requested_long_size, requested_refiner = _parse_craft_request_settings(
             craft_long_size, craft_use_refiner
         )
-        craft_settings = {
-            "long_size": requested_long_size,
-            "refiner": requested_refiner
-        }
-
-        # Get OCR reader for specified languages
-        ocr_reader = get_ocr_reader(lang_list)
-        detector = get_craft_detector(requested_long_size, requested_refiner)
+        selected_recognition_mode = _parse_recognition_mode(recognition_mode)
+        selected_layout_mode = _parse_layout_mode(layout)
+        selected_tiling_mode = _parse_tiling_mode(craft_tiling)
+        ai_correct_enabled = bool(ai_correct and ai_correct.lower() == "true")
 
         # Validate file type
         if not file.content_type.startswith('image/'):
@@ -318,204 +1156,440 @@ async def process_ocr(
 
         logger.info(f"Processing file: {file.filename}")
 
+        started = time.perf_counter()
+        timings = StageTimings()
         # Read image file
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with timings.stage("upload"):
+            contents = await _read_image_upload(file)
+
+        payload = await _run_inference(
+            _run_craft_ocr,
+            contents,
+            lang_list,
+            requested_long_size,
+            requested_refiner,
+            ai_correct_enabled,
+            selected_recognition_mode,
+            layout_mode=selected_layout_mode,
+            tiling_mode=selected_tiling_mode,
+            timings=timings,
+        )
+        timings["total"] = time.perf_counter() - started
+        _record_page_metrics(
+            "/ocr", payload, timings, _metric_labels(lang_list, requested_long_size, requested_refiner)
+        )
+        return _timed_response(payload, timings)
 
-        if img is None:
-            raise HTTPException(status_code=400, detail="Invalid image file")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"OCR processing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
-        # Step 1: Use CRAFT to detect text regions
-        logger.info(
-            f"Running CRAFT text detection (long_size={requested_long_size}, refiner={requested_refiner})..."
+
+def _prepare_stream_ocr(
+    contents, lang_list, requested_long_size, requested_refiner, layout_mode="none", tiling_mode="off",
+    timings=None,
+):
+    """
+    Decode and run CRAFT for /ocr/stream; runs on the inference executor.
+
+    Returns the reader, blocklist and craft settings plus either the regions
+    and crops to recognize (in reading order) or, when CRAFT fails, the
+    finished full-image fallback details.
+    """
+    timings = StageTimings() if timings is None else timings
+    with timings.stage("decode"):
+        source = _decode_upload(contents, requested_long_size, tiling_mode)
+    if source is None:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+
+    ocr_reader = _get_ocr_reader_timed(lang_list, timings)
+    prepared = {
+        "ocr_reader": ocr_reader,
+        "blocklist": _request_blocklist(ocr_reader, lang_list),
+        "craft_settings": _craft_settings(requested_long_size, requested_refiner, source.scale),
+    }
+    try:
+        with timings.stage("detect"):
+            box_count, regions, crops, layout_stats = _detect_regions(
+                source.image, requested_long_size, requested_refiner, source, layout_mode, tiling_mode,
+                prepared["craft_settings"],
+            )
+    except Exception as e:
+        logger.error(f"CRAFT detection failed: {str(e)}")
+        with timings.stage("fallback_readtext"):
+            prepared["fallback_details"] = _fallback_readtext(
+                source.image, ocr_reader, prepared["blocklist"], source.scale
+            )
+        return prepared
+
+    # The layout stage already orders lines; plain boxes are sorted here
+    if layout_mode == "none":
+        order = reading_order(np.array(
+            [[box["x1"], box["y1"], box["x2"], box["y2"]] for _, box in regions], dtype=np.int64
+        ).reshape(-1, 4)).tolist()
+    else:
+        order = range(len(regions))
+    prepared.update({
+        "box_count": box_count,
+        "layout": layout_stats,
+        "regions": [regions[i] for i in order],
+        "crops": [crops[i] for i in order],
+    })
+    return prepared
+
+
+@app.post("/ocr/stream")
+async def process_ocr_stream(
+    file: UploadFile = File(...),
+    languages: Optional[str] = Form(None),
+    ai_correct: Optional[str] = Form("false"),
+    craft_long_size: Optional[str] = Form(None),
+    craft_use_refiner: Optional[str] = Form(None),
+    recognition_mode: Optional[str] = Form(None),
+    layout: Optional[str] = Form(None),
+    craft_tiling: Optional[str] = Form(None),
+):
+    """
+    Same pipeline as /ocr, streamed as NDJSON while regions are recognized
+
+    Returns:
+        NDJSON stream: a "start" record with the CRAFT box count once detection
+        finishes, one "region" record per recognized text in reading order, then
+        a "done" summary with the combined (optionally AI-corrected) text
+    """
+    try:
+        lang_list = _parse_languages(languages, label=" (stream mode)")
+        requested_long_size, requested_refiner = _parse_craft_request_settings(
+            craft_long_size, craft_use_refiner
         )
-        try:
-            prediction_result = detector.detect_text(img)
-        except Exception as e:
-            logger.error(f"CRAFT detection failed: {str(e)}")
-            # Fallback to simple OCR if CRAFT fails
-            logger.info("Falling back to simple OCR mode...")
-            results = ocr_reader.readtext(img, detail=1)
-            
-            all_text = []
-            detailed_results = []
-            
-            for detection in results:
-                bbox, text, confidence = detection
-                if text.strip():
-                    all_text.append(text)
-                    # Convert bbox to simple coordinates
-                    x_coords = [point[0] for point in bbox]
-                    y_coords = [point[1] for point in bbox]
-                    detailed_results.append({
-                        "text": text,
-                        "confidence": float(confidence),
-                        "box": {
-                            "x1": int(min(x_coords)),
-                            "y1": int(min(y_coords)),
-                            "x2": int(max(x_coords)),
-                            "y2": int(max(y_coords))
-                        }
-                    })
-            
-            combined_text = " ".join(all_text)
-
-            # Apply AI correction if requested (fallback mode)
-            ai_corrected_fallback = False
-            if ai_correct and ai_correct.lower() == "true":
+        selected_recognition_mode = _parse_recognition_mode(recognition_mode)
+        selected_layout_mode = _parse_layout_mode(layout)
+        selected_tiling_mode = _parse_tiling_mode(craft_tiling)
+        ai_correct_enabled = bool(ai_correct and ai_correct.lower() == "true")
+
+        if not file.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="File must be an image")
+
+        logger.info(f"Processing file (stream mode): {file.filename}")
+
+        started = time.perf_counter()
+        timings = StageTimings()
+        metric_labels = _metric_labels(lang_list, requested_long_size, requested_refiner)
+        with timings.stage("upload"):
+            contents = await _read_image_upload(file)
+        # Detection runs before the response starts so 400/503 can still be returned
+        prepared = await _run_inference(
+            _prepare_stream_ocr, contents, lang_list, requested_long_size, requested_refiner,
+            selected_layout_mode, selected_tiling_mode, timings,
+        )
+        del contents
+
+        async def generate():
+            details = []
+            fallback_details = prepared.get("fallback_details")
+            if fallback_details is not None:
+                regions, crops = [], []
+                recognition_path = "readtext_full_image"
+                total_regions = len(fallback_details)
+            else:
+                regions, crops = prepared["regions"], prepared["crops"]
+                recognition_path = (
+                    RECOGNITION_PATH_BATCHED if selected_recognition_mode == "recognizer"
+                    else RECOGNITION_PATH_READTEXT
+                )
+                total_regions = prepared["box_count"]
+
+            start_record = {
+                "type": "start",
+                "total_regions": total_regions,
+                "craft_settings": prepared["craft_settings"],
+                "detection_seconds": round(time.perf_counter() - started, 3),
+            }
+            if fallback_details is not None:
+                start_record["mode"] = "fallback_easyocr_only"
+            else:
+                start_record["layout"] = prepared["layout"]
+            yield _ndjson(start_record)
+
+            def emit(new_details):
+                records = []
+                for detail in new_details:
+                    records.append(_ndjson({"type": "region", "index": len(details), **detail}))
+                    details.append(detail)
+                return "".join(records)
+
+            if fallback_details is not None:
+                yield emit(fallback_details)
+
+            position = 0
+            chunk_size = OCR_STREAM_FIRST_CHUNK
+            while position < len(crops):
+                chunk_regions = regions[position:position + chunk_size]
+                chunk_crops = crops[position:position + chunk_size]
                 try:
-                    logger.info("Applying AI correction with Qwen (fallback mode)...")
-                    corrector = get_corrector()
-                    primary_lang = "thai" if "th" in lang_list else "english"
-                    correction_result = corrector.correct(combined_text, language=primary_lang)
-
-                    if correction_result["success"]:
-                        combined_text = correction_result["corrected_text"]
-                        ai_corrected_fallback = True
+                    region_detections, chunk_path = await _run_inference_when_available(
+                        _timed_stage,
+                        timings,
+                        "recognize",
+                        _recognize_regions,
+                        prepared["ocr_reader"],
+                        chunk_crops,
+                        mode=selected_recognition_mode,
+                        blocklist=prepared["blocklist"],
+                        box_seconds=timings.box_seconds,
+                    )
                 except Exception as e:
-                    logger.error(f"AI correction error (fallback): {str(e)}")
-                finally:
-                    if RELEASE_AFTER_USE:
-                        release_corrector()
+                    logger.error(f"Stream OCR recognition failed: {str(e)}")
+                    yield _ndjson({"type": "error", "success": False, "error": str(e)})
+                    return
+                if chunk_path == RECOGNITION_PATH_READTEXT:
+                    recognition_path = RECOGNITION_PATH_READTEXT
+                new_details = _region_details(chunk_regions, region_detections)
+                if new_details:
+                    yield emit(new_details)
+                position += len(chunk_crops)
+                chunk_size = RECOGNITION_BATCH_SIZE
+
+            combined_text = " ".join(detail["text"] for detail in details)
+            ai_corrected = False
+            if ai_correct_enabled:
+                combined_text, ai_corrected = await _run_inference_when_available(
+                    _apply_ai_correction, combined_text, lang_list, " (stream mode)", timings
+                )
 
-            return JSONResponse({
+            done_record = {
+                "type": "done",
                 "success": True,
                 "text": combined_text,
-                "total_regions": len(detailed_results),
-                "recognized_regions": len(detailed_results),
-                "details": detailed_results,
-                "mode": "fallback_easyocr_only",
-                "ai_corrected": ai_corrected_fallback,
-                "craft_settings": craft_settings
-            })
-        
-        boxes = prediction_result["boxes"]
+                "total_regions": total_regions,
+                "recognized_regions": len(details),
+                "recognition_path": recognition_path,
+                "ai_corrected": ai_corrected,
+                "craft_settings": prepared["craft_settings"],
+                "elapsed_seconds": round(time.perf_counter() - started, 3),
+            }
+            if fallback_details is not None:
+                done_record["mode"] = "fallback_easyocr_only"
+            timings["total"] = time.perf_counter() - started
+            _record_page_metrics("/ocr/stream", done_record, timings, metric_labels)
+            done_record["timings"] = timings.report()
+            yield _ndjson(done_record)
 
-        logger.info(f"CRAFT detected {len(boxes)} text regions")
+        return StreamingResponse(
+            generate(),
+            media_type="application/x-ndjson; charset=utf-8",
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+                # Only the stages before the first byte; the done record carries the full breakdown
+                'Server-Timing': timings.server_timing(),
+            }
+        )
 
-        # Step 2: Use EasyOCR to recognize text in each box
-        all_text = []
-        detailed_results = []
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Stream OCR processing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
-        for idx, box in enumerate(boxes):
-            try:
-                # Convert box to list if it's not already
-                if isinstance(box, np.ndarray):
-                    box = box.tolist()
-                
-                # Ensure box is a list of coordinate pairs
-                if not isinstance(box, list):
-                    logger.warning(f"Box {idx} has unexpected type: {type(box)}")
-                    continue
-                
-                # Flatten and extract coordinates more safely
-                coords = []
-                for point in box:
-                    if isinstance(point, (list, tuple, np.ndarray)):
-                        if len(point) >= 2:
-                            coords.append([float(point[0]), float(point[1])])
-                    else:
-                        logger.warning(f"Box {idx} point has unexpected format: {point}")
-                        continue
-                
-                if len(coords) < 3:
-                    logger.warning(f"Box {idx} has insufficient points: {len(coords)}")
-                    continue
-                
-                # Extract x and y coordinates
-                x_coords = [c[0] for c in coords]
-                y_coords = [c[1] for c in coords]
 
-                x1, y1 = int(min(x_coords)), int(min(y_coords))
-                x2, y2 = int(max(x_coords)), int(max(y_coords))
+@app.post("/ocr/pdf")
+async def process_ocr_pdf(
+    file: UploadFile = File(...),
+    languages: Optional[str] = Form(None),
+    ai_correct: Optional[str] = Form("false"),
+    craft_long_size: Optional[str] = Form(None),
+    craft_use_refiner: Optional[str] = Form(None),
+    recognition_mode: Optional[str] = Form(None),
+    layout: Optional[str] = Form(None),
+    pages: Optional[str] = Form(None),
+):
+    """
+    OCR a multi-page PDF, rasterized server-side, streaming one NDJSON record per page
 
-                # Add padding
-                padding = 5
-                x1 = max(0, x1 - padding)
-                y1 = max(0, y1 - padding)
-                x2 = min(img.shape[1], x2 + padding)
-                y2 = min(img.shape[0], y2 + padding)
+    Args:
+        file: PDF document
+        languages: JSON string of language codes (e.g., '["th", "en"]')
+        ai_correct: Enable AI correction with Qwen model per page ("true" or "false")
+        pages: 1-based page selection, e.g. "1-3,5,10-" (default: all pages)
 
-                # Crop the region
-                cropped = img[y1:y2, x1:x2]
+    Returns:
+        NDJSON stream: a "start" record, one "page" record per page (same fields
+        as /ocr plus page/dpi), then a "done" summary record
+    """
+    try:
+        if not PDFIUM_AVAILABLE:
+            raise HTTPException(
+                status_code=501,
+                detail="PDF support requires pypdfium2 (pip install pypdfium2)"
+            )
 
-                if cropped.size == 0:
-                    continue
+        filename = file.filename or ""
+        if file.content_type != "application/pdf" and not filename.lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail="File must be a PDF")
 
-                # Run OCR on cropped region
-                result = ocr_reader.readtext(cropped, detail=1)
-
-                for detection in result:
-                    bbox, text, confidence = detection
-                    if text.strip():  # Only include non-empty text
-                        all_text.append(text)
-                        detailed_results.append({
-                            "text": text,
-                            "confidence": float(confidence),
-                            "box": {
-                                "x1": x1,
-                                "y1": y1,
-                                "x2": x2,
-                                "y2": y2
-                            }
-                        })
-                        logger.info(f"Box {idx}: '{text}' (confidence: {confidence:.2f})")
+        lang_list = _parse_languages(languages, label=" (pdf mode)")
+        requested_long_size, requested_refiner = _parse_craft_request_settings(
+            craft_long_size, craft_use_refiner
+        )
+        selected_recognition_mode = _parse_recognition_mode(recognition_mode)
+        selected_layout_mode = _parse_layout_mode(layout)
+        ai_correct_enabled = bool(ai_correct and ai_correct.lower() == "true")
 
-            except Exception as e:
-                logger.error(f"Error processing box {idx}: {str(e)}")
-                continue
+        # Spool to an anonymous temp file; PDFium reads pages from it on demand
+        pdf_file = tempfile.TemporaryFile()
+        try:
+            await save_upload(file, pdf_file, OCR_MAX_UPLOAD_BYTES)
+            pdf_file.seek(0)
+            document, page_count = await run_in_threadpool(open_pdf, pdf_file)
+        except UploadTooLarge as e:
+            pdf_file.close()
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            pdf_file.close()
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
 
-        # Combine all text
-        combined_text = " ".join(all_text)
+        try:
+            page_indices = parse_page_selection(pages, page_count)
+            if len(page_indices) > PDF_MAX_PAGES:
+                raise PDFPageSelectionError(
+                    f"Too many pages selected ({len(page_indices)}), limit is {PDF_MAX_PAGES}"
+                )
+        except PDFPageSelectionError as e:
+            close_pdf(document)
+            raise HTTPException(status_code=400, detail=str(e))
 
-        logger.info(f"OCR completed. Total text blocks: {len(detailed_results)}")
+        logger.info(
+            f"Processing PDF: {filename} ({len(page_indices)}/{page_count} pages, "
+            f"long_size={requested_long_size})"
+        )
+        metric_labels = _metric_labels(lang_list, requested_long_size, requested_refiner)
 
-        # Apply AI correction if requested
-        ai_corrected = False
-        if ai_correct and ai_correct.lower() == "true":
+        async def generate():
+            stop_event = threading.Event()
+            page_queue, _ = start_page_renderer(
+                document, page_indices, _raster_long_size(requested_long_size), stop_event
+            )
+            started = time.perf_counter()
+            processed = 0
+            failed = 0
             try:
-                logger.info("Applying AI correction with Qwen...")
-                corrector = get_corrector()
-
-                # Determine primary language
-                primary_lang = "thai" if "th" in lang_list else "english"
-
-                # Correct the combined text
-                correction_result = corrector.correct(
-                    combined_text,
-                    language=primary_lang
-                )
+                yield _ndjson({
+                    "type": "start",
+                    "filename": filename,
+                    "page_count": page_count,
+                    "pages": [index + 1 for index in page_indices],
+                    "craft_settings": {
+                        "long_size": requested_long_size,
+                        "refiner": requested_refiner
+                    },
+                })
 
-                if correction_result["success"]:
-                    combined_text = correction_result["corrected_text"]
-                    ai_corrected = True
-                    logger.info("AI correction completed successfully")
-                else:
-                    logger.warning(f"AI correction failed: {correction_result.get('error', 'Unknown error')}")
+                while True:
+                    item = await run_in_threadpool(page_queue.get)
+                    if is_done(item):
+                        break
+
+                    page_index, page_img, info = item
+                    record = {"type": "page", "page": page_index + 1}
+                    if page_img is None:
+                        failed += 1
+                        record.update({"success": False, "error": f"Failed to render page: {info}"})
+                        yield _ndjson(record)
+                        continue
 
-            except Exception as e:
-                logger.error(f"AI correction error: {str(e)}")
-                # Continue with uncorrected text
+                    try:
+                        timings = StageTimings()
+                        result = await _run_inference_when_available(
+                            _ocr_image_cached,
+                            page_img,
+                            lang_list,
+                            requested_long_size,
+                            requested_refiner,
+                            ai_correct_enabled,
+                            selected_recognition_mode,
+                            layout_mode=selected_layout_mode,
+                            timings=timings,
+                        )
+                        _record_page_metrics("/ocr/pdf", result, timings, metric_labels)
+                        record.update(result)
+                        record["timings"] = timings.report()
+                        record["dpi"] = round(info, 1)
+                        record["image_size"] = {"width": page_img.shape[1], "height": page_img.shape[0]}
+                        processed += 1
+                    except Exception as e:
+                        logger.error(f"OCR failed on PDF page {page_index + 1}: {str(e)}")
+                        record.update({"success": False, "error": str(e)})
+                        failed += 1
+                    yield _ndjson(record)
+
+                yield _ndjson({
+                    "type": "done",
+                    "pages_processed": processed,
+                    "pages_failed": failed,
+                    "elapsed_seconds": round(time.perf_counter() - started, 3),
+                })
             finally:
-                if RELEASE_AFTER_USE:
-                    release_corrector()
+                # Stops rasterization if the client went away mid-document
+                stop_event.set()
 
-        return JSONResponse({
-            "success": True,
-            "text": combined_text,
-            "total_regions": len(boxes),
-            "recognized_regions": len(detailed_results),
-            "details": detailed_results,
-            "ai_corrected": ai_corrected,
-            "craft_settings": craft_settings
-        })
+        return StreamingResponse(
+            generate(),
+            media_type="application/x-ndjson; charset=utf-8",
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            }
+        )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"OCR processing error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
+        logger.error(f"PDF OCR processing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"PDF OCR processing failed: {str(e)}")
+
+
+def _run_simple_ocr(contents, lang_list, timings=None):
+    """Blocking EasyOCR-only pipeline for one image; runs on the inference executor."""
+    timings = StageTimings() if timings is None else timings
+    # Get OCR reader for specified languages
+    ocr_reader = _get_ocr_reader_timed(lang_list, timings)
+
+    with timings.stage("decode"):
+        img = _decode_image(contents)
+
+    # Run EasyOCR directly
+    logger.info("Running EasyOCR...")
+    with timings.stage("readtext"):
+        results = ocr_reader.readtext(
+            img, detail=1, **_readtext_kwargs(_request_blocklist(ocr_reader, lang_list))
+        )
+
+    all_text = []
+    detailed_results = []
+
+    for detection in results:
+        bbox, text, confidence = detection
+        if text.strip():
+            all_text.append(text)
+            detailed_results.append({
+                "text": text,
+                "confidence": float(confidence),
+                "box": bbox
+            })
+
+    combined_text = " ".join(all_text)
+
+    logger.info(f"OCR completed. Total text blocks: {len(detailed_results)}")
+
+    return {
+        "success": True,
+        "text": combined_text,
+        "total_regions": len(detailed_results),
+        "details": detailed_results
+    }
 
 
 @app.post("/ocr-simple")
@@ -529,61 +1603,25 @@ async def process_ocr_simple(
     """
     try:
         # Parse languages
-        lang_list = ['th', 'en']  # default
-        if languages:
-            try:
-                lang_list = json.loads(languages)
-                if not isinstance(lang_list, list) or len(lang_list) == 0:
-                    lang_list = ['th', 'en']
-            except json.JSONDecodeError:
-                logger.warning(f"Invalid languages format: {languages}, using default")
-                lang_list = ['th', 'en']
-
-        logger.info(f"Using languages (simple mode): {lang_list}")
-
-        # Get OCR reader for specified languages
-        ocr_reader = get_ocr_reader(lang_list)
+        lang_list = _parse_languages(languages, label=" (simple mode)")
 
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
 
         logger.info(f"Processing file (simple mode): {file.filename}")
 
+        started = time.perf_counter()
+        timings = StageTimings()
         # Read image
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if img is None:
-            raise HTTPException(status_code=400, detail="Invalid image file")
-
-        # Run EasyOCR directly
-        logger.info("Running EasyOCR...")
-        results = ocr_reader.readtext(img, detail=1)
-
-        all_text = []
-        detailed_results = []
-
-        for detection in results:
-            bbox, text, confidence = detection
-            if text.strip():
-                all_text.append(text)
-                detailed_results.append({
-                    "text": text,
-                    "confidence": float(confidence),
-                    "box": bbox
-                })
-
-        combined_text = " ".join(all_text)
-
-        logger.info(f"OCR completed. Total text blocks: {len(detailed_results)}")
+        with timings.stage("upload"):
+            contents = await _read_image_upload(file)
 
-        return JSONResponse({
-            "success": True,
-            "text": combined_text,
-            "total_regions": len(detailed_results),
-            "details": detailed_results
-        })
+        payload = await _run_inference(_run_simple_ocr, contents, lang_list, timings)
+        timings["total"] = time.perf_counter() - started
+        metrics.observe_stages(
+            "/ocr-simple", timings, **_metric_labels(lang_list, "none", False)
+        )
+        return _timed_response(payload, timings)
 
     except HTTPException:
         raise
@@ -598,6 +1636,8 @@ async def process_ocr_simple(
 
 ALLOWED_AUDIO_EXTENSIONS = {'mp3', 'wav', 'm4a', 'flac', 'mp4', 'avi', 'mov', 'mkv'}
 TRANSCRIBE_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcribe_worker.py")
+# Status line transcribe_worker.py emits after a stream that fell back from CUDA to CPU
+TRANSCRIBE_CUDA_FALLBACK_PREFIX = "CUDA_FALLBACK: "
 
 
 def _build_worker_cmd(mode, file_path, model_size, language, initial_prompt=None, chunk_duration=0):
@@ -620,10 +1660,12 @@ def _build_worker_cmd(mode, file_path, model_size, language, initial_prompt=None
     return cmd
 
 
-def _run_worker_json(file_path, model_size, language, initial_prompt=None):
+def _run_worker_json(file_path, model_size, language, initial_prompt=None, timings=None):
     cmd = _build_worker_cmd("json", file_path, model_size, language, initial_prompt=initial_prompt)
     logger.info(f"Launching transcription worker: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    timings = StageTimings() if timings is None else timings
+    with timings.stage("worker"):
+        result = subprocess.run(cmd, capture_output=True, text=True)
     if result.returncode != 0:
         detail = result.stderr.strip() or result.stdout.strip() or "transcription worker failed"
         raise RuntimeError(detail)
@@ -637,6 +1679,9 @@ def _run_worker_json(file_path, model_size, language, initial_prompt=None):
     if not payload.get("success"):
         raise RuntimeError(payload.get("error") or "transcription worker returned failure")
 
+    if payload.pop("cuda_fallback", None):
+        metrics.TRANSCRIBE_CUDA_FALLBACKS.inc()
+    timings.merge({"stages": payload.pop("timings", None) or {}})
     return payload
 
 
@@ -662,6 +1707,9 @@ def _stream_worker_output(file_path, model_size, language, chunk_duration=0, ini
         try:
             assert proc.stdout is not None
             for line in iter(proc.stdout.readline, ""):
+                if line.startswith(TRANSCRIBE_CUDA_FALLBACK_PREFIX):
+                    metrics.TRANSCRIBE_CUDA_FALLBACKS.inc()
+                    continue
                 yield line
 
             proc.wait()
@@ -716,21 +1764,25 @@ async def transcribe_audio_endpoint(
 
         logger.info(f"Transcribing file: {file.filename} (model: {model_size}, lang: {language})")
 
-        # Save uploaded file temporarily
+        started = time.perf_counter()
+        timings = StageTimings()
+        # Stream the upload to a temp file without buffering it in memory
         suffix = os.path.splitext(file.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            contents = await file.read()
-            temp_file.write(contents)
-            temp_file_path = temp_file.name
+        with timings.stage("upload"):
+            temp_file_path = await _save_upload_to_temp(file, suffix, TRANSCRIBE_MAX_UPLOAD_BYTES)
 
         try:
-            result = _run_worker_json(
+            # subprocess.run blocks; keep it off the event loop
+            result = await run_in_threadpool(
+                _run_worker_json,
                 temp_file_path,
                 model_size=model_size,
                 language=language,
                 initial_prompt=initial_prompt,
+                timings=timings,
             )
-            return JSONResponse(result)
+            timings["total"] = time.perf_counter() - started
+            return _timed_response(result, timings)
         except RuntimeError as worker_error:
             logger.error(f"Transcription worker error: {worker_error}")
             raise HTTPException(status_code=500, detail=f"Transcription failed: {worker_error}")
@@ -782,12 +1834,9 @@ async def transcribe_stream_endpoint(
 
         logger.info(f"Streaming transcription: {file.filename} (model: {model_size}, lang: {language})")
 
-        # Save uploaded file temporarily
+        # Stream the upload to a temp file without buffering it in memory
         suffix = os.path.splitext(file.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            contents = await file.read()
-            temp_file.write(contents)
-            temp_file_path = temp_file.name
+        temp_file_path = await _save_upload_to_temp(file, suffix, TRANSCRIBE_MAX_UPLOAD_BYTES)
 
         def generate():
             try:
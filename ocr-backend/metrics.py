@@ -0,0 +1,241 @@
+"""Minimal in-process Prometheus metrics (text exposition format 0.0.4)."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-10 ms cache hits up to multi-minute PDF pages
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BOX_BUCKETS = (0, 5, 10, 25, 50, 100, 200, 400, 800, 1600, 3200)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative) + overflow, sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = self._header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose samples are read from ``collect()`` at scrape time, so updates cost nothing."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), collect: Optional[Callable] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        if self.collect is None:
+            return lines
+        samples: Iterable[Tuple[Dict[str, str], float]] = self.collect() or ()
+        for labels, value in samples:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, self._key(labels))} {_format_value(value or 0)}"
+            )
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "ocr_http_request_duration_seconds",
+    "Time until response headers, per endpoint (streams: time to first byte).",
+    ("endpoint", "method", "status"),
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "ocr_stage_duration_seconds",
+    "Time spent in each OCR pipeline stage.",
+    ("endpoint", "stage", "long_size", "refiner", "languages", "device"),
+))
+BOXES_PER_PAGE = REGISTRY.register(Histogram(
+    "ocr_boxes_per_page",
+    "CRAFT text boxes found per image or PDF page.",
+    ("endpoint",),
+    buckets=BOX_BUCKETS,
+))
+PAGES = REGISTRY.register(Counter(
+    "ocr_pages_total", "Images and PDF pages OCRed, by result cache outcome.", ("endpoint", "cache"),
+))
+CRAFT_FALLBACKS = REGISTRY.register(Counter(
+    "ocr_craft_fallbacks_total", "Pages where CRAFT failed and EasyOCR readtext was used instead.", ("endpoint",),
+))
+RESULT_CACHE = REGISTRY.register(Counter(
+    "ocr_result_cache_requests_total", "OCR result cache lookups.", ("result",),
+))
+TRANSCRIBE_CUDA_FALLBACKS = REGISTRY.register(Counter(
+    "transcribe_cuda_fallbacks_total", "Transcriptions that fell back from CUDA to CPU.",
+))
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class StageTimings(dict):
+    """
+    Seconds per pipeline stage for one request; repeated stages accumulate.
+
+    ``box_seconds`` collects recognition time per text box (amortized over
+    its batch on the batched path) for the per-box percentiles in ``report``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.box_seconds: List[float] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        self[name] = self.get(name, 0.0) + seconds
+
+    def merge(self, other: Dict[str, Any]):
+        """Fold in timings shipped back from a worker process (see ``export``)."""
+        for name, seconds in other.get("stages", {}).items():
+            self.add(name, seconds)
+        self.box_seconds.extend(other.get("box_seconds", ()))
+
+    def export(self) -> Dict[str, Any]:
+        """Plain-dict form that survives pickling and JSON between processes."""
+        return {"stages": dict(self), "box_seconds": list(self.box_seconds)}
+
+    def report(self) -> Dict[str, float]:
+        """Milliseconds per stage, e.g. ``{"detect_ms": 41.2, "recognize_box_p95_ms": 3.1}``."""
+        report = {f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.items()}
+        if self.box_seconds:
+            report["recognize_boxes"] = len(self.box_seconds)
+            report["recognize_box_p50_ms"] = round(_percentile(self.box_seconds, 0.5) * 1000, 2)
+            report["recognize_box_p95_ms"] = round(_percentile(self.box_seconds, 0.95) * 1000, 2)
+        return report
+
+    def server_timing(self) -> str:
+        """The same breakdown as a Server-Timing header value (shown in browser devtools)."""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.items()]
+        if self.box_seconds:
+            entries.append(f"recognize_box_p50;dur={_percentile(self.box_seconds, 0.5) * 1000:.2f}")
+            entries.append(f"recognize_box_p95;dur={_percentile(self.box_seconds, 0.95) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def observe_stages(endpoint: str, timings: Dict[str, float], **labels):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=stage, **labels)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,313 @@
+"""
+Initialized-model snapshots in safetensors format, loaded through mmap.
+
+The first start builds CRAFT, RefineNet and the EasyOCR recognizers from
+their original checkpoints as usual. It then writes their final weights
+(prefixes stripped, no DataParallel wrapper) as one safetensors file each.
+Later starts map those files copy-on-write and point the parameters straight
+at the mapping. This skips unpickling and key fixups, and worker processes
+share one copy in the page cache.
+
+Each file name carries a fingerprint of the library versions, the source
+checkpoint (size and mtime) and the model settings. Changing any of them
+makes a new snapshot, and the older ones of the same model are deleted.
+"""
+import hashlib
+import importlib.util
+import json
+import logging
+import mmap
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Checked without importing: safetensors.torch pulls in torch
+SAFETENSORS_AVAILABLE = importlib.util.find_spec("safetensors") is not None
+
+OCR_MODEL_SNAPSHOTS = os.getenv("OCR_MODEL_SNAPSHOTS", "true").strip().lower() in ("1", "true", "yes", "on")
+OCR_SNAPSHOT_DIR = os.getenv(
+    "OCR_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pobimocr", "snapshots")
+)
+
+CRAFT_WEIGHTS_DIR = os.path.join(os.path.expanduser("~"), ".craft_text_detector", "weights")
+CRAFT_CHECKPOINT = os.path.join(CRAFT_WEIGHTS_DIR, "craft_mlt_25k.pth")
+REFINENET_CHECKPOINT = os.path.join(CRAFT_WEIGHTS_DIR, "craft_refiner_CTW1500.pth")
+
+# Bump to invalidate every snapshot after a change to how they are written
+SNAPSHOT_FORMAT = 1
+_VERSIONED_PACKAGES = ("torch", "torchvision", "craft-text-detector", "easyocr", "safetensors")
+_RECOGNIZER_PACKAGES = {"generation1": "easyocr.model.model", "generation2": "easyocr.model.vgg_model"}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "writes": 0, "errors": 0, "quantize_errors": 0}
+
+
+def snapshots_enabled() -> bool:
+    return OCR_MODEL_SNAPSHOTS and SAFETENSORS_AVAILABLE
+
+
+def _count(event: str):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def _library_versions() -> Dict[str, Optional[str]]:
+    from importlib import metadata
+
+    versions = {}
+    for package in _VERSIONED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def _checkpoint_stat(path: str) -> Optional[list]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def _fingerprint(name: str, checkpoint: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "model": name,
+        "versions": _library_versions(),
+        "checkpoint": os.path.basename(checkpoint),
+        "checkpoint_stat": _checkpoint_stat(checkpoint),
+        "settings": settings,
+    }
+
+
+def _digest(fingerprint: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def fingerprint_digest(name: str, checkpoint: str, settings: Dict[str, Any]) -> str:
+    """
+    Short hash of library versions, checkpoint stat and settings; other
+    derived model files (e.g. the ONNX exports) put it in their names too.
+    """
+    return _digest(_fingerprint(name, checkpoint, settings))
+
+
+def _snapshot_path(fingerprint: Dict[str, Any]) -> str:
+    return os.path.join(OCR_SNAPSHOT_DIR, f"{fingerprint['model']}-{_digest(fingerprint)}.safetensors")
+
+
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def _map_tensors(path: str) -> "OrderedDict[str, Any]":
+    """
+    Tensors of a safetensors file backed directly by a copy-on-write mmap.
+
+    Pages are only read on first touch and stay shared with every other
+    process mapping the same file until written to.
+    """
+    import torch
+
+    with open(path, "rb") as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size = int.from_bytes(mapping[:8], "little")
+    header = json.loads(mapping[8:8 + header_size])
+    header.pop("__metadata__", None)
+    data_start = 8 + header_size
+
+    tensors = OrderedDict()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for name, info in header.items():
+            dtype = getattr(torch, _DTYPES[info["dtype"]])
+            begin, end = info["data_offsets"]
+            if end == begin:
+                tensor = torch.empty(info["shape"], dtype=dtype)
+            else:
+                # frombuffer keeps a reference to the mapping for as long as the tensor lives
+                itemsize = torch.empty((), dtype=dtype).element_size()
+                tensor = torch.frombuffer(
+                    mapping, dtype=dtype, count=(end - begin) // itemsize, offset=data_start + begin
+                ).reshape(info["shape"])
+            tensors[name] = tensor
+    return tensors
+
+
+def _load_into(module, tensors):
+    try:
+        # assign=True keeps the parameters on the mapped pages instead of copying them
+        module.load_state_dict(tensors, assign=True)
+    except TypeError:
+        module.load_state_dict(tensors)
+
+
+def _write(path: str, module, fingerprint: Dict[str, Any]):
+    from safetensors.torch import save_file
+
+    state = {name: tensor.detach().cpu().contiguous() for name, tensor in module.state_dict().items()}
+    os.makedirs(OCR_SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        save_file(state, tmp_path, metadata={"fingerprint": json.dumps(fingerprint, sort_keys=True)})
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    _count("writes")
+    logger.info(f"Wrote model snapshot {path} ({os.path.getsize(path) / 1024 / 1024:.0f} MB)")
+
+    # Older fingerprints of the same model can never match again
+    prefix = f"{fingerprint['model']}-"
+    for entry in os.listdir(OCR_SNAPSHOT_DIR):
+        stale = os.path.join(OCR_SNAPSHOT_DIR, entry)
+        if entry.startswith(prefix) and entry.endswith(".safetensors") and stale != path:
+            try:
+                os.unlink(stale)
+                logger.info(f"Removed outdated model snapshot {stale}")
+            except OSError:
+                pass
+
+
+def _unwrap(module):
+    return getattr(module, "module", module)
+
+
+def _load_or_build(name: str, checkpoint: str, settings: Dict[str, Any], build_empty, build_original):
+    """
+    An initialized CPU module from its snapshot, or from ``build_original`` (then snapshotted).
+
+    ``build_empty()`` returns the bare architecture; ``build_original()`` the
+    module loaded the library's own way.
+    """
+    if not snapshots_enabled():
+        return _unwrap(build_original())
+
+    path = _snapshot_path(_fingerprint(name, checkpoint, settings))
+    if os.path.exists(path):
+        try:
+            module = build_empty()
+            _load_into(module, _map_tensors(path))
+            _count("hits")
+            logger.info(f"Loaded {name} from snapshot {path}")
+            return module
+        except Exception as e:
+            _count("errors")
+            logger.warning(f"Model snapshot {path} is unusable, rebuilding: {str(e)}")
+
+    module = _unwrap(build_original())
+    try:
+        # The checkpoint may only exist now (first download), so fingerprint again
+        fingerprint = _fingerprint(name, checkpoint, settings)
+        _write(_snapshot_path(fingerprint), module, fingerprint)
+    except Exception as e:
+        _count("errors")
+        logger.warning(f"Could not write model snapshot for {name}: {str(e)}")
+    return module
+
+
+def _to_device(module, cuda: bool):
+    """Place a CPU module the way craft_text_detector's loaders do."""
+    if cuda:
+        from craft_text_detector import torch_utils
+
+        module = torch_utils.DataParallel(module.cuda())
+        torch_utils.cudnn_benchmark = False
+    module.eval()
+    return module
+
+
+def load_craftnet(cuda: bool):
+    """craft_text_detector.load_craftnet_model, through a snapshot when enabled."""
+    from craft_text_detector import load_craftnet_model
+    from craft_text_detector.models.craftnet import CraftNet
+
+    module = _load_or_build(
+        "craft_mlt_25k", CRAFT_CHECKPOINT, {}, CraftNet, lambda: load_craftnet_model(cuda=False)
+    )
+    return _to_device(module, cuda)
+
+
+def load_refinenet(cuda: bool):
+    """craft_text_detector.load_refinenet_model, through a snapshot when enabled."""
+    from craft_text_detector import load_refinenet_model
+    from craft_text_detector.models.refinenet import RefineNet
+
+    module = _load_or_build(
+        "craft_refiner_CTW1500", REFINENET_CHECKPOINT, {}, RefineNet, lambda: load_refinenet_model(cuda=False)
+    )
+    return _to_device(module, cuda)
+
+
+def _snapshot_get_recognizer(original):
+    """Wrap easyocr's get_recognizer so recognizer weights come from snapshots."""
+
+    def get_recognizer(recog_network, network_params, character, separator_list, dict_list, model_path,
+                       device="cpu", quantize=True):
+        if recog_network not in _RECOGNIZER_PACKAGES or not snapshots_enabled():
+            return original(recog_network, network_params, character, separator_list, dict_list, model_path,
+                            device=device, quantize=quantize)
+
+        import torch
+        from easyocr.utils import CTCLabelConverter
+
+        converter = CTCLabelConverter(character, separator_list, dict_list)
+        model_pkg = importlib.import_module(_RECOGNIZER_PACKAGES[recog_network])
+        settings = {
+            "network": recog_network,
+            "params": network_params,
+            "characters": hashlib.sha256("".join(converter.character).encode()).hexdigest()[:16],
+        }
+        name = f"recognizer_{os.path.splitext(os.path.basename(model_path))[0]}"
+
+        def build_original():
+            # Always FP32 on CPU so the snapshot is device- and quantization-independent
+            model, _ = original(recog_network, network_params, character, separator_list, dict_list,
+                                model_path, device="cpu", quantize=False)
+            return model
+
+        model = _load_or_build(
+            name, model_path, settings,
+            lambda: model_pkg.Model(num_class=len(converter.character), **network_params),
+            build_original,
+        )
+        if device == "cpu":
+            if quantize:
+                try:
+                    torch.quantization.quantize_dynamic(model, dtype=torch.qint8, inplace=True)
+                except Exception as e:
+                    _count("quantize_errors")
+                    logger.warning(f"Could not quantize {name} loaded from snapshot, running FP32: {str(e)}")
+        else:
+            model = torch.nn.DataParallel(model).to(device)
+        return model, converter
+
+    get_recognizer._pobimocr_snapshots = True
+    return get_recognizer
+
+
+def install_recognizer_snapshots():
+    """Route easyocr.Reader's recognizer loading through snapshots (idempotent)."""
+    if not snapshots_enabled():
+        return
+    import easyocr.easyocr as easyocr_module
+
+    if not getattr(easyocr_module.get_recognizer, "_pobimocr_snapshots", False):
+        easyocr_module.get_recognizer = _snapshot_get_recognizer(easyocr_module.get_recognizer)
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {
+            "enabled": snapshots_enabled(),
+            "directory": OCR_SNAPSHOT_DIR,
+            **_stats,
+        }
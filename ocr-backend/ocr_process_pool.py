@@ -0,0 +1,399 @@
+"""Persistent OCR worker processes fed decoded images through shared memory."""
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 0 keeps OCR inside the API process (inference executor threads only)
+OCR_PROCESS_WORKERS = max(0, int(os.getenv("OCR_PROCESS_WORKERS", "0")))
+# torch/OpenMP/onnxruntime threads per worker; 0 splits the CPU cores evenly
+OCR_WORKER_THREADS = max(0, int(os.getenv("OCR_WORKER_THREADS", "0")))
+OCR_WORKER_START_TIMEOUT = float(os.getenv("OCR_WORKER_START_TIMEOUT", "600"))
+# A worker that dies before becoming ready this many times in a row is not restarted again
+OCR_WORKER_MAX_RESTARTS = max(0, int(os.getenv("OCR_WORKER_MAX_RESTARTS", "5")))
+# Delay before restarting such a worker: doubles per consecutive failure, capped at the max
+OCR_WORKER_RESTART_BACKOFF = float(os.getenv("OCR_WORKER_RESTART_BACKOFF", "1"))
+OCR_WORKER_RESTART_BACKOFF_MAX = float(os.getenv("OCR_WORKER_RESTART_BACKOFF_MAX", "60"))
+
+# Seconds between liveness checks of the worker processes
+_MONITOR_INTERVAL = 1.0
+
+# (shared memory name, shape, dtype) of an array parked in shared memory
+ArrayHandle = Tuple[str, Tuple[int, ...], str]
+
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+_env_lock = threading.Lock()
+
+
+def threads_per_worker(workers: int, configured: int = OCR_WORKER_THREADS) -> int:
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def share_array(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, ArrayHandle]:
+    """Copy ``array`` into a new shared memory block; the caller owns (and unlinks) it."""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_array(handle: ArrayHandle) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Map a shared array without copying; close the block once the view is dropped."""
+    name, shape, dtype = handle
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _release(block: shared_memory.SharedMemory, unlink: bool = False):
+    try:
+        block.close()
+    except BufferError:
+        # A view is still referenced somewhere; the mapping goes away with it
+        pass
+    if unlink:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def _child_thread_env(threads: int):
+    """
+    Native thread-pool sizes for a worker to inherit when it is spawned.
+
+    A spawned child imports numpy (and main, to unpickle its functions)
+    before any of its own code runs, and OpenBLAS/MKL/OpenMP size their
+    pools at import, so the variables must already be in its environment.
+    """
+    overrides = {name: str(threads) for name in _THREAD_ENV}
+    if "CRAFT_ONNX_THREADS" not in os.environ:
+        overrides["CRAFT_ONNX_THREADS"] = str(threads)
+    with _env_lock:
+        saved = {name: os.environ.get(name) for name in overrides}
+        os.environ.update(overrides)
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def _worker_loop(worker_id: int, threads: int, initializer, handler, jobs, results):
+    logging.basicConfig(level=logging.INFO)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except ImportError:
+        pass
+    try:
+        import cv2
+
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+    try:
+        if initializer is not None:
+            initializer()
+    except Exception as e:
+        results.put((worker_id, None, "error", f"worker initialization failed: {e}"))
+        return
+    results.put((worker_id, None, "ready", os.getpid()))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id, arrays, args, kwargs = job
+        blocks = []
+        try:
+            views = []
+            for handle in arrays:
+                block, view = attach_array(handle)
+                blocks.append(block)
+                views.append(view)
+            result = handler(*views, *args, **kwargs)
+            del views
+            results.put((worker_id, job_id, "ok", result))
+        except Exception as e:
+            logger.error(f"OCR worker {worker_id} job failed: {str(e)}")
+            results.put((worker_id, job_id, "error", str(e)))
+        finally:
+            for block in blocks:
+                _release(block)
+
+
+class _Worker:
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process = None
+        self.jobs = None
+        self.pid: Optional[int] = None
+        # "starting", "ready", "backoff" (waiting to restart) or "failed" (given up)
+        self.state = "starting"
+        self.ready = threading.Event()
+        # Set once the current process became ready or failed to start
+        self.settled = threading.Event()
+        self.pending: Dict[int, Tuple[Future, List[shared_memory.SharedMemory]]] = {}
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.start_failures = 0
+        self.restart_at = 0.0
+        self.last_error: Optional[str] = None
+
+
+class OCRProcessPool:
+    """
+    Fixed set of OCR worker processes, each with its own models and job queue.
+
+    ``initializer`` (given to start) runs once in every worker to load models;
+    ``handler`` runs per job as ``handler(*arrays, *args, **kwargs)``, where
+    ``arrays`` are the numpy arrays passed to submit, mapped from shared memory
+    without copying. Both must be importable module-level functions. Jobs go to the worker with
+    the fewest outstanding jobs; a worker that dies fails its jobs and is
+    restarted. A worker that keeps dying before it is ready (models missing,
+    out of memory) is restarted with exponential backoff and given up after
+    OCR_WORKER_MAX_RESTARTS consecutive failures; the pool is unhealthy once
+    every worker was given up.
+    """
+
+    def __init__(self, workers: int = OCR_PROCESS_WORKERS, threads: int = OCR_WORKER_THREADS):
+        self.workers = workers
+        self.threads = threads_per_worker(workers, threads)
+        self.initializer = None
+        self.handler = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = None
+        self._workers: List[_Worker] = []
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._collector = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(
+        self,
+        handler: Callable[..., Any],
+        initializer: Optional[Callable[[], None]] = None,
+        wait: bool = True,
+    ):
+        """Spawn the workers; with ``wait`` block until each has loaded its models or failed to."""
+        if not self.enabled or self._workers:
+            return
+        self.handler = handler
+        self.initializer = initializer
+        logger.info(f"Starting {self.workers} OCR worker processes ({self.threads} threads each)")
+        self._results = self._ctx.Queue()
+        self._workers = [_Worker(i) for i in range(self.workers)]
+        for worker in self._workers:
+            self._spawn(worker)
+        self._collector = threading.Thread(target=self._collect, name="ocr-pool-results", daemon=True)
+        self._collector.start()
+        if wait:
+            deadline = time.monotonic() + OCR_WORKER_START_TIMEOUT
+            for worker in self._workers:
+                if not worker.settled.wait(max(0.0, deadline - time.monotonic())):
+                    logger.warning(f"OCR worker {worker.worker_id} is not ready yet")
+                elif not worker.ready.is_set():
+                    logger.warning(f"OCR worker {worker.worker_id} failed to start: {worker.last_error}")
+
+    def _spawn(self, worker: _Worker):
+        worker.ready.clear()
+        worker.settled.clear()
+        worker.jobs = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_loop,
+            args=(worker.worker_id, self.threads, self.initializer, self.handler, worker.jobs, self._results),
+            name=f"ocr-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        with _child_thread_env(self.threads):
+            worker.process.start()
+        worker.state = "starting"
+
+    @property
+    def healthy(self) -> bool:
+        """False once every worker was given up after repeated start failures."""
+        return not self.enabled or any(worker.state != "failed" for worker in self._workers)
+
+    def submit(self, arrays: List[np.ndarray], *args, **kwargs) -> Future:
+        """Queue a job on the least busy worker; ``arrays`` travel through shared memory."""
+        if not self._workers:
+            raise RuntimeError("OCR process pool is not running")
+        future: Future = Future()
+        blocks, handles = [], []
+        try:
+            for array in arrays:
+                block, handle = share_array(array)
+                blocks.append(block)
+                handles.append(handle)
+            with self._lock:
+                # Dead workers waiting for a restart would never read their queue
+                available = [w for w in self._workers if w.state in ("starting", "ready")]
+                if not available:
+                    raise RuntimeError("no OCR worker process is available")
+                worker = min(available, key=lambda w: (w.state != "ready", len(w.pending), w.worker_id))
+                job_id = next(self._job_ids)
+                worker.pending[job_id] = (future, blocks)
+                worker.jobs.put((job_id, handles, args, kwargs))
+        except BaseException:
+            for block in blocks:
+                _release(block, unlink=True)
+            raise
+        return future
+
+    def run(self, arrays: List[np.ndarray], *args, **kwargs) -> Any:
+        """Blocking submit; meant for inference executor threads."""
+        return self.submit(arrays, *args, **kwargs).result()
+
+    def _finish(self, worker: _Worker, job_id: int, status: str, payload):
+        with self._lock:
+            entry = worker.pending.pop(job_id, None)
+            if status == "ok":
+                worker.completed += 1
+            else:
+                worker.failed += 1
+        if entry is None:
+            return
+        future, blocks = entry
+        for block in blocks:
+            _release(block, unlink=True)
+        if status == "ok":
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while not self._stopping.is_set():
+            if time.monotonic() - last_check >= _MONITOR_INTERVAL:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                worker_id, job_id, status, payload = self._results.get(timeout=_MONITOR_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            worker = self._workers[worker_id]
+            if job_id is None:
+                if status == "ready":
+                    worker.pid = payload
+                    worker.state = "ready"
+                    worker.start_failures = 0
+                    worker.ready.set()
+                    logger.info(f"OCR worker {worker_id} ready (pid {payload})")
+                else:
+                    worker.last_error = payload
+                    logger.error(f"OCR worker {worker_id}: {payload}")
+                worker.settled.set()
+                continue
+            self._finish(worker, job_id, status, payload)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in self._workers:
+            if self._stopping.is_set() or worker.state == "failed":
+                continue
+            if worker.state == "backoff":
+                if now >= worker.restart_at:
+                    worker.restarts += 1
+                    self._spawn(worker)
+                continue
+            if worker.process.is_alive():
+                continue
+
+            with self._lock:
+                # No new jobs from here on; the ones already queued are lost with the process
+                started = worker.state == "ready"
+                worker.state = "backoff"
+                job_ids = list(worker.pending)
+            for job_id in job_ids:
+                self._finish(worker, job_id, "error", "OCR worker process died")
+            worker.settled.set()
+
+            if started:
+                # Crashed while serving (e.g. one huge image): restart right away
+                worker.start_failures = 0
+                worker.restart_at = now
+                logger.error(
+                    f"OCR worker {worker.worker_id} exited (code {worker.process.exitcode}); restarting"
+                )
+                continue
+            worker.start_failures += 1
+            if worker.start_failures > OCR_WORKER_MAX_RESTARTS:
+                worker.state = "failed"
+                logger.error(
+                    f"OCR worker {worker.worker_id} failed to start {worker.start_failures} times in a row; "
+                    f"giving up (last error: {worker.last_error})"
+                )
+                continue
+            delay = min(
+                OCR_WORKER_RESTART_BACKOFF_MAX, OCR_WORKER_RESTART_BACKOFF * 2 ** (worker.start_failures - 1)
+            )
+            worker.restart_at = now + delay
+            logger.error(
+                f"OCR worker {worker.worker_id} exited before it was ready "
+                f"(code {worker.process.exitcode}); restarting in {delay:.0f}s"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "healthy": self.healthy,
+                "workers": self.workers,
+                "threads_per_worker": self.threads if self.enabled else None,
+                "per_worker": [
+                    {
+                        "worker": worker.worker_id,
+                        "pid": worker.pid,
+                        "ready": worker.ready.is_set(),
+                        "state": worker.state,
+                        "start_failures": worker.start_failures,
+                        "last_error": worker.last_error,
+                        "queue_depth": len(worker.pending),
+                        "completed": worker.completed,
+                        "failed": worker.failed,
+                        "restarts": worker.restarts,
+                    }
+                    for worker in self._workers
+                ],
+            }
+
+    def shutdown(self):
+        self._stopping.set()
+        for worker in self._workers:
+            try:
+                worker.jobs.put(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            for job_id in list(worker.pending):
+                self._finish(worker, job_id, "error", "OCR process pool shut down")
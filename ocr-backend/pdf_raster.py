@@ -0,0 +1,174 @@
+"""Server-side PDF rasterization for page-by-page OCR."""
+import logging
+import os
+import queue
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+    logger.warning("pypdfium2 not available - /ocr/pdf will be disabled")
+
+PDF_MIN_DPI = float(os.getenv("PDF_MIN_DPI", "96"))
+PDF_MAX_DPI = float(os.getenv("PDF_MAX_DPI", "400"))
+# How many rendered pages may wait for OCR before rasterization pauses
+PDF_PREFETCH_PAGES = max(1, int(os.getenv("PDF_PREFETCH_PAGES", "2")))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))
+
+# PDFium is not thread-safe; every call into it must hold this lock
+_pdfium_lock = threading.Lock()
+
+_DONE = object()
+
+
+class PDFPageSelectionError(ValueError):
+    """Raised when a page selection string cannot be parsed."""
+
+
+def parse_page_selection(spec: Optional[str], page_count: int) -> List[int]:
+    """
+    Parse a 1-based page selection like "1-3,5,10-" into sorted 0-based indices.
+
+    An empty selection means every page.
+    """
+    if not spec or not spec.strip():
+        return list(range(page_count))
+
+    selected = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start = int(start_text) if start_text.strip() else 1
+                end = int(end_text) if end_text.strip() else page_count
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise PDFPageSelectionError(f"Invalid page selection: {part!r}")
+
+        if start < 1 or end < start:
+            raise PDFPageSelectionError(f"Invalid page range: {part!r}")
+        selected.update(range(start - 1, min(end, page_count)))
+
+    if not selected:
+        raise PDFPageSelectionError(f"Page selection {spec!r} matches no pages (document has {page_count})")
+    return sorted(selected)
+
+
+def dpi_for_long_size(width_pt: float, height_pt: float, long_size: int) -> float:
+    """DPI at which the page's long side renders to ``long_size`` pixels (clamped)."""
+    long_side_inches = max(width_pt, height_pt) / 72.0
+    if long_side_inches <= 0:
+        return PDF_MIN_DPI
+    dpi = long_size / long_side_inches
+    return min(max(dpi, PDF_MIN_DPI), PDF_MAX_DPI)
+
+
+def open_pdf(source):
+    """
+    Open a PDF document and return (document, page_count).
+
+    ``source`` is either bytes or a seekable binary file; a file is read on
+    demand by PDFium and closed together with the document.
+    """
+    if not PDFIUM_AVAILABLE:
+        raise RuntimeError("pypdfium2 is not installed")
+    with _pdfium_lock:
+        if isinstance(source, (bytes, bytearray)):
+            document = pdfium.PdfDocument(bytes(source))
+        else:
+            document = pdfium.PdfDocument(source, autoclose=True)
+        return document, len(document)
+
+
+def close_pdf(document):
+    with _pdfium_lock:
+        document.close()
+
+
+def render_page(document, page_index: int, long_size: int) -> Tuple[np.ndarray, float]:
+    """Render one page to a BGR image sized for CRAFT; returns (image, dpi)."""
+    with _pdfium_lock:
+        page = document[page_index]
+        try:
+            width_pt, height_pt = page.get_size()
+            dpi = dpi_for_long_size(width_pt, height_pt, long_size)
+            bitmap = page.render(scale=dpi / 72.0)
+            try:
+                # Copy out of the PDFium-owned buffer before the bitmap is freed
+                img = np.array(bitmap.to_numpy(), copy=True)
+            finally:
+                bitmap.close()
+        finally:
+            page.close()
+
+    import cv2
+
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    elif img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img, dpi
+
+
+def start_page_renderer(
+    document,
+    page_indices: List[int],
+    long_size: int,
+    stop_event: threading.Event,
+    prefetch: int = PDF_PREFETCH_PAGES,
+) -> Tuple[queue.Queue, threading.Thread]:
+    """
+    Start a background thread that renders pages into a bounded queue.
+
+    The consumer pulls (page_index, image, dpi) tuples (or (page_index, None,
+    error_message) on failure) until ``is_done(item)``, so rasterization of the
+    next pages overlaps with OCR of the current one. Setting ``stop_event``
+    makes the producer exit early. The producer owns ``document`` and closes
+    it when it exits.
+    """
+    pages: queue.Queue = queue.Queue(maxsize=prefetch)
+
+    def _put(item) -> bool:
+        while not stop_event.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for page_index in page_indices:
+                if stop_event.is_set():
+                    return
+                try:
+                    img, dpi = render_page(document, page_index, long_size)
+                    item = (page_index, img, dpi)
+                except Exception as e:
+                    logger.error(f"Failed to render PDF page {page_index + 1}: {str(e)}")
+                    item = (page_index, None, str(e))
+                if not _put(item):
+                    return
+        finally:
+            _put(_DONE)
+            close_pdf(document)
+
+    thread = threading.Thread(target=producer, name="pdf-raster", daemon=True)
+    thread.start()
+    return pages, thread
+
+
+def is_done(item) -> bool:
+    return item is _DONE
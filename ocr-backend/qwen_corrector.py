@@ -4,6 +4,7 @@ import gc
 import logging
 import os
 import platform
+import threading
 from typing import Optional, List, Dict
 
 import torch
@@ -354,32 +355,45 @@ Correct characters and spacing without adding explanations or new facts.
 
 # Global corrector instance (initialized on demand)
 _corrector_instance: Optional[QwenOCRCorrector] = None
+_corrector_lock = threading.RLock()
 
 
 def get_corrector() -> QwenOCRCorrector:
     """Get or create global corrector instance"""
     global _corrector_instance
 
-    if _corrector_instance is None:
-        logger.info("Initializing Qwen corrector...")
-        _corrector_instance = QwenOCRCorrector(
-            model_name=os.getenv("QWEN_MODEL_NAME", DEFAULT_QWEN_MODEL),
-            quantize=True
-        )
+    with _corrector_lock:
+        if _corrector_instance is None:
+            logger.info("Initializing Qwen corrector...")
+            _corrector_instance = QwenOCRCorrector(
+                model_name=os.getenv("QWEN_MODEL_NAME", DEFAULT_QWEN_MODEL),
+                quantize=True
+            )
+
+        return _corrector_instance
 
-    return _corrector_instance
+
+def corrector_loaded() -> bool:
+    """Whether the next get_corrector() call returns without loading the model."""
+    return _corrector_instance is not None
 
 
 def release_corrector():
     """Release global corrector to free VRAM."""
     global _corrector_instance
 
-    if _corrector_instance is None:
-        return
+    with _corrector_lock:
+        if _corrector_instance is None:
+            return
+
+        try:
+            _corrector_instance.unload()
+        except Exception as exc:
+            logger.warning(f"Failed to unload Qwen corrector: {exc}")
+        finally:
+            _corrector_instance = None
+
 
-    try:
-        _corrector_instance.unload()
-    except Exception as exc:
-        logger.warning(f"Failed to unload Qwen corrector: {exc}")
-    finally:
-        _corrector_instance = None
+def corrector_lock() -> threading.RLock:
+    """Lock to hold around get_corrector() + correct() + release_corrector() sequences."""
+    return _corrector_lock
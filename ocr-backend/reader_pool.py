@@ -0,0 +1,310 @@
+"""LRU pool of EasyOCR readers with a memory budget and superset reuse."""
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OCR_READER_MAX_LOADED = max(1, int(os.getenv("OCR_READER_MAX_LOADED", "4")))
+# Budget for recognizer parameter bytes (not process RSS/VRAM, which also holds
+# activations, allocator caches and the shared detector); OCR_READER_MEMORY_MB is the old name
+OCR_READER_WEIGHTS_MB = float(os.getenv("OCR_READER_WEIGHTS_MB", os.getenv("OCR_READER_MEMORY_MB", "2048")))
+OCR_READER_REUSE_SUPERSET = os.getenv("OCR_READER_REUSE_SUPERSET", "true").strip().lower() in ("1", "true", "yes", "on")
+# EasyOCR's own dynamic INT8 quantization of the recognizer (CPU only); false keeps FP32
+OCR_RECOGNIZER_QUANTIZE = os.getenv("OCR_RECOGNIZER_QUANTIZE", "true").strip().lower() in ("1", "true", "yes", "on")
+OCR_READER_EVENT_LOG_SIZE = 100
+
+
+def language_key(languages: Iterable[str]) -> str:
+    return ",".join(sorted(set(languages)))
+
+
+def _module_bytes(module) -> int:
+    if module is None:
+        return 0
+    if hasattr(module, "memory_bytes"):
+        # Injected onnxruntime CRAFT (craft_onnx.OnnxModule)
+        return module.memory_bytes()
+    # EasyOCR wraps models in DataParallel on GPU; parameters() sees through it
+    return sum(p.numel() * p.element_size() for p in module.parameters())
+
+
+def _same_device(a: str, b: str) -> bool:
+    return str(a).split(":")[0] == str(b).split(":")[0]
+
+
+class _PoolEntry:
+    __slots__ = ("reader", "languages", "bytes", "load_seconds", "uses", "detector_source")
+
+    def __init__(self, reader, languages, load_seconds, detector_source):
+        self.reader = reader
+        self.languages = frozenset(languages)
+        # The detector is shared across readers and accounted separately
+        self.bytes = _module_bytes(getattr(reader, "recognizer", None))
+        self.load_seconds = load_seconds
+        self.uses = 0
+        self.detector_source = detector_source
+
+
+class ReaderPool:
+    """
+    Cache of easyocr.Reader instances keyed by sorted language list.
+
+    A request is served by an exact match if loaded, otherwise by any loaded
+    reader whose languages are a superset (e.g. a th,en reader for ``["en"]``),
+    otherwise a new reader is loaded. Loaded readers are evicted least recently
+    used first once there are more than ``max_loaded`` of them or their
+    recognizer parameters exceed ``weights_mb``. Load/evict/reuse events are
+    kept for monitoring.
+
+    Readers are built outside the pool lock, so lookups of loaded readers and
+    stats() never wait for a load; concurrent requests for the same languages
+    wait on one shared load instead of starting their own.
+
+    Readers are built recognition-only (``detector=False``) and then given one
+    shared CRAFT network for readtext(): the network returned by
+    ``detector_provider`` when it lives on the reader's device, otherwise a
+    single EasyOCR CRAFT loaded once per device and shared by every reader.
+    """
+
+    def __init__(
+        self,
+        max_loaded: int = OCR_READER_MAX_LOADED,
+        weights_mb: float = OCR_READER_WEIGHTS_MB,
+        reuse_superset: bool = OCR_READER_REUSE_SUPERSET,
+        detector_provider: Optional[Callable[[], Optional[Tuple[Any, str]]]] = None,
+        quantize: bool = OCR_RECOGNIZER_QUANTIZE,
+    ):
+        self.max_loaded = max_loaded
+        self.weights_budget_bytes = int(weights_mb * 1024 * 1024)
+        self.reuse_superset = reuse_superset
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Language key -> Future of the _PoolEntry being built for it
+        self._loading: Dict[str, Future] = {}
+        self._detector_lock = threading.Lock()
+        self._events = deque(maxlen=OCR_READER_EVENT_LOG_SIZE)
+        self.loads = 0
+        self.evictions = 0
+        self.superset_hits = 0
+        self.detector_provider = detector_provider
+        self.quantize = quantize
+        self._device_detectors: Dict[str, Any] = {}
+
+    def _record(self, event: str, key: str, **extra):
+        self._events.append({"event": event, "languages": key, "time": time.time(), **extra})
+
+    def _find_superset(self, requested: frozenset) -> Optional[str]:
+        # Prefer the smallest compatible reader (closest vocabulary to the request)
+        candidates = [
+            (len(entry.languages), key)
+            for key, entry in self._entries.items()
+            if requested < entry.languages
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def get(self, languages: List[str], gpu: bool):
+        requested = frozenset(languages)
+        key = language_key(languages)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.reuse_superset:
+                superset_key = self._find_superset(requested)
+                if superset_key is not None:
+                    key = superset_key
+                    entry = self._entries[key]
+                    self.superset_hits += 1
+                    self._record("reuse", key, requested=language_key(languages))
+                    logger.info(f"Serving languages {sorted(requested)} with loaded reader [{key}]")
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.uses += 1
+                return entry.reader
+
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = Future()
+
+        if not owner:
+            entry = loading.result()
+            with self._lock:
+                entry.uses += 1
+            return entry.reader
+
+        try:
+            entry = self._build(key, languages, gpu)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = entry
+            del self._loading[key]
+            self.loads += 1
+            self._record(
+                "load", key, bytes=entry.bytes, seconds=round(entry.load_seconds, 3), detector=entry.detector_source
+            )
+            self._enforce_limits(keep=key)
+            entry.uses += 1
+        loading.set_result(entry)
+        return entry.reader
+
+    def _build(self, key: str, languages: List[str], gpu: bool) -> _PoolEntry:
+        """Load one reader; runs without the pool lock held."""
+        import easyocr
+
+        from model_snapshots import install_recognizer_snapshots
+
+        install_recognizer_snapshots()
+        logger.info(f"Creating new EasyOCR reader for languages: {languages}")
+        started = time.perf_counter()
+        reader = easyocr.Reader(languages, gpu=gpu, detector=False, quantize=self.quantize)
+        detector_source = self._attach_detector(reader)
+        entry = _PoolEntry(reader, languages, time.perf_counter() - started, detector_source)
+        logger.info(
+            f"EasyOCR reader for {languages} created successfully "
+            f"({entry.bytes / 1024 / 1024:.0f} MB recognizer, detector={detector_source}, "
+            f"{entry.load_seconds:.1f}s)"
+        )
+        return entry
+
+    def _attach_detector(self, reader) -> str:
+        """Give a recognition-only reader a shared CRAFT network so readtext() works."""
+        from easyocr.detection import get_textbox
+
+        network = None
+        source = None
+        if self.detector_provider is not None:
+            try:
+                shared = self.detector_provider()
+            except Exception as e:
+                logger.warning(f"Shared CRAFT network unavailable for EasyOCR: {str(e)}")
+                shared = None
+            if shared is not None:
+                shared_network, shared_device = shared
+                if _same_device(shared_device, reader.device):
+                    network, source = shared_network, "craft_shared"
+
+        if network is None:
+            # e.g. MPS readers while CRAFT runs on CPU: one EasyOCR detector per device
+            device = str(reader.device)
+            with self._detector_lock:
+                network = self._device_detectors.get(device)
+                if network is None:
+                    logger.info(f"Loading one EasyOCR CRAFT detector for device {device}")
+                    network = reader.initDetector(reader.getDetectorPath("craft"))
+                    self._device_detectors[device] = network
+            source = f"easyocr_shared_{device}"
+
+        reader.detect_network = "craft"
+        reader.get_textbox = get_textbox
+        reader.detector = network
+        return source
+
+    def _loaded_bytes(self) -> int:
+        return sum(entry.bytes for entry in self._entries.values())
+
+    def _enforce_limits(self, keep: str):
+        evicted = False
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_loaded or self._loaded_bytes() > self.weights_budget_bytes
+        ):
+            victim = next((key for key in self._entries if key != keep), None)
+            if victim is None:
+                break
+            entry = self._entries.pop(victim)
+            self.evictions += 1
+            evicted = True
+            self._record("evict", victim, bytes=entry.bytes, uses=entry.uses)
+            logger.info(f"Evicted EasyOCR reader [{victim}] ({entry.bytes / 1024 / 1024:.0f} MB)")
+
+        if evicted:
+            self._free_memory()
+
+    def _free_memory(self):
+        gc.collect()
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+    def languages_of(self, reader) -> Optional[List[str]]:
+        """Languages a pooled reader was loaded with (EasyOCR doesn't keep them)."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.reader is reader:
+                    return sorted(entry.languages)
+        return None
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def readers(self) -> List[Any]:
+        with self._lock:
+            return [entry.reader for entry in self._entries.values()]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        """Drop every reader (e.g. to free VRAM for Whisper)."""
+        with self._lock:
+            for key, entry in self._entries.items():
+                self._record("evict", key, bytes=entry.bytes, uses=entry.uses, reason="clear")
+            self._entries.clear()
+            with self._detector_lock:
+                self._device_detectors.clear()
+            self._free_memory()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": [
+                    {
+                        "languages": key,
+                        "bytes": entry.bytes,
+                        "load_seconds": round(entry.load_seconds, 3),
+                        "uses": entry.uses,
+                        "detector": entry.detector_source,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+                "max_loaded": self.max_loaded,
+                "recognizer_quantize": self.quantize,
+                "loaded_bytes": self._loaded_bytes(),
+                "weights_budget_bytes": self.weights_budget_bytes,
+                "loading": sorted(self._loading),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "superset_hits": self.superset_hits,
+            }
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Per-model parameter bytes: each recognizer plus the shared detectors it uses."""
+        with self._lock:
+            return {
+                "recognizers": {key: entry.bytes for key, entry in self._entries.items()},
+                "easyocr_detectors": {
+                    device: _module_bytes(network) for device, network in self._device_detectors.items()
+                },
+            }
+
+    def events(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            events = list(self._events)
+        return events[-limit:] if limit else events
@@ -0,0 +1,273 @@
+"""Batched EasyOCR recognition for text regions cropped by CRAFT."""
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# EasyOCR recognizers are trained on 64px high line images (easyocr.easyocr.imgH)
+RECOGNIZER_INPUT_HEIGHT = 64
+RECOGNITION_BATCH_SIZE = max(1, int(os.getenv("OCR_RECOGNITION_BATCH_SIZE", "32")))
+# Same default as EasyOCR's slope_ths: steeper boxes go to the "free" (rotated) list
+FREE_BOX_SLOPE_THRESHOLD = 0.1
+
+RECOGNITION_PATH_BATCHED = "recognizer_batched"
+RECOGNITION_PATH_READTEXT = "readtext_per_crop"
+
+
+def _to_grey(crop: np.ndarray) -> np.ndarray:
+    import cv2
+
+    if crop.ndim == 2:
+        return crop
+    if crop.shape[2] == 4:
+        return cv2.cvtColor(crop, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+
+
+_language_chars_cache = {}
+
+
+def _language_chars(lang: str) -> set:
+    if lang not in _language_chars_cache:
+        from easyocr.config import BASE_PATH
+
+        char_file = os.path.join(BASE_PATH, "character", lang + "_char.txt")
+        with open(char_file, "r", encoding="utf-8-sig") as input_file:
+            _language_chars_cache[lang] = set(input_file.read().splitlines())
+    return _language_chars_cache[lang]
+
+
+def _ignore_chars(reader) -> str:
+    """Characters the reader should never emit (same rule as Reader.recognize)."""
+    return "".join(set(reader.character) - set(reader.lang_char))
+
+
+def ignore_chars_for(reader, reader_languages, requested_languages) -> Optional[str]:
+    """
+    Ignore list for a reader serving a subset of the languages it was loaded for.
+
+    Adds characters that only belong to the reader's extra languages to the
+    usual ignore list (e.g. Thai script when a th,en reader serves ["en"]).
+    Returns None when the reader was loaded for exactly the requested languages.
+    """
+    extra = set(reader_languages or []) - set(requested_languages)
+    if not extra:
+        return None
+    try:
+        allowed = set().union(*(_language_chars(lang) for lang in requested_languages))
+        blocked = set().union(*(_language_chars(lang) for lang in extra)) - allowed
+    except OSError as e:
+        logger.warning(f"Could not read EasyOCR character lists: {str(e)}")
+        return None
+    return "".join(set(_ignore_chars(reader)) | (blocked & set(reader.character)))
+
+
+# Padding added around every CRAFT box before cropping
+CROP_PADDING = 5
+
+
+def horizontal_mask(quads: np.ndarray) -> np.ndarray:
+    """Vectorized is_horizontal_box for an (N, 4, 2) array of quadrilaterals."""
+    if len(quads) == 0:
+        return np.zeros(0, dtype=bool)
+    # Top edge: the two points with the smallest y, left to right
+    top = np.take_along_axis(quads, np.argsort(quads[:, :, 1], axis=1)[:, :2, None], axis=1)
+    top = np.take_along_axis(top, np.argsort(top[:, :, 0], axis=1)[:, :, None], axis=1)
+    dx = top[:, 1, 0] - top[:, 0, 0]
+    dy = top[:, 1, 1] - top[:, 0, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (dx != 0) & (np.abs(dy / dx) < FREE_BOX_SLOPE_THRESHOLD)
+
+
+def is_horizontal_box(points: Sequence[Sequence[float]]) -> bool:
+    """True if a 4-point box is close enough to axis-aligned for a plain crop."""
+    if len(points) != 4:
+        return True
+    return bool(horizontal_mask(np.asarray(points, dtype=np.float32)[None, :, :2])[0])
+
+
+def _stack_boxes(boxes):
+    """
+    Convert CRAFT boxes to one (N, K, 2) float array plus per-box point counts.
+
+    Ragged input (boxes with different point counts) is padded by repeating
+    each box's last point; malformed boxes become all-NaN rows.
+    """
+    if isinstance(boxes, np.ndarray) and boxes.ndim == 3 and boxes.shape[1] >= 3 and boxes.shape[2] >= 2:
+        return boxes[:, :, :2].astype(np.float32, copy=False), np.full(len(boxes), boxes.shape[1])
+
+    points = []
+    for box in boxes:
+        try:
+            pts = np.asarray(box, dtype=np.float32)
+        except (TypeError, ValueError):
+            pts = None
+        if pts is None or pts.ndim != 2 or pts.shape[0] < 3 or pts.shape[1] < 2:
+            points.append(None)
+        else:
+            points.append(pts[:, :2])
+
+    max_points = max((len(pts) for pts in points if pts is not None), default=4)
+    stacked = np.full((len(points), max_points, 2), np.nan, dtype=np.float32)
+    counts = np.zeros(len(points), dtype=np.intp)
+    for i, pts in enumerate(points):
+        if pts is not None:
+            stacked[i, :len(pts)] = pts
+            stacked[i, len(pts):] = pts[-1]
+            counts[i] = len(pts)
+    return stacked, counts
+
+
+def box_geometry(boxes, image_shape, padding: int = CROP_PADDING):
+    """
+    Padded axis-aligned bounds for every CRAFT box in one vectorized pass.
+
+    Returns ``(indices, bounds, rotated)`` for the boxes that survive: their
+    positions in ``boxes``, an (M, 4) int array of x1, y1, x2, y2 clipped to
+    the image, and a mask of 4-point boxes steep enough to need crop_free_box.
+    Malformed, non-finite and degenerate (empty after clipping) boxes are
+    dropped.
+    """
+    height, width = image_shape[:2]
+    points, counts = _stack_boxes(boxes)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros((0, 4), dtype=np.int64), np.zeros(0, dtype=bool)
+
+    finite = np.isfinite(points).all(axis=(1, 2))
+    points = np.where(finite[:, None, None], points, 0)
+    # int() truncation, as the per-box loop did
+    lower = np.trunc(points.min(axis=1)).astype(np.int64) - padding
+    upper = np.trunc(points.max(axis=1)).astype(np.int64) + padding
+    bounds = np.stack([
+        np.maximum(lower[:, 0], 0),
+        np.maximum(lower[:, 1], 0),
+        np.minimum(upper[:, 0], width),
+        np.minimum(upper[:, 1], height),
+    ], axis=1)
+
+    keep = finite & (bounds[:, 2] > bounds[:, 0]) & (bounds[:, 3] > bounds[:, 1])
+    # Only true quadrilaterals are warped; other shapes get the axis-aligned crop
+    if points.shape[1] >= 4:
+        rotated = (counts == 4) & ~horizontal_mask(points[:, :4])
+    else:
+        rotated = np.zeros(len(points), dtype=bool)
+    indices = np.flatnonzero(keep)
+    return indices, bounds[indices], rotated[indices]
+
+
+def extract_crops(img: np.ndarray, boxes, indices: np.ndarray, bounds: np.ndarray, rotated: np.ndarray) -> List[np.ndarray]:
+    """Slice surviving boxes out of ``img`` as views; rotated boxes are warped upright."""
+    crops = []
+    for idx, (x1, y1, x2, y2), warp in zip(indices.tolist(), bounds.tolist(), rotated.tolist()):
+        if warp:
+            crops.append(crop_free_box(img, boxes[idx]))
+        else:
+            crops.append(img[y1:y2, x1:x2])
+    return crops
+
+
+def crop_free_box(img: np.ndarray, points: Sequence[Sequence[float]]) -> np.ndarray:
+    """Perspective-warp a rotated 4-point box into an upright crop."""
+    from easyocr.utils import four_point_transform
+
+    return four_point_transform(img, np.asarray(points, dtype=np.float32)[:, :2])
+
+
+def normalize_crops(crops: Sequence[np.ndarray], model_height: int = RECOGNIZER_INPUT_HEIGHT):
+    """
+    Convert crops to greyscale and resize them to the recognizer input height.
+
+    Returns a list of (index, resized_crop, width_ratio) for every usable crop,
+    where index is the position of the crop in the input sequence.
+    """
+    from easyocr.utils import calculate_ratio, compute_ratio_and_resize
+
+    normalized = []
+    for idx, crop in enumerate(crops):
+        if crop is None or crop.size == 0:
+            continue
+        height, width = crop.shape[:2]
+        ratio = calculate_ratio(width, height)
+        if int(model_height * ratio) == 0:
+            continue
+        resized, ratio = compute_ratio_and_resize(_to_grey(crop), width, height, model_height)
+        normalized.append((idx, resized, ratio))
+    return normalized
+
+
+def recognize_crops(
+    reader,
+    crops: Sequence[np.ndarray],
+    batch_size: Optional[int] = None,
+    decoder: str = "greedy",
+    ignore_char: Optional[str] = None,
+    box_seconds: Optional[List[float]] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Recognize many crops with one recognizer pass per padded batch.
+
+    Crops are normalized to the recognizer height, sorted by width so each batch
+    pads to a similar size, and fed to EasyOCR's recognizer directly (bypassing
+    readtext's detector). The result list is aligned with ``crops``; entries are
+    ``{"text", "confidence"}`` dicts or None for crops that could not be read.
+    ``ignore_char`` overrides the reader's default ignore list (see ignore_chars_for).
+    Each batch's time divided by its size is appended to ``box_seconds`` once per crop.
+    """
+    from easyocr.recognition import get_text
+
+    batch_size = batch_size or RECOGNITION_BATCH_SIZE
+    results: List[Optional[Dict[str, Any]]] = [None] * len(crops)
+
+    normalized = normalize_crops(crops)
+    if not normalized:
+        return results
+
+    if getattr(reader, "model_lang", None) in ("chinese_tra", "chinese_sim"):
+        decoder = "greedy"
+    if ignore_char is None:
+        ignore_char = _ignore_chars(reader)
+
+    # Sorting by aspect ratio keeps padding waste low inside each batch
+    normalized.sort(key=lambda item: item[2])
+
+    for start in range(0, len(normalized), batch_size):
+        batch = normalized[start:start + batch_size]
+        max_ratio = max(math.ceil(item[2]) for item in batch)
+        batch_width = max_ratio * RECOGNIZER_INPUT_HEIGHT
+        image_list = [(idx, crop) for idx, crop, _ in batch]
+
+        started = time.perf_counter()
+        predictions = get_text(
+            reader.character,
+            RECOGNIZER_INPUT_HEIGHT,
+            int(batch_width),
+            reader.recognizer,
+            reader.converter,
+            image_list,
+            ignore_char=ignore_char,
+            decoder=decoder,
+            beamWidth=5,
+            batch_size=len(batch),
+            contrast_ths=0.1,
+            adjust_contrast=0.5,
+            filter_ths=0.003,
+            workers=0,
+            device=reader.device,
+        )
+
+        if box_seconds is not None:
+            box_seconds.extend([(time.perf_counter() - started) / len(batch)] * len(batch))
+
+        for idx, text, confidence in predictions:
+            results[idx] = {"text": text, "confidence": float(confidence)}
+
+    logger.info(
+        f"Batched recognition: {len(normalized)} crops in "
+        f"{math.ceil(len(normalized) / batch_size)} batch(es)"
+    )
+    return results
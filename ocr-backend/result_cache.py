@@ -0,0 +1,207 @@
+"""Content-addressed OCR result cache with an in-memory LRU and optional sqlite tier."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+OCR_CACHE_MEMORY_MB = float(os.getenv("OCR_CACHE_MEMORY_MB", "64"))
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR")
+OCR_CACHE_DISK_MB = float(os.getenv("OCR_CACHE_DISK_MB", "512"))
+
+_MB = 1024 * 1024
+
+
+def make_cache_key(img: np.ndarray, languages: Iterable[str], **settings) -> str:
+    """Hash the decoded pixels plus every setting that changes the OCR output."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((img.shape, str(img.dtype))).encode())
+    digest.update(np.ascontiguousarray(img).data)
+    digest.update(",".join(sorted(languages)).encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class _DiskTier:
+    """sqlite-backed store of zlib-compressed JSON results, evicted by total size."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "ocr_results.sqlite3")
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results(last_access)")
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn.execute("SELECT data FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return zlib.decompress(row[0])
+
+    def put(self, key: str, payload: bytes):
+        data = zlib.compress(payload, 6)
+        if len(data) > self.max_bytes:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time()),
+        )
+        self._evict()
+
+    def _evict(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM results ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM results")
+
+
+class OCRResultCache:
+    """
+    Two-tier cache of OCR response payloads.
+
+    The memory tier is an LRU of serialized JSON bounded by total bytes; the
+    optional disk tier (enabled when ``directory`` is set) keeps compressed
+    results across restarts and promotes hits back into memory.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = OCR_CACHE_ENABLED,
+        memory_mb: float = OCR_CACHE_MEMORY_MB,
+        directory: Optional[str] = OCR_CACHE_DIR,
+        disk_mb: float = OCR_CACHE_DISK_MB,
+    ):
+        self.enabled = enabled and memory_mb > 0
+        self.max_memory_bytes = int(memory_mb * _MB)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk = None
+        if self.enabled and directory:
+            try:
+                self._disk = _DiskTier(directory, int(disk_mb * _MB))
+                logger.info(f"OCR result disk cache at {self._disk.path} ({disk_mb:.0f} MB)")
+            except Exception as e:
+                logger.warning(f"OCR result disk cache disabled: {str(e)}")
+
+    def _remember(self, key: str, payload: bytes):
+        if len(payload) > self.max_memory_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._entries[key] = payload
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.max_memory_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(payload)
+
+            if self._disk is not None:
+                try:
+                    payload = self._disk.get(key)
+                except Exception as e:
+                    logger.warning(f"OCR result disk cache read failed: {str(e)}")
+                    payload = None
+                if payload is not None:
+                    self.disk_hits += 1
+                    self._remember(key, payload)
+                    return json.loads(payload)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        if not self.enabled:
+            return
+        payload = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._remember(key, payload)
+            if self._disk is not None:
+                try:
+                    self._disk.put(key, payload)
+                except Exception as e:
+                    logger.warning(f"OCR result disk cache write failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            if self._disk is not None:
+                self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "enabled": self.enabled,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "memory_limit_bytes": self.max_memory_bytes,
+                "memory_evictions": self.evictions,
+            }
+            if self._disk is not None:
+                try:
+                    stats.update({
+                        "disk_path": self._disk.path,
+                        "disk_entries": self._disk.count(),
+                        "disk_bytes": self._disk.total_bytes(),
+                        "disk_limit_bytes": self._disk.max_bytes,
+                        "disk_evictions": self._disk.evictions,
+                    })
+                except Exception as e:
+                    stats["disk_error"] = str(e)
+            return stats
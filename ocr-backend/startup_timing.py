@@ -0,0 +1,72 @@
+"""Startup stage timings and the readiness state behind /ready."""
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTracker:
+    """
+    Record how long each startup stage (import, model load, warm-up) took.
+
+    Stages are kept in the order they finished. ``status`` moves from
+    "starting" to "loading" to "ready", or to "failed" with the error.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        # perf_counter() when startup began, e.g. before the app's imports
+        self.created = started if started is not None else time.perf_counter()
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self._stages: List[Dict[str, Any]] = []
+        self._ready_after: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self._stages.append({"stage": name, "seconds": round(seconds, 3)})
+        logger.info(f"Startup: {name} took {seconds:.2f}s")
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def timed_import(self, module: str):
+        """Import ``module`` as its own stage; already imported modules cost ~0s."""
+        with self.stage(f"import {module}"):
+            return importlib.import_module(module)
+
+    def mark_loading(self):
+        self.status = "loading"
+
+    def mark_ready(self):
+        with self._lock:
+            self._ready_after = time.perf_counter() - self.created
+        self.status = "ready"
+        logger.info(f"Startup: ready after {self._ready_after:.2f}s")
+
+    def mark_failed(self, error: str):
+        self.error = error
+        self.status = "failed"
+        logger.error(f"Startup failed: {error}")
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "error": self.error,
+                "ready_after_seconds": round(self._ready_after, 3) if self._ready_after is not None else None,
+                "stages": list(self._stages),
+            }
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from craft_autosize import choose_long_size, craft_input_pixels  # noqa: E402
+
+BUCKETS = (640, 960, 1280, 1600, 1920, 2560)
+
+
+def test_small_image_is_upscaled_until_text_is_legible():
+    # 500 px page, 5 px characters: 640 gives 6.4 px, 1280 is the first to reach 12 px
+    assert choose_long_size(5, (400, 500), BUCKETS, min_char_px=12, max_long_size=2560) == 1280
+
+
+def test_small_image_with_large_text_gets_smallest_bucket():
+    assert choose_long_size(40, (400, 500), BUCKETS, min_char_px=12, max_long_size=2560) == 640
+
+
+def test_unreachable_threshold_falls_back_to_largest_allowed_bucket():
+    assert choose_long_size(1, (400, 500), BUCKETS, min_char_px=12, max_long_size=1920) == 1920
+
+
+def test_input_pixels_count_upscaling_past_the_image_size():
+    # 1754 x 1240 page at 2560: CRAFT sees 2560 x ~1810, not the native 1754 x 1240
+    pixels = craft_input_pixels(2560, (1754, 1240))
+    assert pixels == pytest.approx(2560 * 1240 * 2560 / 1754)
+    assert pixels > 1754 * 1240
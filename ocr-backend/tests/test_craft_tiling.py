@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from craft_tiling import _tile_boxes, merge_seam_boxes, plan_tiles, should_tile, tile_starts  # noqa: E402
+
+
+def _quad(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def _boxes(*rects):
+    return np.array([_quad(*rect) for rect in rects], dtype=np.float32)
+
+
+def test_should_tile_modes():
+    assert should_tile("on", (10, 10))
+    assert not should_tile("off", (100000, 100000))
+    assert should_tile("auto", (100, 6000)) and not should_tile("auto", (100, 4000))
+
+
+def test_tile_starts_single_tile_when_image_fits():
+    assert tile_starts(800, 1600, 200) == [0]
+    assert tile_starts(1600, 1600, 200) == [0]
+
+
+def test_tile_starts_shift_last_tile_inside_image():
+    starts = tile_starts(3000, 1600, 200)
+    assert starts == [0, 1400]
+    assert starts[-1] + 1600 == 3000
+
+
+def test_tile_cores_cover_image_without_gaps_or_overlap():
+    tiles = plan_tiles((3000, 4000), 1600, 200)
+    for axis, length in ((0, 4000), (1, 3000)):
+        cuts = sorted({(t["core"][axis], t["core"][axis + 2]) for t in tiles})
+        assert cuts[0][0] == 0 and cuts[-1][1] == length
+        assert all(a[1] == b[0] for a, b in zip(cuts, cuts[1:]))
+    for t in tiles:
+        assert t["x"] + t["width"] <= 4000 and t["y"] + t["height"] <= 3000
+
+
+def test_tile_boxes_keep_only_boxes_centred_in_core():
+    tile = {"x": 1000, "y": 0, "width": 1600, "height": 1600, "core": (1100.0, 0.0, 2500.0, 1600.0)}
+    prediction = {"boxes": _boxes((0, 10, 50, 30), (200, 10, 300, 30))}
+    kept = _tile_boxes(prediction, tile)
+    # The first box's centre (1025) is in the neighbour's core; the second is mapped to global coordinates
+    assert kept.shape == (1, 4, 2)
+    assert kept[0].min(axis=0).tolist() == [1200, 10]
+
+
+def test_tile_boxes_without_detections():
+    assert _tile_boxes({"boxes": []}, {"x": 0, "y": 0, "core": (0, 0, 1, 1)}).shape == (0, 4, 2)
+
+
+def test_line_split_by_seam_is_joined():
+    # Each tile saw part of one line, and the parts overlap around the seam at x=1500
+    boxes = _boxes((1000, 100, 1550, 130), (1450, 102, 2100, 131))
+    merged = merge_seam_boxes(boxes, [1500])
+    assert merged.shape == (1, 4, 2)
+    assert merged[0].min(axis=0).tolist() == [1000, 100]
+    assert merged[0].max(axis=0).tolist() == [2100, 131]
+
+
+def test_pieces_just_touching_across_seam_are_joined():
+    boxes = _boxes((1000, 100, 1495, 130), (1505, 100, 2000, 130))
+    assert len(merge_seam_boxes(boxes, [1500])) == 1
+
+
+def test_line_crossing_two_seams_is_joined_into_one_box():
+    boxes = _boxes((0, 100, 1520, 130), (1480, 100, 2920, 130), (2880, 100, 3500, 130))
+    merged = merge_seam_boxes(boxes, [1500, 2900])
+    assert merged.shape == (1, 4, 2)
+    assert merged[0].max(axis=0).tolist() == [3500, 130]
+
+
+def test_separate_lines_at_seam_stay_apart():
+    # Different lines (no vertical overlap) on either side of the seam
+    boxes = _boxes((1000, 100, 1495, 130), (1505, 200, 2000, 230))
+    assert len(merge_seam_boxes(boxes, [1500])) == 2
+
+
+def test_words_with_a_wide_gap_across_seam_stay_apart():
+    boxes = _boxes((1000, 100, 1400, 130), (1600, 100, 2000, 130))
+    assert len(merge_seam_boxes(boxes, [1500])) == 2
+
+
+def test_neighbouring_boxes_away_from_seams_are_untouched():
+    boxes = _boxes((0, 100, 200, 130), (205, 100, 400, 130))
+    np.testing.assert_array_equal(merge_seam_boxes(boxes, [1500]), boxes)
+
+
+def test_no_seams_or_single_box_is_a_no_op():
+    boxes = _boxes((0, 0, 10, 10), (12, 0, 20, 10))
+    assert merge_seam_boxes(boxes, []) is boxes
+    assert merge_seam_boxes(boxes[:1], [5]) is not None
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from layout import apply_layout, group_lines, reading_order, suppress_overlaps  # noqa: E402
+
+
+def _bounds(*rows):
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+
+def test_suppress_drops_fragment_inside_cluster_box():
+    bounds = _bounds([0, 0, 100, 20], [10, 2, 40, 18], [200, 0, 260, 20])
+    assert suppress_overlaps(bounds).tolist() == [0, 2]
+
+
+def test_suppress_keeps_partially_overlapping_boxes():
+    bounds = _bounds([0, 0, 100, 20], [80, 0, 180, 20])
+    assert suppress_overlaps(bounds).tolist() == [0, 1]
+
+
+def test_suppress_empty():
+    assert suppress_overlaps(np.zeros((0, 4), dtype=np.int64)).tolist() == []
+
+
+def test_words_on_a_line_group_left_to_right_regardless_of_input_order():
+    bounds = _bounds([120, 0, 180, 20], [0, 2, 50, 22], [60, 1, 110, 21])
+    assert group_lines(bounds) == [[1, 2, 0]]
+
+
+def test_column_gap_keeps_lines_apart():
+    # Same row, but the right column starts far more than one line height away
+    bounds = _bounds([0, 0, 100, 20], [400, 0, 500, 20])
+    assert sorted(group_lines(bounds)) == [[0], [1]]
+
+
+def test_much_taller_box_does_not_join_line():
+    bounds = _bounds([0, 0, 100, 20], [105, -20, 150, 40])
+    assert sorted(group_lines(bounds)) == [[0], [1]]
+
+
+def test_reading_order_tolerates_uneven_baselines():
+    # Second word sits a few pixels lower but belongs to the first row
+    bounds = _bounds([100, 5, 160, 25], [0, 0, 60, 20], [0, 40, 60, 60])
+    assert reading_order(bounds).tolist() == [1, 0, 2]
+
+
+def test_reading_order_rows_across_columns_go_left_to_right():
+    left_top, right_top = [0, 0, 100, 20], [300, 0, 400, 20]
+    left_bottom, right_bottom = [0, 40, 100, 60], [300, 40, 400, 60]
+    bounds = _bounds(right_bottom, left_top, right_top, left_bottom)
+    assert reading_order(bounds).tolist() == [1, 2, 3, 0]
+
+
+def test_apply_layout_merges_lines_and_leaves_rotated_boxes_alone():
+    bounds = _bounds([0, 40, 50, 60], [60, 40, 120, 60], [0, 0, 80, 20], [200, 0, 220, 20])
+    indices = np.array([10, 11, 12, 13])
+    rotated = np.array([False, False, False, True])
+    out_indices, out_bounds, out_rotated, stats = apply_layout(indices, bounds, rotated, "lines")
+    assert stats["merged"] == 1 and stats["lines"] == 3
+    # Top line, the rotated box on the same row, then the merged bottom line
+    assert out_indices.tolist() == [12, 13, 10]
+    assert out_bounds[2].tolist() == [0, 40, 120, 60]
+    assert out_rotated.tolist() == [False, True, False]
+
+
+def test_apply_layout_none_is_a_no_op():
+    bounds = _bounds([0, 0, 10, 10])
+    indices, rotated = np.array([0]), np.array([False])
+    out = apply_layout(indices, bounds, rotated, "none")
+    assert out[0] is indices and out[3] == {"mode": "none", "input_boxes": 1}
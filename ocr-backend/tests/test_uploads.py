@@ -0,0 +1,98 @@
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uploads import (  # noqa: E402
+    MULTIPART_OVERHEAD_BYTES,
+    OCR_MAX_UPLOAD_BYTES,
+    TRANSCRIBE_MAX_UPLOAD_BYTES,
+    UploadTooLarge,
+    content_length_exceeds,
+    max_upload_bytes_for_path,
+    read_upload,
+    save_upload,
+)
+
+
+class FakeUpload:
+    """Minimal UploadFile: async read(n) over bytes, with an optional declared size."""
+
+    def __init__(self, data: bytes, size=None):
+        self._stream = io.BytesIO(data)
+        self.size = size
+        self.reads = 0
+
+    async def read(self, n: int) -> bytes:
+        self.reads += 1
+        return self._stream.read(n)
+
+
+def test_limit_depends_on_path():
+    assert max_upload_bytes_for_path("/transcribe/stream") == TRANSCRIBE_MAX_UPLOAD_BYTES
+    assert max_upload_bytes_for_path("/ocr/pdf") == OCR_MAX_UPLOAD_BYTES
+
+
+@pytest.mark.parametrize("header", [None, "", "not-a-number"])
+def test_missing_or_invalid_content_length_is_not_rejected(header):
+    assert not content_length_exceeds(header, 10)
+
+
+def test_content_length_allows_multipart_overhead():
+    assert not content_length_exceeds(str(10 + MULTIPART_OVERHEAD_BYTES), 10)
+    assert content_length_exceeds(str(11 + MULTIPART_OVERHEAD_BYTES), 10)
+
+
+def test_read_upload_with_declared_size_reads_in_chunks():
+    data = bytes(range(256)) * 4
+    upload = FakeUpload(data, size=len(data))
+    assert asyncio.run(read_upload(upload, max_bytes=len(data), chunk_size=100)) == data
+    # 11 chunks of data plus the empty read that ends the loop
+    assert upload.reads == 12
+
+
+def test_read_upload_rejects_declared_size_over_limit_without_reading():
+    upload = FakeUpload(b"x" * 11, size=11)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(upload, max_bytes=10))
+    assert upload.reads == 0
+
+
+def test_read_upload_shorter_than_declared_is_truncated():
+    upload = FakeUpload(b"abc", size=10)
+    assert asyncio.run(read_upload(upload, max_bytes=10, chunk_size=2)) == b"abc"
+
+
+def test_read_upload_growing_past_declared_size_is_still_limited():
+    data = b"y" * 20
+    assert asyncio.run(read_upload(FakeUpload(data, size=5), max_bytes=20, chunk_size=4)) == data
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(FakeUpload(data, size=5), max_bytes=19, chunk_size=4))
+
+
+def test_read_upload_without_size_stops_at_limit():
+    upload = FakeUpload(b"z" * 1000)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(upload, max_bytes=10, chunk_size=4))
+    # Stops at the first chunk past the limit instead of reading everything
+    assert upload.reads == 3
+
+
+def test_read_upload_exactly_at_limit_is_accepted():
+    assert asyncio.run(read_upload(FakeUpload(b"q" * 10), max_bytes=10, chunk_size=3)) == b"q" * 10
+
+
+def test_save_upload_writes_everything_and_enforces_limit():
+    destination = io.BytesIO()
+    assert asyncio.run(save_upload(FakeUpload(b"p" * 9), destination, max_bytes=9, chunk_size=4)) == 9
+    assert destination.getvalue() == b"p" * 9
+
+    destination = io.BytesIO()
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload(FakeUpload(b"p" * 9), destination, max_bytes=8, chunk_size=4))
+    # Nothing past the limit reaches the destination
+    assert len(destination.getvalue()) <= 8
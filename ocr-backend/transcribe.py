@@ -3,7 +3,6 @@ Speech-to-Text Module using faster-whisper
 Supports CUDA, MPS (Apple Silicon), and CPU
 """
 
-from faster_whisper import WhisperModel
 import sys
 import os
 import logging
@@ -22,6 +21,8 @@ _device_config = None
 # Runtime flag to permanently disable CUDA for speech-to-text when it's unusable
 _force_cpu_mode = False
 _cuda_disable_reason = None
+# Set when CUDA was expected but unusable, as opposed to CPU being forced by configuration
+_cuda_fallback_reason = None
 
 CUDA_LARGE_MODELS = {"large", "large-v1", "large-v2", "large-v3"}
 DEFAULT_CUDA_COMPUTE_TYPE = os.getenv("TRANSCRIBE_CUDA_COMPUTE_TYPE", "float16")
@@ -43,22 +44,30 @@ def _short_error_message(message: Optional[str]) -> str:
     return message.strip().splitlines()[0]
 
 
-def _disable_cuda_for_transcribe(reason: Optional[str]):
+def _disable_cuda_for_transcribe(reason: Optional[str], fallback: bool = True):
     """
     Disable CUDA usage within this module when the environment misses
     required libraries (e.g. cuDNN) so we can fall back to CPU safely.
+    ``fallback=False`` marks CPU as configured rather than a fallback.
     """
-    global _force_cpu_mode, _cuda_disable_reason
+    global _force_cpu_mode, _cuda_disable_reason, _cuda_fallback_reason
     if _force_cpu_mode:
         return
     _force_cpu_mode = True
     _cuda_disable_reason = _short_error_message(reason)
+    if fallback:
+        _cuda_fallback_reason = _cuda_disable_reason
     logger.warning(
         "Disabling CUDA for speech-to-text: %s",
         _cuda_disable_reason,
     )
 
 
+def cuda_fallback_reason() -> Optional[str]:
+    """Why CUDA was abandoned for CPU in this process, or None if it wasn't."""
+    return _cuda_fallback_reason
+
+
 def _cuda_dependencies_available():
     """
     Check if required CUDA/CuDNN shared objects exist on disk.
@@ -111,6 +120,9 @@ def _create_model_instance(model_size: str, device: str, compute_type: str):
     Create a WhisperModel instance for the requested device.
     Raises the underlying exception if creation fails.
     """
+    # Imported on first use so the API starts without loading CTranslate2
+    from faster_whisper import WhisperModel
+
     if device == "cuda":
         os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
         logger.info(
@@ -160,7 +172,7 @@ def set_device_config(config: Dict[str, Any]):
     logger.info(f"Transcribe module device config set: {config}")
 
     if _env_force_cpu_enabled():
-        _disable_cuda_for_transcribe("TRANSCRIBE_FORCE_CPU is enabled")
+        _disable_cuda_for_transcribe("TRANSCRIBE_FORCE_CPU is enabled", fallback=False)
         return
 
     if config.get('type') == 'cuda':
@@ -260,7 +272,8 @@ def transcribe_audio(
     file_path: str,
     model_size: str = "base",
     language: str = "th",
-    initial_prompt: Optional[str] = None
+    initial_prompt: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Transcribe audio/video file to text - ไม่ใช้ cache, สร้าง model ใหม่ทุกครั้ง
@@ -270,6 +283,7 @@ def transcribe_audio(
         model_size: Model size (tiny, base, small, medium, large)
         language: Language code (th, en, auto for auto-detect)
         initial_prompt: Optional prompt to guide transcription
+        timings: Optional dict that receives "model_load" and "transcribe" seconds
 
     Returns:
         Dict with 'text', 'language', and 'segments'
@@ -284,8 +298,13 @@ def transcribe_audio(
     logger.info(f"Loading faster-whisper model ({model_size}) on {device} with {compute_type}")
 
     current_device = device
+    timings = {} if timings is None else timings
+
+    def add_time(stage: str, started: float):
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
 
     # สร้าง model ใหม่ทุกครั้ง ไม่ใช้ cache เพื่อหลีกเลี่ยงปัญหา CUDA context
+    started = time.perf_counter()
     try:
         model = _create_model_instance(model_size, device, compute_type)
     except Exception as e:
@@ -303,6 +322,7 @@ def transcribe_audio(
                 return None
         else:
             return None
+    add_time("model_load", started)
 
     logger.info(f"Transcribing file: {file_path} using {current_device}")
 
@@ -313,8 +333,10 @@ def transcribe_audio(
     if initial_prompt:
         transcribe_params["initial_prompt"] = initial_prompt
 
+    started = time.perf_counter()
     try:
         result = _run_whisper_transcription(model, file_path, transcribe_params)
+        add_time("transcribe", started)
         # ลบ model ทันทีหลังใช้งาน
         del model
         if current_device == "cuda":
@@ -332,8 +354,12 @@ def transcribe_audio(
             logger.warning(f"Retrying on CPU: {short_reason}")
             _disable_cuda_for_transcribe(short_reason)
             try:
+                started = time.perf_counter()
                 cpu_model = _create_model_instance(model_size, "cpu", "int8")
+                add_time("model_load", started)
+                started = time.perf_counter()
                 result = _run_whisper_transcription(cpu_model, file_path, transcribe_params)
+                add_time("transcribe", started)
                 del cpu_model
                 return result
             except Exception as cpu_error:
@@ -15,6 +15,8 @@ import transcribe
 logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
 logger = logging.getLogger(__name__)
 
+CUDA_FALLBACK_PREFIX = "CUDA_FALLBACK: "
+
 
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run Whisper transcription in an isolated process")
@@ -43,12 +45,14 @@ def _run_json_mode(args: argparse.Namespace) -> int:
     if not os.path.exists(args.file):
         return _write_json({"success": False, "error": f"file not found: {args.file}"})
 
+    timings: Dict[str, float] = {}
     try:
         result = transcribe.transcribe_audio(
             args.file,
             model_size=args.model_size,
             language=args.language,
             initial_prompt=args.initial_prompt,
+            timings=timings,
         )
     except Exception as exc:
         logger.exception("Transcription worker failed")
@@ -63,6 +67,8 @@ def _run_json_mode(args: argparse.Namespace) -> int:
         "language": result.get("language", "unknown"),
         "segments": result.get("segments", []),
         "total_segments": len(result.get("segments", [])),
+        "cuda_fallback": transcribe.cuda_fallback_reason(),
+        "timings": timings,
     }
     return _write_json(payload)
 
@@ -83,6 +89,11 @@ def _run_stream_mode(args: argparse.Namespace) -> int:
         ):
             sys.stdout.write(chunk)
             sys.stdout.flush()
+        fallback = transcribe.cuda_fallback_reason()
+        if fallback:
+            # Consumed by the API process for metrics, never forwarded to clients
+            sys.stdout.write(f"{CUDA_FALLBACK_PREFIX}{fallback}\n")
+            sys.stdout.flush()
         return 0
     except Exception as exc:
         logger.exception("Streaming transcription worker failed")
@@ -0,0 +1,114 @@
+"""Chunked upload handling with per-kind size limits."""
+import logging
+import os
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+OCR_MAX_UPLOAD_MB = float(os.getenv("OCR_MAX_UPLOAD_MB", "100"))
+TRANSCRIBE_MAX_UPLOAD_MB = float(os.getenv("TRANSCRIBE_MAX_UPLOAD_MB", "4096"))
+UPLOAD_CHUNK_SIZE = max(64 * 1024, int(float(os.getenv("UPLOAD_CHUNK_SIZE_KB", "1024")) * 1024))
+# Allowance for multipart boundaries and form fields when checking Content-Length
+MULTIPART_OVERHEAD_BYTES = 1 * _MB
+
+OCR_MAX_UPLOAD_BYTES = int(OCR_MAX_UPLOAD_MB * _MB)
+TRANSCRIBE_MAX_UPLOAD_BYTES = int(TRANSCRIBE_MAX_UPLOAD_MB * _MB)
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds its configured maximum size."""
+
+    def __init__(self, limit_bytes: int):
+        super().__init__(f"Upload exceeds the {limit_bytes / _MB:.0f} MB limit")
+        self.limit_bytes = limit_bytes
+
+
+def max_upload_bytes_for_path(path: str) -> int:
+    """Upload limit for a request path: transcription accepts far larger files than OCR."""
+    if path.startswith("/transcribe"):
+        return TRANSCRIBE_MAX_UPLOAD_BYTES
+    return OCR_MAX_UPLOAD_BYTES
+
+
+def content_length_exceeds(content_length: Optional[str], limit_bytes: int) -> bool:
+    """True if a declared request body is larger than the limit allows (before parsing it)."""
+    if not content_length:
+        return False
+    try:
+        return int(content_length) > limit_bytes + MULTIPART_OVERHEAD_BYTES
+    except ValueError:
+        return False
+
+
+async def read_upload(file, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> bytearray:
+    """
+    Read an UploadFile into one buffer, chunk by chunk.
+
+    When the part size is known the buffer is allocated once and filled in
+    place, so there is a single copy of the upload in memory and no growth
+    reallocations; the read stops as soon as ``max_bytes`` is exceeded.
+    """
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    if size is not None:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        filled = 0
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            end = filled + len(chunk)
+            if end > size:
+                # Part grew past its declared size; fall back to appending
+                view.release()
+                del buffer[filled:]
+                buffer.extend(chunk)
+                return await _append_rest(file, buffer, max_bytes, chunk_size)
+            view[filled:end] = chunk
+            filled = end
+        view.release()
+        del buffer[filled:]
+        return buffer
+
+    return await _append_rest(file, bytearray(), max_bytes, chunk_size)
+
+
+async def _append_rest(file, buffer: bytearray, max_bytes: int, chunk_size: int) -> bytearray:
+    if len(buffer) > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return buffer
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise UploadTooLarge(max_bytes)
+
+
+async def save_upload(file, destination: BinaryIO, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Copy an UploadFile into ``destination`` chunk by chunk; returns bytes written.
+
+    Only one chunk is held in memory at a time, so memory stays flat however
+    large the file is.
+    """
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    written = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        written += len(chunk)
+        if written > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        destination.write(chunk)
+    destination.flush()
+    return written
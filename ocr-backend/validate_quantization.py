@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Measure what INT8 quantization costs in accuracy and buys in speed on CPU.
+
+Runs CRAFT (FP32 vs static INT8 on ONNX Runtime) and the EasyOCR recognizer
+(FP32 vs dynamic INT8) on a fixed image set and reports box agreement,
+character error rates and timings as JSON.
+
+    python validate_quantization.py                  # 8 fixed synthetic pages
+    python validate_quantization.py scans/*.jpg --languages th,en
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from craft_models import CraftNetworks, SharedCraftDetector
+from layout import reading_order
+from recognition import box_geometry, extract_crops, recognize_crops
+from synthetic_pages import char_error_rate as _cer
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Validate INT8 CRAFT and recognizer against FP32")
+    parser.add_argument("images", nargs="*", help="Images to validate (default: synthetic pages with ground truth)")
+    parser.add_argument("--pages", type=int, default=8, help="Synthetic pages when no images are given")
+    parser.add_argument("--seed", type=int, default=2024, help="Seed of the synthetic set (keep fixed across runs)")
+    parser.add_argument("--languages", default="th,en")
+    parser.add_argument("--long-size", type=int, default=960)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for an INT8 box to match an FP32 box")
+    return parser.parse_args()
+
+
+def _load_images(args):
+    if args.images:
+        images = []
+        for path in args.images:
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+            if img is None:
+                print(f"ERROR: cannot read {path}", file=sys.stderr)
+                sys.exit(1)
+            images.append((path, img, None))
+        return images
+
+    from synthetic_pages import synthetic_pages
+
+    return [
+        (f"synthetic-{args.seed + i}", img, " ".join(line["text"] for line in truth))
+        for i, (img, truth) in enumerate(synthetic_pages(args.pages, seed=args.seed))
+    ]
+
+
+def _bounds(img, prediction):
+    return box_geometry(prediction["boxes"], img.shape)
+
+
+def _box_agreement(reference: np.ndarray, candidate: np.ndarray, threshold: float):
+    """(recall, precision) of candidate boxes against reference boxes by IoU."""
+    if len(reference) == 0 or len(candidate) == 0:
+        same = len(reference) == len(candidate)
+        return (1.0 if same else 0.0), (1.0 if same else 0.0)
+    ix1 = np.maximum(reference[:, None, 0], candidate[None, :, 0])
+    iy1 = np.maximum(reference[:, None, 1], candidate[None, :, 1])
+    ix2 = np.minimum(reference[:, None, 2], candidate[None, :, 2])
+    iy2 = np.minimum(reference[:, None, 3], candidate[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_r = (reference[:, 2] - reference[:, 0]) * (reference[:, 3] - reference[:, 1])
+    area_c = (candidate[:, 2] - candidate[:, 0]) * (candidate[:, 3] - candidate[:, 1])
+    iou = inter / np.maximum(area_r[:, None] + area_c[None, :] - inter, 1)
+    matched = iou >= threshold
+    return float(matched.any(axis=1).mean()), float(matched.any(axis=0).mean())
+
+
+def _page_text(img, boxes, reader):
+    """Recognize the given boxes and join their text in reading order."""
+    indices, bounds, rotated = box_geometry(boxes, img.shape)
+    order = reading_order(bounds)
+    indices, bounds, rotated = indices[order], bounds[order], rotated[order]
+    crops = extract_crops(img, boxes, indices, bounds, rotated)
+    started = time.perf_counter()
+    results = recognize_crops(reader, crops)
+    elapsed = time.perf_counter() - started
+    texts = [item["text"] if item else "" for item in results]
+    return texts, elapsed
+
+
+def _timed_detect(detector, img):
+    started = time.perf_counter()
+    prediction = detector.detect_text(img)
+    return prediction, time.perf_counter() - started
+
+
+def main() -> int:
+    args = _parse_args()
+    import easyocr
+
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip()]
+    images = _load_images(args)
+
+    fp32_networks = CraftNetworks(cuda=False, engine="onnx")
+    int8_networks = CraftNetworks(cuda=False, engine="onnx", quantize="int8")
+    if int8_networks.quantize != "int8":
+        print("ERROR: INT8 CRAFT needs onnxruntime", file=sys.stderr)
+        return 1
+    fp32_detector = SharedCraftDetector(fp32_networks, args.long_size, False)
+    int8_detector = SharedCraftDetector(int8_networks, args.long_size, False)
+    fp32_reader = easyocr.Reader(languages, gpu=False, detector=False, quantize=False, verbose=False)
+    int8_reader = easyocr.Reader(languages, gpu=False, detector=False, quantize=True, verbose=False)
+
+    # Warm both engines so session initialization isn't timed
+    _, warm_img, _ = images[0]
+    fp32_detector.detect_text(warm_img)
+    int8_detector.detect_text(warm_img)
+
+    pages = []
+    for name, img, truth in images:
+        fp32_prediction, fp32_detect_s = _timed_detect(fp32_detector, img)
+        int8_prediction, int8_detect_s = _timed_detect(int8_detector, img)
+        _, fp32_bounds, _ = _bounds(img, fp32_prediction)
+        _, int8_bounds, _ = _bounds(img, int8_prediction)
+        recall, precision = _box_agreement(fp32_bounds, int8_bounds, args.iou)
+
+        # Recognizer comparison on identical (FP32) crops isolates recognizer error
+        fp32_texts, fp32_recognize_s = _page_text(img, fp32_prediction["boxes"], fp32_reader)
+        int8_texts, int8_recognize_s = _page_text(img, fp32_prediction["boxes"], int8_reader)
+        crop_cer = statistics.mean(
+            [_cer(q, f) for q, f in zip(int8_texts, fp32_texts)]
+        ) if fp32_texts else 0.0
+
+        page = {
+            "image": name,
+            "craft": {
+                "fp32_boxes": int(len(fp32_bounds)),
+                "int8_boxes": int(len(int8_bounds)),
+                "box_recall": round(recall, 4),
+                "box_precision": round(precision, 4),
+                "fp32_ms": round(fp32_detect_s * 1000, 1),
+                "int8_ms": round(int8_detect_s * 1000, 1),
+            },
+            "recognizer": {
+                "crops": len(fp32_texts),
+                "cer_int8_vs_fp32": round(crop_cer, 4),
+                "fp32_ms": round(fp32_recognize_s * 1000, 1),
+                "int8_ms": round(int8_recognize_s * 1000, 1),
+            },
+        }
+        if truth is not None:
+            # End to end: FP32 everywhere vs INT8 everywhere, against ground truth
+            int8_pipeline_texts, _ = _page_text(img, int8_prediction["boxes"], int8_reader)
+            page["cer_vs_truth"] = {
+                "fp32": round(_cer(" ".join(fp32_texts), truth), 4),
+                "int8": round(_cer(" ".join(int8_pipeline_texts), truth), 4),
+            }
+        pages.append(page)
+
+    def mean(path):
+        values = [page[path[0]][path[1]] for page in pages if path[0] in page]
+        return round(statistics.mean(values), 4) if values else None
+
+    summary = {
+        "box_recall": mean(("craft", "box_recall")),
+        "box_precision": mean(("craft", "box_precision")),
+        "craft_speedup": round(
+            sum(p["craft"]["fp32_ms"] for p in pages) / max(sum(p["craft"]["int8_ms"] for p in pages), 1e-6), 2
+        ),
+        "recognizer_cer_int8_vs_fp32": mean(("recognizer", "cer_int8_vs_fp32")),
+        "recognizer_speedup": round(
+            sum(p["recognizer"]["fp32_ms"] for p in pages)
+            / max(sum(p["recognizer"]["int8_ms"] for p in pages), 1e-6), 2
+        ),
+    }
+    if any("cer_vs_truth" in page for page in pages):
+        summary["cer_vs_truth_fp32"] = mean(("cer_vs_truth", "fp32"))
+        summary["cer_vs_truth_int8"] = mean(("cer_vs_truth", "int8"))
+
+    print(json.dumps({"long_size": args.long_size, "languages": languages, "summary": summary, "pages": pages},
+                     indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
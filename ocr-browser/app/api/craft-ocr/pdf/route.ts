@@ -0,0 +1,80 @@
+import { NextRequest, NextResponse } from "next/server";
+import { Agent } from "undici";
+
+export const runtime = "nodejs";
+
+const PYTHON_API_URL = process.env.PYTHON_API_URL || "http://localhost:8005";
+const pythonApiAgent = new Agent({
+  headersTimeout: 0, // large PDFs stream for a long time
+  bodyTimeout: 0,
+  keepAliveTimeout: 60_000,
+  keepAliveMaxTimeout: 600_000,
+});
+
+const FORWARDED_FIELDS = [
+  "languages",
+  "ai_correct",
+  "craft_long_size",
+  "craft_use_refiner",
+  "recognition_mode",
+  "layout",
+  "pages",
+];
+
+export async function POST(request: NextRequest) {
+  try {
+    const formData = await request.formData();
+    const file = formData.get("file");
+
+    if (!(file instanceof File)) {
+      return NextResponse.json({ error: "No file provided" }, { status: 400 });
+    }
+
+    const pythonFormData = new FormData();
+    pythonFormData.append("file", file);
+    for (const field of FORWARDED_FIELDS) {
+      const value = formData.get(field);
+      if (typeof value === "string" && value.length > 0) {
+        pythonFormData.append(field, value);
+      }
+    }
+
+    const response = await fetch(`${PYTHON_API_URL}/ocr/pdf`, {
+      method: "POST",
+      body: pythonFormData,
+      dispatcher: pythonApiAgent,
+    });
+
+    if (!response.ok || !response.body) {
+      const errorBody = await response.text().catch(() => "");
+      let detail = errorBody || response.statusText;
+      try {
+        detail = JSON.parse(errorBody).detail ?? detail;
+      } catch {
+        // non-JSON error body
+      }
+      return NextResponse.json(
+        { error: detail || "PDF OCR processing failed" },
+        { status: response.ok ? 500 : response.status },
+      );
+    }
+
+    return new Response(response.body, {
+      status: response.status,
+      headers: {
+        "Content-Type": response.headers.get("content-type") || "application/x-ndjson; charset=utf-8",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+      },
+    });
+  } catch (error) {
+    console.error("/api/craft-ocr/pdf error", error);
+    return NextResponse.json(
+      {
+        error: "Failed to connect to Python backend. Make sure it is running on port 8005.",
+        details: error instanceof Error ? error.message : "Unknown error",
+      },
+      { status: 500 },
+    );
+  }
+}
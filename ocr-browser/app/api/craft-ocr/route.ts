@@ -10,6 +10,9 @@ export async function POST(request: NextRequest) {
     const aiCorrect = formData.get('ai_correct') as string;
     const craftLongSize = formData.get('craft_long_size') as string | null;
     const craftUseRefiner = formData.get('craft_use_refiner') as string | null;
+    const recognitionMode = formData.get('recognition_mode') as string | null;
+    const layout = formData.get('layout') as string | null;
+    const craftTiling = formData.get('craft_tiling') as string | null;
 
     if (!file) {
       return NextResponse.json(
@@ -39,6 +42,15 @@ export async function POST(request: NextRequest) {
     if (craftUseRefiner) {
       pythonFormData.append('craft_use_refiner', craftUseRefiner);
     }
+    if (recognitionMode) {
+      pythonFormData.append('recognition_mode', recognitionMode);
+    }
+    if (layout) {
+      pythonFormData.append('layout', layout);
+    }
+    if (craftTiling) {
+      pythonFormData.append('craft_tiling', craftTiling);
+    }
 
     // Try CRAFT endpoint first, fallback to simple if it fails
     let response = await fetch(`${PYTHON_API_URL}/ocr`, {
@@ -75,7 +87,11 @@ export async function POST(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    // Pass the backend's per-stage breakdown through to the browser devtools
+    const serverTiming = response.headers.get('server-timing');
+    return NextResponse.json(data, {
+      headers: serverTiming ? { 'Server-Timing': serverTiming } : undefined,
+    });
 
   } catch (error) {
     console.error('API Error:', error);
@@ -52,7 +52,11 @@ export async function POST(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    // Pass the backend's per-stage breakdown through to the browser devtools
+    const serverTiming = response.headers.get("server-timing");
+    return NextResponse.json(data, {
+      headers: serverTiming ? { "Server-Timing": serverTiming } : undefined,
+    });
   } catch (error) {
     console.error("/api/transcribe error", error);
     return NextResponse.json(